@@ -0,0 +1,211 @@
+import asyncio
+from typing import Iterable, List, Optional
+from backend.DatabaseAccessLayer.EmailOutbox import EmailOutboxDAL
+from backend.Utils.mailer import EmailTransport, transport
+from backend.config import settings
+from backend.db import after_commit
+
+
+class EmailOutboxSender:
+    """
+    Background workers that drain the EmailOutbox table.
+
+    Each worker claims a batch of due messages (FOR UPDATE SKIP LOCKED),
+    sends them concurrently through the configured transport, and records
+    the outcome. Sends are capped across all workers by a shared semaphore;
+    failures are retried with exponential backoff until max_attempts.
+    Each send is bounded by send_timeout_seconds, kept well inside the
+    lease so a slow send is never claimed and sent a second time.
+    A separate task deletes failed messages older than retention_days.
+    """
+
+    def __init__(
+        self,
+        transport: EmailTransport,
+        workers: int,
+        concurrency: int,
+        batch_size: int,
+        poll_seconds: float,
+        max_attempts: int,
+        retry_base_seconds: float,
+        lease_seconds: int,
+        send_timeout_seconds: float,
+        retention_days: int,
+        purge_interval_seconds: float,
+        purge_batch_size: int
+    ):
+        self.dal = EmailOutboxDAL()
+        self.transport = transport
+        self.workers = workers
+        self.concurrency = max(1, concurrency)
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.lease_seconds = lease_seconds
+        self.send_timeout_seconds = min(send_timeout_seconds, lease_seconds / 2)
+        self.retention_days = retention_days
+        self.purge_interval_seconds = purge_interval_seconds
+        self.purge_batch_size = max(1, purge_batch_size)
+
+        self._tasks: List[asyncio.Task] = []
+        self._purge_task: Optional[asyncio.Task] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+        self.in_flight = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.purged = 0
+        self.last_error: Optional[str] = None
+
+    def start(self) -> None:
+        if self._tasks or self.workers <= 0:
+            return
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run(), name=f"email-outbox-{i}") for i in range(self.workers)]
+        if self.purge_interval_seconds > 0:
+            self._purge_task = asyncio.create_task(self._purge_loop(), name="email-outbox-purge")
+
+    async def stop(self) -> None:
+        tasks = self._tasks + ([self._purge_task] if self._purge_task is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._purge_task = None
+
+    def notify(self) -> None:
+        """Wake idle workers early instead of waiting for the next poll."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                batch, abandoned = await self.dal.claim_batch(self.batch_size, self.lease_seconds, self.max_attempts)
+                self.failed += abandoned
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Email outbox: failed to claim messages: {e}")
+                batch = []
+
+            if batch:
+                await asyncio.gather(*(self._deliver(message) for message in batch))
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def purge(self) -> int:
+        removed = 0
+        while True:
+            batch = await self.dal.purge_failed(self.retention_days, self.purge_batch_size)
+            removed += batch
+            if batch < self.purge_batch_size:
+                break
+        self.purged += removed
+        return removed
+
+    async def _purge_loop(self) -> None:
+        while True:
+            try:
+                await self.purge()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Email outbox: failed to purge failed messages: {e}")
+            await asyncio.sleep(self.purge_interval_seconds)
+
+    async def _deliver(self, message) -> None:
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                provider_id = await asyncio.wait_for(
+                    self.transport.send(
+                        message.ToAddress,
+                        message.Subject,
+                        message.PlainText,
+                        message.HtmlContent
+                    ),
+                    timeout=self.send_timeout_seconds
+                )
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timed_out += 1
+                    error = f"Send timed out after {self.send_timeout_seconds:g}s"
+                else:
+                    error = str(e)
+                self.last_error = error
+                if message.Attempts >= self.max_attempts:
+                    self.failed += 1
+                    retry_in = None
+                else:
+                    self.retried += 1
+                    retry_in = self.retry_base_seconds * (2 ** (message.Attempts - 1))
+                await self._record(self.dal.mark_failed(message.Id, error, retry_in))
+                return
+            finally:
+                self.in_flight -= 1
+
+            self.sent += 1
+            await self._record(self.dal.mark_sent(message.Id, provider_id))
+
+    async def _record(self, update) -> None:
+        # The lease brings the message back if this bookkeeping write is lost.
+        try:
+            await update
+        except Exception as e:
+            print(f"Email outbox: failed to record delivery result: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "purged": self.purged,
+            "last_error": self.last_error,
+        }
+
+
+email_outbox_sender = EmailOutboxSender(
+    transport,
+    workers=settings.EMAIL_SENDER_WORKERS,
+    concurrency=settings.EMAIL_SEND_CONCURRENCY,
+    batch_size=settings.EMAIL_OUTBOX_BATCH_SIZE,
+    poll_seconds=settings.EMAIL_OUTBOX_POLL_SECONDS,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    retry_base_seconds=settings.EMAIL_RETRY_BASE_SECONDS,
+    lease_seconds=settings.EMAIL_SEND_LEASE_SECONDS,
+    send_timeout_seconds=settings.EMAIL_SEND_TIMEOUT_SECONDS,
+    retention_days=settings.EMAIL_FAILED_RETENTION_DAYS,
+    purge_interval_seconds=settings.EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS,
+    purge_batch_size=settings.EMAIL_OUTBOX_PURGE_BATCH_SIZE
+)
+
+
+class EmailOutboxBAL:
+    def __init__(self):
+        self.dal = EmailOutboxDAL()
+
+    async def queue_email(self, to_address: str, subject: str, plain_text: str, html_content: str = None):
+        message = await self.dal.enqueue(to_address, subject, plain_text, html_content)
+        after_commit(email_outbox_sender.notify)
+        return message
+
+    async def queue_emails(self, messages: Iterable[dict]) -> int:
+        count = await self.dal.enqueue_many(messages)
+        if count:
+            after_commit(email_outbox_sender.notify)
+        return count
@@ -1,3 +1,4 @@
+from typing import Dict, List, Tuple
 from fastapi import HTTPException
 from backend.DatabaseAccessLayer.RolePermissionsCombinedDal import RolePermissionsCombinedDAL
 from backend.Entities.Permissions import Permissions
@@ -25,6 +26,14 @@ class PermissionsBAL:
                 detail=f"You do not have permission to {method} {table_name}"
             )
 
+    async def check_many(self, user, checks: List[Tuple[str, str]]) -> Dict[Tuple[str, str], bool]:
+        """
+        Resolve several {table}.{method} decisions for one user at once.
+        Returns {(table_name, method): allowed} without raising, so handlers
+        can decide how to react to partial access.
+        """
+        return await self.dal.role_has_permissions(user.RoleId, checks)
+
     # ============================================================
     # PERMISSIONS CRUD
     # ============================================================
@@ -0,0 +1,120 @@
+import hashlib
+import hmac
+import mimetypes
+from typing import Optional, Tuple
+from backend.DatabaseAccessLayer.ProtectedFiles import ProtectedFilesDAL
+from backend.Utils.media import (
+    place_protected_blob, remove_protected_blob, discard_protected_temp, is_sha256_digest
+)
+from backend.config import settings
+from backend.Utils.uploads import StreamedUpload, file_extension
+from backend.Utils.workers import spawn_background
+from backend.db import after_commit, unit_of_work
+
+
+class ProtectedFilesBAL:
+    """
+    Content-addressed storage for protected documents.
+
+    Each distinct content is written once to Protected_Media/blobs/<ab>/<sha256>
+    and reference-counted in the ProtectedFiles table; document records in
+    UsersFieldData point at it through their "sha256". A blob is removed only
+    after the transaction dropping its last reference has committed.
+
+    Records carry a "ref" tag (an HMAC of the digest) so that only records
+    this class issued can drop a reference; a client-written record naming
+    someone else's digest never touches the count.
+    """
+
+    def __init__(self):
+        self.dal = ProtectedFilesDAL()
+
+    @staticmethod
+    def document_info(value) -> Optional[dict]:
+        """The {"name", "size_mb", "sha256"} dict stored in a UsersFieldData.Value, if any."""
+        file_info = value.get("data") if isinstance(value, dict) else value
+        if isinstance(file_info, dict) and file_info.get("name"):
+            return file_info
+        return None
+
+    @staticmethod
+    def _reference_tag(digest: str) -> str:
+        return hmac.new(settings.SECRET_KEY.encode(), f"protected-file:{digest}".encode(), hashlib.sha256).hexdigest()
+
+    @classmethod
+    def document_record(cls, digest: str, size_bytes: int, ext: str) -> dict:
+        """The UsersFieldData document record for a reference taken on `digest`."""
+        return {
+            "name": f"{digest}{ext.lower()}",
+            "size_mb": round(size_bytes / (1024 * 1024), 4),
+            "sha256": digest,
+            "ref": cls._reference_tag(digest),
+        }
+
+    @classmethod
+    def holds_reference(cls, file_info: dict) -> bool:
+        """Whether a document record was issued by `store_upload` (or the migration)."""
+        digest = file_info.get("sha256")
+        tag = file_info.get("ref")
+        return (
+            is_sha256_digest(digest)
+            and isinstance(tag, str)
+            and hmac.compare_digest(tag, cls._reference_tag(digest))
+        )
+
+    async def store_upload(self, upload: StreamedUpload) -> Tuple[dict, bool]:
+        """
+        Take a reference on the uploaded content and move the temp file into
+        the store unless identical content is already there.
+
+        Returns the document record for UsersFieldData and whether a new blob
+        was written (the caller removes it with `discard_new_blob` if the
+        record cannot be saved).
+        """
+        ext = file_extension(upload.filename) or mimetypes.guess_extension(upload.content_type or "") or ""
+        mime_type = upload.content_type or mimetypes.guess_type(upload.filename or "")[0]
+        try:
+            # The digest stays locked until commit, so a concurrent release
+            # cannot collect the blob between these two steps.
+            await self.dal.acquire(upload.sha256, upload.size_bytes, mime_type)
+            created = await place_protected_blob(upload.temp_path, upload.sha256)
+        except Exception:
+            await discard_protected_temp(upload.temp_path)
+            raise
+
+        return self.document_record(upload.sha256, upload.size_bytes, ext), created
+
+    async def discard_new_blob(self, file_info: dict) -> None:
+        """Undo the blob write of a failed `store_upload`; the reference is rolled back with the request."""
+        await remove_protected_blob(file_info["sha256"])
+
+    async def release(self, file_info: Optional[dict]) -> None:
+        """
+        Drop the reference held by a document record. The blob is deleted
+        once the last reference is gone. Records this class did not issue
+        (legacy files, untagged or tampered records) hold no reference and
+        are left alone; unreferenced legacy files are removed by
+        `migrate_protected_media --delete-orphans`.
+        """
+        if not file_info:
+            return
+        if not self.holds_reference(file_info):
+            print(f"Not releasing document '{file_info.get('name')}': record holds no store reference")
+            return
+        digest = file_info["sha256"]
+        remaining = await self.dal.release(digest)
+        if remaining == 0:
+            after_commit(lambda: spawn_background(self._collect(digest)))
+
+    async def _collect(self, digest: str) -> None:
+        # Re-check under the digest lock: the same content may have been
+        # uploaded again since the last reference was dropped.
+        try:
+            async with unit_of_work():
+                if await self.dal.is_unreferenced(digest):
+                    await remove_protected_blob(digest)
+        except Exception as e:
+            print(f"Failed to collect protected blob {digest}: {e}")
+
+
+protected_files_bal = ProtectedFilesBAL()
@@ -3,12 +3,19 @@ from fastapi import HTTPException
 from backend.DatabaseAccessLayer.RequiredFieldsForUsers import RequiredFieldsForUsersDAL
 from backend.Schemas.ResponseMessage import ResponseMessage
 from backend.Entities.RequiredFieldsForUsers import RequiredFieldsForUsers
+from backend.Utils.field_schema import field_schema_cache
+from backend.db import after_commit
 from datetime import datetime
 
 class RequiredFieldsForUsersBAL:
     def __init__(self):
         self.dal = RequiredFieldsForUsersDAL()
 
+    @staticmethod
+    def _schema_changed(role_id: int) -> None:
+        # Drop the role's compiled field schema once the change is committed
+        after_commit(lambda: field_schema_cache.invalidate(role_id))
+
     async def create_field(
         self,
         role_id: int,
@@ -45,6 +52,7 @@ class RequiredFieldsForUsersBAL:
                 status_code=409,
                 detail=f"Field '{field_name}' already exists for role {role_id}"
             )
+        self._schema_changed(role_id)
 
         return ResponseMessage(
             status="success",
@@ -105,19 +113,23 @@ class RequiredFieldsForUsersBAL:
         if is_active is not None:
             field.IsActive = is_active
 
-        return await self.dal.update(field)
+        updated = await self.dal.update(field)
+        self._schema_changed(field.RoleId)
+        return updated
 
     # ---------------- DELETE FIELD ----------------
     async def delete_field(self, field_id: int) -> ResponseMessage:
         deleted = await self.dal.delete_field(field_id)
         if not deleted:
             raise HTTPException(status_code=404, detail=f"Field with id {field_id} not found")
+        self._schema_changed(deleted.RoleId)
         return ResponseMessage(status="success", message=f"Field with id {field_id} deleted successfully")
 
     async def deactivate_field(self, field_id: int) -> ResponseMessage:
         deactivated = await self.dal.deactivate_field(field_id)
         if not deactivated:
             raise HTTPException(status_code=404, detail=f"Field with id {field_id} not found")
+        self._schema_changed(deactivated.RoleId)
 
         return ResponseMessage(
             status="success",
@@ -128,6 +140,7 @@ class RequiredFieldsForUsersBAL:
         activated = await self.dal.activate_field(field_id)
         if not activated:
             raise HTTPException(status_code=404, detail=f"Field with id {field_id} not found")
+        self._schema_changed(activated.RoleId)
 
         return ResponseMessage(
             status="success",
@@ -63,10 +63,10 @@ class RolesBAL:
         return updated_role
 
     async def delete_role(self, role_id: int):
-        fields = await self.required_fields_for_users_dal.get_fields_by_role(role_id)
-        if fields:
+        field_count = await self.required_fields_for_users_dal.count_fields_by_role(role_id)
+        if field_count:
             raise ValueError(
-                f"Cannot delete role: {len(fields)} field(s) reference this role."
+                f"Cannot delete role: {field_count} field(s) reference this role."
             )
 
         deleted = await self.roles_dal.delete_role(role_id)
@@ -1,25 +1,36 @@
 import string
-from io import BytesIO
-from PIL import Image
-from typing import Optional
+from typing import AsyncIterator, List, Optional, Tuple
+from pydantic import EmailStr, TypeAdapter, ValidationError
 from fastapi import Response, HTTPException, status, Cookie, UploadFile
 from datetime import timedelta
 import secrets
+import uuid
 
 from backend.DatabaseAccessLayer.Users import UsersDAL
 from backend.DatabaseAccessLayer.Roles import RolesDAL
-from backend.DatabaseAccessLayer.Otps import OtpsDAL
-from backend.Utils.helpers import pwd_context, verify_password, validate_password_format, create_access_token, verify_token
-from backend.Utils.mailer import send_email_async
-from backend.Utils.media import save_media, del_media
+from backend.Utils.helpers import validate_password_format, create_access_token, decode_access_token, encode_cursor, decode_cursor, generate_random_password
+from backend.Utils.passwords import hash_password_async, verify_password_async, hash_passwords_async
+from backend.Utils.user_import import ImportRow
+from backend.Utils.import_jobs import import_jobs, ImportJob
+from backend.BusinessAccessLayer.EmailOutbox import EmailOutboxBAL
+from backend.Utils.media import save_media_variants, del_media_group
+from backend.Utils.images import render_profile_picture, profile_picture_variants, InvalidImageError, PROFILE_PICTURE_SIZES
+from backend.Utils.workers import spawn_background, pool_saturated_http_error
+from backend.db import after_commit, after_rollback, unit_of_work, release_request_connection
+from backend.Utils.principal_cache import principal_cache, PrincipalSnapshot, TokenPrincipal, RoleClaims
+from backend.Utils.token_versions import token_versions, REVOKED
+from backend.Utils.otp_store import otp_store
 from backend.config import settings
 from backend.Schemas.ResponseMessage import ResponseMessage
 
+_email_adapter = TypeAdapter(EmailStr)
+
+
 class UsersBAL:
     def __init__(self):
         self.users_dal = UsersDAL()
         self.roles_dal = RolesDAL()
-        self.otps_dal = OtpsDAL()
+        self.email_outbox = EmailOutboxBAL()
 
 
     def serialize_user(self, user):
@@ -28,27 +39,49 @@ class UsersBAL:
             "full_name": user.FullName,
             "email": user.Email,
             "role": '',
-            "profile_picture": user.ProfilePicture
+            "profile_picture": user.ProfilePicture,
+            "profile_picture_variants": profile_picture_variants(user.ProfilePicture)
         }
 
 
     async def serialize_users_list(self, users):
         return [self.serialize_user(u) for u in users]
 
+    @staticmethod
+    def _welcome_email(email: str, full_name: str, role_name: str) -> dict:
+        # Never carries the password: queued messages sit in EmailOutbox until
+        # delivered. The user sets one with the one-time code from "Forgot Password?".
+        return {
+            "to_address": email,
+            "subject": "Welcome to the Platform",
+            "plain_text": (
+                f"Hello {full_name},\n\n"
+                f"Your account has been created with the role: {role_name}.\n"
+                f"Your sign-in email is: {email}\n\n"
+                "If you did not choose a password yourself, use \"Forgot Password?\" on the "
+                "sign-in page to receive a one-time code and set one."
+            ),
+        }
+
     # ---------------- CREATE USER ----------------
-    async def create_user(self, full_name: str, email: str, password: str, role_id: int):
+    async def create_user(self, full_name: str, email: str, password: str, role_id: int, role=None):
+        """`role` is the already loaded Roles row, when the caller has it."""
         if not full_name or not full_name.strip():
             raise ValueError("Full name cannot be empty")
         if not email or "@" not in email:
             raise ValueError("Invalid email address")
 
         validate_password_format(password)
-        hashed_password = pwd_context.hash(password)
 
-        role = await self.roles_dal.get_by_id(role_id)
+        if role is None or role.Id != role_id:
+            role = await self.roles_dal.get_by_id(role_id)
         if not role:
             raise ValueError(f"Role with id {role_id} does not exist")
 
+        # Nothing written yet: don't hold a connection while bcrypt runs
+        await release_request_connection()
+        hashed_password = await hash_password_async(password)
+
         user = await self.users_dal.create_user(
             full_name.strip(),
             email.strip().lower(),
@@ -56,17 +89,8 @@ class UsersBAL:
             role_id
         )
 
-        # Send welcome email async
-        await send_email_async(
-                to_address=user.Email,
-                subject="Welcome to the Platform",
-                plain_text=(
-                    f"Hello {user.FullName},\n\n"
-                    f"Your account has been created with the role: {role.Name}.\n"
-                    f"Your password is: {password}\n\n"
-                    "Please keep it safe and change it after logging in."
-                )
-            )
+        # Queue welcome email; delivered by the outbox workers once committed
+        await self.email_outbox.queue_email(**self._welcome_email(user.Email, user.FullName, role.Name))
 
         return ResponseMessage(
             status="success",
@@ -79,6 +103,162 @@ class UsersBAL:
             }
         )
 
+    # ---------------- BULK IMPORT ----------------
+    @staticmethod
+    def _validate_import_row(data: dict) -> dict:
+        """Normalize one import row; raises ValueError with a row-level message."""
+        full_name = str(data.get("full_name") or "").strip()
+        if not full_name:
+            raise ValueError("Full name cannot be empty")
+        if len(full_name) > 200:
+            raise ValueError("Full name is longer than 200 characters")
+
+        try:
+            email = _email_adapter.validate_python(str(data.get("email") or "").strip()).lower()
+        except ValidationError:
+            raise ValueError("Invalid email address")
+
+        password = data.get("password") or None
+        if password is not None:
+            password = str(password)
+            if len(password) < 8:
+                raise ValueError("Password must be at least 8 characters")
+            validate_password_format(password)
+        else:
+            password = generate_random_password()
+
+        return {"full_name": full_name, "email": email, "password": password}
+
+    async def import_users(self, role, actor, rows: AsyncIterator[ImportRow]) -> ResponseMessage:
+        """
+        Start importing users of `role` from a stream of parsed rows.
+
+        The body is read and every row validated while the request is open,
+        so a malformed file is still refused with 400. Creating the users
+        runs as a background import job (see backend.Utils.import_jobs):
+        the response carries its id, and `get_import_job` returns progress
+        and, once finished, the per-row report.
+        """
+        if import_jobs.is_full():
+            raise pool_saturated_http_error()
+
+        report = []
+        seen_emails = set()
+        pending = []
+        truncated = False
+
+        # The request's connection (role lookup, authentication) must not
+        # stay open for the length of the upload
+        await release_request_connection()
+
+        async for item in rows:
+            if item.row > settings.USER_IMPORT_MAX_ROWS:
+                truncated = True
+                break
+            if item.error:
+                report.append({"row": item.row, "status": "invalid", "error": item.error})
+                continue
+            try:
+                user = self._validate_import_row(item.data)
+            except ValueError as e:
+                report.append({"row": item.row, "email": item.data.get("email"), "status": "invalid", "error": str(e)})
+                continue
+            if user["email"] in seen_emails:
+                report.append({"row": item.row, "email": user["email"], "status": "invalid", "error": "Duplicate email in file"})
+                continue
+            seen_emails.add(user["email"])
+
+            pending.append((item.row, user))
+
+        job = import_jobs.create(role.Id, actor.Id, total=len(pending))
+        import_jobs.submit(job, lambda job: self._run_import(job, role, pending, report, truncated))
+
+        return ResponseMessage(
+            status="success",
+            message=f"Import of {len(pending)} user(s) into role '{role.Name}' started",
+            data={
+                **job.to_dict(include_result=False),
+                "invalid": len(report),
+                "truncated_after_row": settings.USER_IMPORT_MAX_ROWS if truncated else None,
+            }
+        )
+
+    async def _run_import(
+        self,
+        job: ImportJob,
+        role,
+        pending: List[Tuple[int, dict]],
+        report: List[dict],
+        truncated: bool
+    ) -> dict:
+        """
+        Body of an import job. Rows are processed in batches of
+        USER_IMPORT_BATCH_SIZE: passwords (given or generated) are hashed in
+        parallel in the password pool, then one multi-row INSERT ... ON
+        CONFLICT (Email) DO NOTHING and one bulk welcome-email enqueue run in
+        a transaction of their own, so a late failure keeps earlier batches
+        (and the report of a failed job lists them).
+        """
+        try:
+            size = settings.USER_IMPORT_BATCH_SIZE
+            for start in range(0, len(pending), size):
+                batch = pending[start:start + size]
+                await self._import_batch(role, batch, report)
+                job.processed += len(batch)
+                # Plaintext passwords are not kept once hashed
+                for _, user in batch:
+                    user.pop("password", None)
+        finally:
+            report.sort(key=lambda entry: entry["row"])
+            summary = {status: sum(1 for e in report if e["status"] == status) for status in ("created", "skipped", "invalid")}
+            job.result = {
+                "role_id": role.Id,
+                "role_name": role.Name,
+                **summary,
+                "truncated_after_row": settings.USER_IMPORT_MAX_ROWS if truncated else None,
+                "rows": report,
+            }
+        return job.result
+
+    def get_import_job(self, job_id: str, actor) -> ResponseMessage:
+        """Progress of an import job; its report once finished. Visible to its starter and to Super Users."""
+        job = import_jobs.get(job_id)
+        is_super = actor.Role is not None and actor.Role.Name == "Super User"
+        if job is None or (job.actor_id != str(actor.Id) and not is_super):
+            raise HTTPException(
+                status_code=404,
+                detail=ResponseMessage(
+                    status="error",
+                    message="Import job not found."
+                ).dict()
+            )
+        return ResponseMessage(
+            status="success",
+            message=f"Import job is {job.status}",
+            data=job.to_dict()
+        )
+
+    async def _import_batch(self, role, batch: List[Tuple[int, dict]], report: List[dict]) -> None:
+        hashed = await hash_passwords_async([user["password"] for _, user in batch])
+
+        async with unit_of_work():
+            created = await self.users_dal.insert_many([
+                {"full_name": user["full_name"], "email": user["email"], "password": hashed_password, "role_id": role.Id}
+                for (_, user), hashed_password in zip(batch, hashed)
+            ])
+            created_ids = {email: user_id for user_id, email in created}
+            await self.email_outbox.queue_emails(
+                self._welcome_email(user["email"], user["full_name"], role.Name)
+                for _, user in batch
+                if user["email"] in created_ids
+            )
+
+        for row, user in batch:
+            if user["email"] in created_ids:
+                report.append({"row": row, "email": user["email"], "status": "created", "user_id": str(created_ids[user["email"]])})
+            else:
+                report.append({"row": row, "email": user["email"], "status": "skipped", "error": "Email already registered"})
+
     # ---------------- GET USER ----------------
     async def get_user(self, user_id: str, active: bool = None):
         user = await self.users_dal.get_user_by_id(user_id, active=active)
@@ -102,6 +282,30 @@ class UsersBAL:
             data=serialized_users
         )
 
+    async def get_users_page(self, role_id: int, limit: int, cursor: Optional[str] = None, active: bool = True):
+        """Keyset-paginated users of a role; pass back `next_cursor` to get the following page."""
+        after = None
+        if cursor:
+            created_at, user_id = decode_cursor(cursor)
+            try:
+                after = (created_at, uuid.UUID(user_id))
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        # One extra row tells whether another page exists
+        rows = await self.users_dal.get_users_page(role_id, limit + 1, after=after, active=active)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        return ResponseMessage(
+            status="success",
+            message="Users fetched successfully",
+            data={
+                "users": await self.serialize_users_list(rows),
+                "next_cursor": encode_cursor(rows[-1].CreatedAt, rows[-1].Id) if has_more else None
+            }
+        )
+
     # ---------------- UPDATE USER ----------------
     async def update_user(
         self, 
@@ -122,7 +326,8 @@ class UsersBAL:
         hashed_password = None
         if password:
             validate_password_format(password)
-            hashed_password = pwd_context.hash(password)
+            await release_request_connection()
+            hashed_password = await hash_password_async(password)
 
         # 3. Validate role
         if role_id:
@@ -148,14 +353,10 @@ class UsersBAL:
 
     # ---------------- DEACTIVATE USER ----------------
     async def deactivate_user(self, user_id: str) -> ResponseMessage:
-        user = await self.users_dal.get_user_by_id(user_id)
+        user = await self.users_dal.deactivate_user(user_id)
         if not user:
             raise ValueError(f"User with id {user_id} not found")
 
-        user.IsActive = False
-        self.users_dal.session.commit()
-        self.users_dal.session.refresh(user)
-
         return ResponseMessage(
             status="success",
             message=f"User '{user.FullName}' has been deactivated.",
@@ -176,7 +377,9 @@ class UsersBAL:
     # ---------------- LOGIN ----------------
     async def login_user(self, response: Response, email: str, password: str) -> ResponseMessage:
         user = await self.users_dal.get_user_by_email(email.strip().lower(), True)
-        if not user or not verify_password(password, user.Password):
+        # The lookup is all the DB work before bcrypt; free the connection for its wait
+        await release_request_connection()
+        if not user or not await verify_password_async(password, user.Password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=ResponseMessage(status="error", message="Invalid credentials or account is not active").dict()
@@ -189,7 +392,12 @@ class UsersBAL:
             )
 
         access_token_expires = timedelta(minutes=settings.JWT_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(data={"sub": str(user.Id)}, expires_delta=access_token_expires)
+        claims = {"sub": str(user.Id)}
+        if settings.AUTH_TOKEN_MODE == "claims":
+            role = await self.roles_dal.get_by_id(user.RoleId)
+            claims.update(rid=user.RoleId, rnm=role.Name, tv=user.TokenVersion)
+            token_versions.put(user.Id, user.TokenVersion, user.RoleId)
+        access_token = create_access_token(data=claims, expires_delta=access_token_expires)
 
         response.set_cookie(
             key=settings.COOKIE_NAME,
@@ -213,35 +421,106 @@ class UsersBAL:
 
     # ---------------- AUTH DEPENDENCIES ----------------
     @staticmethod
-    def is_valid_user(*allowed_roles: str):
-        async def role_checker(token: Optional[str] = Cookie(None, alias=settings.COOKIE_NAME)):
-            if not token:
-                raise HTTPException(
-                    status_code=401,
-                    detail=ResponseMessage(status="error", message="Not authenticated").dict()
-                )
-            try:
-                user_id = verify_token(token)
-            except Exception:
-                raise HTTPException(
-                    status_code=401,
-                    detail=ResponseMessage(status="error", message="Invalid authentication token").dict()
-                )
+    async def _load_principal(user_id: str) -> Optional[PrincipalSnapshot]:
+        """
+        Resolve the authenticated user from the principal cache, falling back
+        to a single joined lookup on a miss. Only active users are cached.
+        """
+        principal = principal_cache.get(user_id)
+        if principal:
+            return principal
+
+        user = await UsersDAL().get_user_with_role(user_id, active=True)
+        if not user:
+            return None
 
-            user_dal = UsersDAL()
-            user = await user_dal.get_user_with_role(user_id, active=True)
-            if not user:
-                raise HTTPException(
-                    status_code=401,
-                    detail=ResponseMessage(status="error", message="User not found").dict()
-                )
+        principal = PrincipalSnapshot.from_user(user)
+        principal_cache.put(principal)
+        return principal
 
-            if not user.IsActive:
-                raise HTTPException(
-                    status_code=403,
-                    detail=ResponseMessage(status="error", message="Inactive user").dict()
-                )
+    @staticmethod
+    async def _token_version(user_id: str) -> Optional[int]:
+        """Current TokenVersion of an active user (None otherwise), from the version map when possible."""
+        version = token_versions.get(user_id)
+        if version is None:
+            state = await UsersDAL().get_token_state(user_id)
+            if state is None:
+                token_versions.revoke(user_id)
+                return None
+            version, role_id = state
+            token_versions.put(user_id, version, role_id)
+        return None if version == REVOKED else version
 
+    @staticmethod
+    async def _principal_from_claims(user_id: str, claims: dict):
+        """
+        AUTH_TOKEN_MODE=claims: accept the role carried by the token if its
+        version is still the user's current one. Deactivation, deletion and
+        password or role changes bump the version, so such tokens fail here.
+        """
+        version = await UsersBAL._token_version(user_id)
+        if version is None:
+            return None
+        if version != claims["tv"]:
+            raise HTTPException(
+                status_code=401,
+                detail=ResponseMessage(status="error", message="Session expired, please log in again").dict()
+            )
+
+        principal = principal_cache.get(user_id)
+        if principal and principal.RoleId == claims["rid"]:
+            return principal
+        return TokenPrincipal(Id=uuid.UUID(user_id), RoleId=claims["rid"], Role=RoleClaims(Id=claims["rid"], Name=claims["rnm"]))
+
+    @staticmethod
+    async def _authenticate(token: Optional[str]):
+        if not token:
+            raise HTTPException(
+                status_code=401,
+                detail=ResponseMessage(status="error", message="Not authenticated").dict()
+            )
+        try:
+            claims = decode_access_token(token)
+        except Exception:
+            raise HTTPException(
+                status_code=401,
+                detail=ResponseMessage(status="error", message="Invalid authentication token").dict()
+            )
+
+        user_id = claims["sub"]
+        # Tokens issued in lookup mode (no "tv") keep working after switching modes
+        if settings.AUTH_TOKEN_MODE == "claims" and "tv" in claims:
+            user = await UsersBAL._principal_from_claims(user_id, claims)
+        else:
+            user = await UsersBAL._load_principal(user_id)
+        if not user:
+            raise HTTPException(
+                status_code=401,
+                detail=ResponseMessage(status="error", message="User not found").dict()
+            )
+        if not user.IsActive:
+            raise HTTPException(
+                status_code=403,
+                detail=ResponseMessage(status="error", message="Inactive user").dict()
+            )
+        return user
+
+    async def load_profile(self, principal) -> PrincipalSnapshot:
+        """The full principal (name, email, picture) for one taken from token claims."""
+        if not isinstance(principal, TokenPrincipal):
+            return principal
+        user = await self._load_principal(str(principal.Id))
+        if not user:
+            raise HTTPException(
+                status_code=401,
+                detail=ResponseMessage(status="error", message="User not found").dict()
+            )
+        return user
+
+    @staticmethod
+    def is_valid_user(*allowed_roles: str):
+        async def role_checker(token: Optional[str] = Cookie(None, alias=settings.COOKIE_NAME)):
+            user = await UsersBAL._authenticate(token)
             if allowed_roles and user.Role and user.Role.Name not in allowed_roles:
                 raise HTTPException(
                     status_code=403,
@@ -253,31 +532,7 @@ class UsersBAL:
     @staticmethod
     def is_user_authenticated():
         async def auth_checker(token: Optional[str] = Cookie(None, alias=settings.COOKIE_NAME)):
-            if not token:
-                raise HTTPException(
-                    status_code=401,
-                    detail=ResponseMessage(status="error", message="Not authenticated").dict()
-                )
-            try:
-                user_id = verify_token(token)
-            except Exception:
-                raise HTTPException(
-                    status_code=401,
-                    detail=ResponseMessage(status="error", message="Invalid authentication token").dict()
-                )
-            user_dal = UsersDAL()
-            user = await user_dal.get_user_with_role(user_id, active=True)
-            if not user:
-                raise HTTPException(
-                    status_code=401,
-                    detail=ResponseMessage(status="error", message="User not found").dict()
-                )
-            if not user.IsActive:
-                raise HTTPException(
-                    status_code=403,
-                    detail=ResponseMessage(status="error", message="Inactive user").dict()
-                )
-            return user
+            return await UsersBAL._authenticate(token)
         return auth_checker
 
     # ---------------- OTP ----------------
@@ -287,9 +542,9 @@ class UsersBAL:
             raise HTTPException(status_code=404, detail=ResponseMessage(status="error", message="User not found").dict())
 
         code = ''.join(secrets.choice(string.digits) for _ in range(6))
-        await self.otps_dal.create_otp(user.Id, code, expires_in_minutes)
+        await otp_store.issue(user.Id, code, expires_in_minutes)
 
-        await send_email_async(
+        await self.email_outbox.queue_email(
             to_address=user.Email,
             subject="Your OTP Code",
             plain_text=f"Hello {user.FullName},\n\nYour OTP code is: {code}\nIt expires in {expires_in_minutes} minutes."
@@ -302,19 +557,35 @@ class UsersBAL:
         if not user:
             raise HTTPException(status_code=404, detail=ResponseMessage(status="error", message="User not found").dict())
 
-        otp_record = await self.otps_dal.get_valid_otp(user.Id, code)
-        if not otp_record:
+        # Checked before the OTP is spent, so a rejected password does not burn the code
+        try:
+            validate_password_format(password)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=ResponseMessage(status="error", message=str(e)).dict())
+
+        # Hashed before the code is spent and with no connection held, so a busy
+        # password pool neither burns the code nor pins a DB connection
+        await release_request_connection()
+        try:
+            hashed_password = await hash_password_async(password)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=ResponseMessage(status="error", message=f"Error saving password: {str(e)}").dict())
+
+        # Atomic: of two concurrent requests with the same code only one gets through.
+        # With the database store this is part of the request transaction, so the
+        # code is only spent if the new password is saved too.
+        if not await otp_store.consume(user.Id, code):
             return ResponseMessage(status="error", message="Invalid or expired OTP")
 
         try:
-            validate_password_format(password)
-            hashed_password = pwd_context.hash(password)
             await self.users_dal.update_user(user.Id, password=hashed_password)
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=ResponseMessage(status="error", message=f"Error saving password: {str(e)}").dict())
 
-        await self.otps_dal.mark_otp_used(otp_record.Id)
-
         return ResponseMessage(
             status="success",
             message="OTP verified successfully",
@@ -333,58 +604,42 @@ class UsersBAL:
                 ).dict()
             )
 
-        # 2. Read file bytes
-        try:
-            file_bytes = await file.read()
-        except Exception:
+        # 2. Read file bytes (the multipart parser has already spooled the upload)
+        max_bytes = settings.PROFILE_PICTURE_MAX_MB * 1024 * 1024
+        if file.size is not None and file.size > max_bytes:
             raise HTTPException(
                 status_code=400,
                 detail=ResponseMessage(
                     status="error",
-                    message="Failed to read uploaded file."
+                    message=f"Image exceeds maximum of {settings.PROFILE_PICTURE_MAX_MB} MB."
                 ).dict()
             )
-
-        # 3. Validate image using Pillow
         try:
-            image = Image.open(BytesIO(file_bytes))
-            image.verify()  # check if image is valid
-            image_format = image.format.lower()
-            if image_format not in ["jpeg", "png", "gif", "webp"]:
-                raise HTTPException(
-                    status_code=400,
-                    detail=ResponseMessage(
-                        status="error",
-                        message="Invalid image content."
-                    ).dict()
-                )
+            file_bytes = await file.read()
         except Exception:
             raise HTTPException(
                 status_code=400,
                 detail=ResponseMessage(
                     status="error",
-                    message="Uploaded file is not a valid image."
+                    message="Failed to read uploaded file."
                 ).dict()
             )
 
-        # 4. Resize if necessary
+        # 3. Decode once, validate and render every size variant in the image pool;
+        # the user is loaded afterwards so no connection sits idle meanwhile
+        await release_request_connection()
         try:
-            image = Image.open(BytesIO(file_bytes))  # reopen after verify
-            if max(image.size) > 512:
-                image.thumbnail((512, 512))
-                buffer = BytesIO()
-                image.save(buffer, format=image.format or "PNG", quality=85, optimize=True)
-                file_bytes = buffer.getvalue()
-        except Exception:
+            ext, variants = await render_profile_picture(file_bytes)
+        except InvalidImageError:
             raise HTTPException(
                 status_code=400,
                 detail=ResponseMessage(
                     status="error",
-                    message="Failed to process image."
+                    message="Uploaded file is not a valid image."
                 ).dict()
             )
 
-        # 5. Fetch user
+        # 4. Fetch user
         user = await self.users_dal.get_user_by_id(user_id)
         if not user:
             raise HTTPException(
@@ -395,22 +650,28 @@ class UsersBAL:
                 ).dict()
             )
 
-        # 6. Delete old profile picture
+        # 5. Save new variants and point the user at the largest one
+        file_guid = await save_media_variants(variants)
+        new_file_url = f"/media/{file_guid}_{max(PROFILE_PICTURE_SIZES)}{ext}"
+        # Removed again if the request fails later, up to its final commit
+        after_rollback(lambda: spawn_background(del_media_group(file_guid)))
+        try:
+            await self.users_dal.update_user(user_id, profile_picture=new_file_url)
+        except Exception:
+            await del_media_group(file_guid)
+            raise
+
+        # 6. Delete the old picture with all its variants, once the change is committed
         if user.ProfilePicture:
             old_filename = user.ProfilePicture.split("/")[-1]
-            try:
-                await del_media(old_filename)
-            except Exception as e:
-                print("photo exception", e)
-                print(f"Warning: Failed to delete old profile picture {old_filename}")
-
-        # 7. Save new profile picture
-        new_file_url = await save_media(file_bytes, mime_type=file.content_type)
-        await self.users_dal.update_user(user_id, profile_picture=new_file_url)
+            after_commit(lambda: spawn_background(del_media_group(old_filename)))
 
-        # 8. Return standardized response
+        # 7. Return standardized response
         return ResponseMessage(
             status="success",
             message="Profile picture updated successfully",
-            data={"profile_picture_url": new_file_url}
+            data={
+                "profile_picture_url": new_file_url,
+                "profile_picture_variants": profile_picture_variants(new_file_url)
+            }
         )
@@ -1,4 +1,4 @@
-from typing import Any, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 from fastapi import HTTPException
 from backend.Entities.UsersFieldData import UsersFieldData
 from backend.DatabaseAccessLayer.UsersFieldData import UsersFieldDataDAL
@@ -6,7 +6,8 @@ from backend.DatabaseAccessLayer.RequiredFieldsForUsers import RequiredFieldsFor
 from backend.Entities.RequiredFieldsForUsers import RequiredFieldsForUsers
 from backend.DatabaseAccessLayer.Users import UsersDAL
 from backend.Schemas.ResponseMessage import ResponseMessage
-from datetime import datetime
+from backend.Utils.field_schema import compile_field
+from backend.Utils.roster_export import iter_roster
 import uuid
 
 
@@ -18,128 +19,145 @@ class UsersFieldDataBAL:
 
     async def _validate_and_normalize_value(
         self,
-        required_field: RequiredFieldsForUsers,
+        required_field,
         value: Any
     ) -> dict:
-        field_type = required_field.FieldType
-        validation = required_field.Validation or {}
-        options = required_field.Options or []
-
-        result = {}
-
-        if field_type == "text":
-            if not isinstance(value, str):
-                raise HTTPException(status_code=400, detail="Expected string for text field")
-            min_len = validation.get("min_length")
-            max_len = validation.get("max_length")
-            if min_len is not None and len(value) < min_len:
-                raise HTTPException(status_code=400, detail=f"Text too short, min length {min_len}")
-            if max_len is not None and len(value) > max_len:
-                raise HTTPException(status_code=400, detail=f"Text too long, max length {max_len}")
-            result["data"] = value
-
-        elif field_type == "number":
-            if not isinstance(value, (int, float)):
-                raise HTTPException(status_code=400, detail="Expected number for number field")
-            min_val = validation.get("min_value")
-            max_val = validation.get("max_value")
-            if min_val is not None and value < min_val:
-                raise HTTPException(status_code=400, detail=f"Number too small, min {min_val}")
-            if max_val is not None and value > max_val:
-                raise HTTPException(status_code=400, detail=f"Number too large, max {max_val}")
-            result["data"] = value
-
-        elif field_type == "date":
-            if isinstance(value, str):
-                try:
-                    value = datetime.fromisoformat(value)
-                except Exception:
-                    raise HTTPException(status_code=400, detail="Invalid date string")
-            elif not isinstance(value, datetime):
-                raise HTTPException(status_code=400, detail="Expected datetime object for date field")
-            min_date = validation.get("min_date")
-            max_date = validation.get("max_date")
-            if min_date and value < datetime.fromisoformat(min_date):
-                raise HTTPException(status_code=400, detail=f"Date too early, min {min_date}")
-            if max_date and value > datetime.fromisoformat(max_date):
-                raise HTTPException(status_code=400, detail=f"Date too late, max {max_date}")
-            result["data"] = value.isoformat()
-
-        elif field_type == "mcq":
-            if value not in [opt["label"] for opt in options]:
-                raise HTTPException(status_code=400, detail=f"Invalid option chosen for MCQ: {value}")
-            result["data"] = value
-
-        elif field_type == "msq":
-            if not isinstance(value, list):
-                raise HTTPException(status_code=400, detail="Expected list of options for MSQ")
-            valid_options = [opt["label"] for opt in options]
-            if not all(v in valid_options for v in value):
-                raise HTTPException(status_code=400, detail="One or more invalid options for MSQ")
-            result["data"] = value
-
-        elif field_type == "document":
-            if not isinstance(value, dict) or "name" not in value or "size_mb" not in value:
-                raise HTTPException(status_code=400, detail="Document must be a dict with 'name' and 'size_mb'")
-            allowed_exts = validation.get("allowed_extensions", [])
-            max_size = validation.get("max_size_mb")
-            if allowed_exts and not any(value["name"].endswith(ext) for ext in allowed_exts):
-                raise HTTPException(status_code=400, detail=f"File extension not allowed, allowed: {allowed_exts}")
-            if max_size is not None and value["size_mb"] > max_size:
-                raise HTTPException(status_code=400, detail=f"File size exceeds max {max_size} MB")
-            result["data"] = value
-
-        else:
-            raise HTTPException(status_code=400, detail=f"Unknown field type: {field_type}")
-
-        return result
-
-    async def get_user_fields_with_values(self, actor_user, target_user_id: str):
         """
-        Returns all active required fields for the target user's role,
-        plus the filled values (if any) and permission checks.
+        Validate `value` against a field (a RequiredFieldsForUsers row or a
+        CompiledField from the role schema) and return {"data": normalized}.
         """
-        target_uuid = uuid.UUID(target_user_id)
+        return {"data": compile_field(required_field).validate(value)}
 
-        # 1. Load target user
-        target_user = await self.users_dal.get_by_id(target_uuid)
-        if not target_user:
-            raise HTTPException(status_code=404, detail="Target user not found")
+    @staticmethod
+    def _check_field_permission(
+        required_field: RequiredFieldsForUsers,
+        has_value: bool,
+        is_self: bool,
+        is_super: bool,
+        actor_role_id: int
+    ) -> None:
+        """Fill/edit rules of one field for the actor; raises 403 when not allowed."""
+        # ------------------------------
+        # (A) FIRST FILL
+        if not has_value:
+            # Self-fill
+            if is_self and not is_super:
+                if required_field.FilledByRoleId != actor_role_id:
+                    raise HTTPException(403, "You cannot fill this field")
 
-        role_id = target_user.RoleId
+            # Filling another user's field
+            if not is_self and not is_super:
+                if required_field.FilledByRoleId != actor_role_id:
+                    raise HTTPException(403, "You cannot fill this field for this user")
 
-        # 2. Load required fields for this role
-        fields = await self.required_fields_dal.get_active_fields(role_id)
+        # ------------------------------
+        # (B) EDITING EXISTING VALUE
+        else:
+            # No one can edit if EditableByRoleId is NULL — except super
+            if required_field.EditableByRoleId is None and not is_super:
+                raise HTTPException(403, "This field cannot be edited")
 
-        # 3. Load existing data for this target user
-        existing_data = await self.dal.get_all_by_user(target_uuid)
-        data_map = {item.RequiredFieldId: item for item in existing_data}
+            # Self-edit
+            if is_self and not is_super:
+                if required_field.EditableByRoleId != actor_role_id:
+                    raise HTTPException(403, "You do not have permission to edit this field")
 
-        result = []
+            # Editing someone else's field
+            if not is_self and not is_super:
+                if required_field.EditableByRoleId != actor_role_id:
+                    raise HTTPException(403, "You do not have permission to edit this user's field")
 
-        for field in fields:
-            existing = data_map.get(field.Id)
-            value = None
-            filled = False
+    @staticmethod
+    def _stored_value(raw):
+        return raw.get("data") if isinstance(raw, dict) and "data" in raw else raw
 
-            if existing:
-                raw = existing.Value
-                value = raw.get("data") if isinstance(raw, dict) and "data" in raw else raw
-                filled = True
+    async def get_user_fields_with_values(self, actor_user, target_user_id: str):
+        """
+        Returns all active required fields for the target user's role,
+        in display order, with the filled values (if any).
+        """
+        try:
+            target_uuid = uuid.UUID(str(target_user_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid target user id")
+
+        # User, active fields of their role and existing values in one query
+        rows = await self.dal.get_fields_with_values([target_uuid])
+        if not rows:
+            raise HTTPException(status_code=404, detail="Target user not found")
 
-            result.append({
-                "field_id": field.Id,
-                "field_name": field.FieldName,
-                "field_type": field.FieldType,
-                "is_required": field.IsRequired,
-                "filled": filled,
-                "value": value,
-                "options": field.Options,
-                "validation": field.Validation,
+        return [
+            {
+                "field_id": row.FieldId,
+                "field_name": row.FieldName,
+                "field_type": row.FieldType,
+                "is_required": row.IsRequired,
+                "filled": row.Value is not None,
+                "value": self._stored_value(row.Value) if row.Value is not None else None,
+                "options": row.Options,
+                "validation": row.Validation,
+            }
+            for row in rows
+            if row.FieldId is not None
+        ]
+
+    # ---------------- FIELD MATRIX FOR MANY USERS ----------------
+    async def get_user_fields_matrix(self, user_ids: List[uuid.UUID]) -> ResponseMessage:
+        """
+        Users x fields grid for admin views, from one query. `fields` lists
+        every active field of the users' roles (each with its role_id);
+        each user carries the values of the fields they have filled.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        rows = await self.dal.get_fields_with_values(user_ids)
+
+        fields = {}
+        users = {}
+        for row in rows:
+            user = users.setdefault(row.UserId, {
+                "user_id": str(row.UserId),
+                "role_id": row.RoleId,
+                "values": {}
             })
+            if row.FieldId is None:
+                continue
+            if row.FieldId not in fields:
+                fields[row.FieldId] = {
+                    "field_id": row.FieldId,
+                    "role_id": row.RoleId,
+                    "field_name": row.FieldName,
+                    "field_type": row.FieldType,
+                    "is_required": row.IsRequired,
+                    "display_order": row.DisplayOrder,
+                    "options": row.Options,
+                    "validation": row.Validation,
+                }
+            if row.Value is not None:
+                user["values"][row.FieldId] = self._stored_value(row.Value)
+
+        return ResponseMessage(
+            status="success",
+            message=f"Fields fetched for {len(users)} user(s)",
+            data={
+                "fields": sorted(
+                    fields.values(),
+                    key=lambda f: (f["role_id"], f["display_order"] is None, f["display_order"] or 0, f["field_id"])
+                ),
+                "users": [users[user_id] for user_id in user_ids if user_id in users],
+                "missing_user_ids": [str(user_id) for user_id in user_ids if user_id not in users]
+            }
+        )
+
+    # ---------------- ROSTER EXPORT ----------------
+    async def export_roster(self, role_id: int, fmt: str, active: Optional[bool] = None) -> AsyncIterator[bytes]:
+        """
+        Encoded CSV/JSONL export of a role's users with one column per active
+        field, streamed from the database (see UsersDAL.stream_roster).
+        """
+        fields = list((await self.required_fields_dal.get_role_schema(role_id)).fields)
+        rows = self.users_dal.stream_roster(role_id, [field.Id for field in fields], active=active)
+        return iter_roster(rows, fields, fmt)
 
-        return result
-    
     # ---------------- CREATE OR UPDATE FIELD DATA ----------------
     async def set_user_field_data(
         self,
@@ -148,17 +166,84 @@ class UsersFieldDataBAL:
         required_field_id: int,
         value: Any
     ) -> UsersFieldData:
+        """Save a client-supplied value; document fields are refused (see `set_user_document`)."""
+        return await self._save_field_value(actor_user, target_user_id, required_field_id, value, document=False)
 
-        # STEP 1 — Ensure field exists
-        required_field: RequiredFieldsForUsers = await self.required_fields_dal.get_by_id(required_field_id)
-        if not required_field:
-            raise HTTPException(404, f"Required field with id {required_field_id} not found")
+    async def set_user_document(
+        self,
+        actor_user,
+        target_user_id: uuid.UUID,
+        required_field_id: int,
+        file_info: dict
+    ) -> UsersFieldData:
+        """
+        Save the record returned by `ProtectedFilesBAL.store_upload` into a
+        document field. Only the upload path calls this, so every stored
+        document record points at content its user actually uploaded.
+        """
+        return await self._save_field_value(actor_user, target_user_id, required_field_id, file_info, document=True)
+
+    async def check_document_upload(self, actor_user, target_user_id: uuid.UUID, required_field_id: int):
+        """
+        Run the checks of `set_user_document` before an upload is read, so a
+        request that would be refused never streams its body. Returns the
+        document field; `set_user_document` checks again when saving.
+        """
+        required_field, _ = await self._authorize_field_write(
+            actor_user, target_user_id, required_field_id, document=True
+        )
+        return required_field
+
+    async def _save_field_value(
+        self,
+        actor_user,
+        target_user_id: uuid.UUID,
+        required_field_id: int,
+        value: Any,
+        document: bool
+    ) -> UsersFieldData:
+        required_field, _ = await self._authorize_field_write(
+            actor_user, target_user_id, required_field_id, document
+        )
+
+        # STEP 6 — Validate & normalize
+        normalized = await self._validate_and_normalize_value(required_field, value)
+        final_value = normalized["data"]
+
+        # STEP 7 — Save to DB
+        return await self.dal.create_or_update_user_field_data(
+            user_id=target_user_id,
+            required_field_id=required_field_id,
+            value=final_value
+        )
+
+    async def _authorize_field_write(
+        self,
+        actor_user,
+        target_user_id: uuid.UUID,
+        required_field_id: int,
+        document: bool
+    ):
+        """Steps 1-5 of a field write; returns (required_field, existing_data) or raises."""
 
-        # STEP 2 — Ensure target user exists
-        target_user = await self.users_dal.get_by_id(target_user_id)
+        # STEP 1 — Ensure target user exists
+        target_user = await self.users_dal.query_one({"Id": uuid.UUID(str(target_user_id))}, columns=["RoleId"])
         if not target_user:
             raise HTTPException(404, "Target user not found")
 
+        # STEP 2 — Ensure field exists (fields outside the role's active
+        # schema are still looked up, as before)
+        schema = await self.required_fields_dal.get_role_schema(target_user.RoleId)
+        required_field = schema.by_id.get(required_field_id)
+        if required_field is None:
+            required_field = await self.required_fields_dal.get_by_id(required_field_id)
+        if not required_field:
+            raise HTTPException(404, f"Required field with id {required_field_id} not found")
+        if (required_field.FieldType == "document") != document:
+            if document:
+                raise HTTPException(400, "Field is not a document type")
+            raise HTTPException(400, "Document fields must be uploaded through the upload endpoint")
+
         # STEP 3 — High-level target permission
         actor_role_name = actor_user.Role.Name if actor_user.Role else None
         actor_role_id   = actor_user.RoleId
@@ -173,45 +258,134 @@ class UsersFieldDataBAL:
         existing_data = await self.dal.get_by_user_and_field(target_user_id, required_field_id)
 
         # STEP 5 — Field-level permissions
-        # ------------------------------
-        # (A) FIRST FILL
-        if existing_data is None:
-            # Self-fill
-            if is_self and not is_super:
-                if required_field.FilledByRoleId != actor_role_id:
-                    raise HTTPException(403, "You cannot fill this field")
+        self._check_field_permission(
+            required_field,
+            has_value=existing_data is not None,
+            is_self=is_self,
+            is_super=is_super,
+            actor_role_id=actor_role_id
+        )
 
-            # Filling another user's field
-            if not is_self and not is_super:
-                if required_field.FilledByRoleId != actor_role_id:
-                    raise HTTPException(403, "You cannot fill this field for this user")
+        return required_field, existing_data
 
-        # ------------------------------
-        # (B) EDITING EXISTING VALUE
-        else:
-            # No one can edit if EditableByRoleId is NULL — except super
-            if required_field.EditableByRoleId is None and not is_super:
-                raise HTTPException(403, "This field cannot be edited")
+    # ---------------- SAVE A WHOLE FORM ----------------
+    async def set_user_fields(
+        self,
+        actor_user,
+        target_user_id: str,
+        values: Dict[int, Any]
+    ) -> ResponseMessage:
+        """
+        Validate and save several fields of one user at once. Field
+        definitions and existing values are loaded once, every field goes
+        through the same permission and validation rules as
+        `set_user_field_data`, and all problems are reported together
+        (400 with data={"errors": {field_id: message}}). Nothing is saved
+        unless every field passes; the rest is one bulk upsert.
+        """
+        try:
+            target_uuid = uuid.UUID(str(target_user_id))
+        except ValueError:
+            raise HTTPException(400, "Invalid target user id")
 
-            # Self-edit
-            if is_self and not is_super:
-                if required_field.EditableByRoleId != actor_role_id:
-                    raise HTTPException(403, "You do not have permission to edit this field")
+        target_user = await self.users_dal.query_one({"Id": target_uuid}, columns=["Id", "RoleId"])
+        if not target_user:
+            raise HTTPException(404, "Target user not found")
 
-            # Editing someone else's field
-            if not is_self and not is_super:
-                if required_field.EditableByRoleId != actor_role_id:
-                    raise HTTPException(403, "You do not have permission to edit this user's field")
+        actor_role_name = actor_user.Role.Name if actor_user.Role else None
+        actor_role_id = actor_user.RoleId
+        is_self = str(actor_user.Id) == str(target_uuid)
+        is_super = actor_role_name in ("Super User", "Admin")
+
+        if not is_self and not is_super:
+            raise HTTPException(403, "You are not allowed to modify this user's data")
+
+        fields = (await self.required_fields_dal.get_role_schema(target_user.RoleId)).by_id
+        filled = {row.RequiredFieldId for row in await self.dal.get_values_by_user(target_uuid)}
+
+        errors = {}
+        normalized = {}
+        for field_id, value in values.items():
+            required_field = fields.get(field_id)
+            if required_field is None:
+                errors[field_id] = f"Field {field_id} is not an active field for this user's role"
+                continue
+            if required_field.FieldType == "document":
+                errors[field_id] = "Document fields must be uploaded through the upload endpoint"
+                continue
+            try:
+                self._check_field_permission(
+                    required_field,
+                    has_value=field_id in filled,
+                    is_self=is_self,
+                    is_super=is_super,
+                    actor_role_id=actor_role_id
+                )
+                normalized[field_id] = (await self._validate_and_normalize_value(required_field, value))["data"]
+            except HTTPException as e:
+                errors[field_id] = e.detail
+
+        if errors:
+            raise HTTPException(
+                status_code=400,
+                detail=ResponseMessage(
+                    status="error",
+                    message=f"{len(errors)} field(s) could not be saved",
+                    data={"errors": errors}
+                ).dict()
+            )
+
+        await self.dal.bulk_upsert(
+            (target_uuid, field_id, value) for field_id, value in normalized.items()
+        )
+
+        return ResponseMessage(
+            status="success",
+            message=f"{len(normalized)} field(s) updated successfully",
+            data={
+                "target_user_id": str(target_uuid),
+                "values": normalized
+            }
+        )
+
+    # ---------------- BULK SET ONE FIELD FOR MANY USERS ----------------
+    async def bulk_set_field_value(self, required_field_id: int, user_ids: List[uuid.UUID], value: Any) -> ResponseMessage:
+        """
+        Set the same value of one field for many users (admin operation,
+        e.g. assigning a batch to a cohort) with one bulk upsert. Users that
+        do not exist or whose role does not have this field are reported
+        and left out.
+        """
+        required_field: RequiredFieldsForUsers = await self.required_fields_dal.get_by_id(required_field_id)
+        if not required_field:
+            raise HTTPException(404, f"Required field with id {required_field_id} not found")
+        if required_field.FieldType == "document":
+            raise HTTPException(400, "Document fields must be uploaded per user")
 
-        # STEP 6 — Validate & normalize
         normalized = await self._validate_and_normalize_value(required_field, value)
         final_value = normalized["data"]
 
-        # STEP 7 — Save to DB
-        return await self.dal.create_or_update_user_field_data(
-            user_id=target_user_id,
-            required_field_id=required_field_id,
-            value=final_value
+        user_ids = list(dict.fromkeys(user_ids))
+        eligible = await self.users_dal.query(
+            {"Id__in": user_ids, "RoleId": required_field.RoleId},
+            columns=["Id"]
+        )
+        eligible_ids = {row.Id for row in eligible}
+        skipped = [str(user_id) for user_id in user_ids if user_id not in eligible_ids]
+
+        saved = await self.dal.bulk_upsert(
+            (user_id, required_field_id, final_value) for user_id in user_ids if user_id in eligible_ids
+        )
+
+        return ResponseMessage(
+            status="success",
+            message=f"Field {required_field_id} set for {len(saved)} user(s)",
+            data={
+                "field_id": required_field_id,
+                "value": final_value,
+                "updated": len(saved),
+                "skipped_user_ids": skipped
+            }
         )
 
     # ---------------- GET FIELD DATA BY USER AND FIELD ----------------
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends
+from backend.BusinessAccessLayer.Users import UsersBAL
+from backend.BusinessAccessLayer.EmailOutbox import email_outbox_sender, EmailOutboxBAL
+from backend.Schemas.ResponseMessage import ResponseMessage
+from backend.Utils.principal_cache import principal_cache
+from backend.Utils.token_versions import token_versions
+from backend.Utils.passwords import password_pool, bulk_password_pool
+from backend.Utils.images import image_pool
+from backend.Utils.otp_store import otp_purge_job
+from backend.Utils.rate_limit import rate_limiter
+from backend.Utils.import_jobs import import_jobs
+from backend.db import pool_stats
+
+router = APIRouter()
+users_bal = UsersBAL()
+email_outbox_bal = EmailOutboxBAL()
+
+
+# Runtime stats of this process's pools, caches and background jobs, for
+# admins without access to /metrics (which only serves the local scraper)
+@router.get("/stats", response_model=ResponseMessage)
+async def get_stats(user=Depends(users_bal.is_valid_user('Super User', 'Admin'))):
+    backlog = await email_outbox_bal.dal.count_by_status()
+    return ResponseMessage(
+        status="success",
+        message="Server stats fetched",
+        data={
+            "db_pool": pool_stats(),
+            "password_pool": {
+                "interactive": password_pool.stats(),
+                "bulk": bulk_password_pool.stats()
+            },
+            "image_pool": image_pool.stats(),
+            "principal_cache": principal_cache.stats(),
+            "token_versions": token_versions.stats(),
+            "email_outbox": {**email_outbox_sender.stats(), "messages_by_status": backlog},
+            "otp_purge": otp_purge_job.stats(),
+            "rate_limit": rate_limiter.backend.stats(),
+            "user_imports": import_jobs.stats(),
+        }
+    )
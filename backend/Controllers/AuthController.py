@@ -1,9 +1,12 @@
 # backend/Controllers/AuthController.py
-from fastapi import APIRouter, Depends, Response , UploadFile , HTTPException
+from fastapi import APIRouter, Depends, Request, Response , UploadFile , HTTPException
 from backend.BusinessAccessLayer.Users import UsersBAL
 from backend.BusinessAccessLayer.Roles import RolesBAL
 from backend.Schemas.ResponseMessage import ResponseMessage
 from backend.Schemas.Users import LoginUserModel, CreateUserModel
+from backend.Utils.images import profile_picture_variants
+from backend.Utils.rate_limit import rate_limiter, LOGIN_LIMITS, OTP_GENERATE_LIMITS, OTP_VERIFY_LIMITS
+from backend.Utils.query_budget import query_budget
 
 router = APIRouter()
 users_bal = UsersBAL()
@@ -11,14 +14,15 @@ roles_bal=RolesBAL()
 
 
 @router.post("/signup", response_model=ResponseMessage)
+@query_budget(6)  # signup roles, email + role check, user insert + refresh, outbox insert + refresh
 async def signup(response: Response, signup_data: CreateUserModel):
     try:
         # Fetch roles allowed for signup
         roles_for_signup = await roles_bal.get_roles_for_signup()
-        allowed_role_ids = {r.Id for r in roles_for_signup}
+        allowed_roles = {r.Id: r for r in roles_for_signup}
 
         # Validate role
-        if signup_data.role_id not in allowed_role_ids:
+        if signup_data.role_id not in allowed_roles:
             raise HTTPException(
                 status_code=403,
                 detail={
@@ -33,7 +37,8 @@ async def signup(response: Response, signup_data: CreateUserModel):
             signup_data.full_name,
             signup_data.email,
             signup_data.password,
-            signup_data.role_id
+            signup_data.role_id,
+            role=allowed_roles[signup_data.role_id]
         )
 
         return result
@@ -66,7 +71,8 @@ async def signup(response: Response, signup_data: CreateUserModel):
 
 
 @router.post("/login", response_model=ResponseMessage)
-async def login(response: Response, login_data: LoginUserModel):
+async def login(request: Request, response: Response, login_data: LoginUserModel):
+    await rate_limiter.guard(request, login_data.email, LOGIN_LIMITS)
     return await users_bal.login_user(response, login_data.email, login_data.password)
 
 
@@ -76,23 +82,26 @@ async def logout(response: Response):
 
 
 @router.post("/otp/generate", response_model=ResponseMessage)
-async def generate_otp(email: str):
+async def generate_otp(request: Request, email: str):
     """
     Generate a one-time password (OTP) and send to user's email.
     """
+    await rate_limiter.guard(request, email, OTP_GENERATE_LIMITS)
     return await users_bal.generate_otp(email, 5)
 
 
 @router.post("/otp/verify", response_model=ResponseMessage)
-async def verify_otp(email: str, code: str, password: str):
+async def verify_otp(request: Request, email: str, code: str, password: str):
     """
     Verify the OTP code sent to the user's email.
     """
+    await rate_limiter.guard(request, email, OTP_VERIFY_LIMITS)
     return await users_bal.verify_otp(email, code, password)
 
 
 @router.get("/me", response_model=ResponseMessage)
 async def get_current_user(user=Depends(users_bal.is_user_authenticated())):
+    user = await users_bal.load_profile(user)
     return ResponseMessage(
         status="success",
         message="Authenticated user fetched",
@@ -101,7 +110,8 @@ async def get_current_user(user=Depends(users_bal.is_user_authenticated())):
             "email": user.Email,
             "full_name": user.FullName,
             "role": user.Role.Name if user.Role else None,
-            "profile_picture": user.ProfilePicture
+            "profile_picture": user.ProfilePicture,
+            "profile_picture_variants": profile_picture_variants(user.ProfilePicture)
         }
     )
 
@@ -113,7 +123,7 @@ async def update_profile_picture(
 ):
     """
     Update the authenticated user's profile picture.
-    Accepts JPEG, PNG, GIF, WEBP. Automatically resizes large images.
+    Accepts JPEG, PNG, GIF, WEBP. Stores 64/128/512 px variants, each also as WebP.
     """
     try:
         return await users_bal.updateProfilePicture(user.Id, file)
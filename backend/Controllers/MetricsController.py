@@ -0,0 +1,130 @@
+import asyncio
+import ipaddress
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+import anyio.to_thread
+from backend.db import pool_stats
+from backend.Utils.metrics import registry, render_metrics
+from backend.Utils.passwords import password_pool, bulk_password_pool
+from backend.Utils.images import image_pool
+from backend.Utils.principal_cache import principal_cache
+from backend.Utils.token_versions import token_versions
+from backend.Utils.permission_matrix import permission_matrix
+from backend.Utils.field_schema import field_schema_cache
+from backend.Utils.workers import LATENCY_BUCKETS
+from backend.BusinessAccessLayer.EmailOutbox import email_outbox_sender
+from backend.Utils.otp_store import otp_purge_job
+from backend.Utils.rate_limit import rate_limiter
+from backend.Utils.import_jobs import import_jobs
+
+router = APIRouter()
+
+
+# ---------------- SCRAPE-TIME COLLECTORS ----------------
+def _db_pool():
+    stats = pool_stats()
+    yield "db_pool_size", "gauge", "Configured connection pool size.", [({}, stats["pool_size"])]
+    yield "db_pool_checked_out", "gauge", "Connections currently in use.", [({}, stats["checked_out"])]
+    yield "db_pool_checked_in", "gauge", "Idle connections in the pool.", [({}, stats["checked_in"])]
+    yield "db_pool_overflow", "gauge", "Connections open beyond the pool size.", [({}, stats["overflow"])]
+    yield "db_pool_checkouts_total", "counter", "Connection checkouts.", [({}, stats["checkouts"])]
+    yield "db_pool_timeouts_total", "counter", "Checkouts that timed out waiting for a connection.", [({}, stats["timeouts"])]
+    yield "db_pool_wait_seconds_total", "counter", "Time spent obtaining connections.", [({}, stats["wait_seconds_total"])]
+    yield "db_pool_wait_seconds_max", "gauge", "Longest time spent obtaining a connection.", [({}, stats["wait_seconds_max"])]
+
+
+def _process_pools():
+    pools = (password_pool, bulk_password_pool, image_pool)
+    labelled = [({"pool": pool.name}, pool) for pool in pools]
+    yield "worker_pool_max_workers", "gauge", "Worker processes per pool.", [(l, p.max_workers) for l, p in labelled]
+    yield "worker_pool_in_flight", "gauge", "Jobs running or queued per pool.", [(l, p.in_flight) for l, p in labelled]
+    yield "worker_pool_rejected_total", "counter", "Jobs shed because the pool was saturated.", [(l, p.rejected) for l, p in labelled]
+    yield "worker_pool_failed_total", "counter", "Jobs that raised.", [(l, p.failed) for l, p in labelled]
+    yield "worker_pool_job_seconds", "histogram", "Job latency per pool, including queueing.", [
+        (l, (LATENCY_BUCKETS, p.bucket_counts, p.total_seconds)) for l, p in labelled
+    ]
+
+
+def _email_sender():
+    stats = email_outbox_sender.stats()
+    yield "email_sender_workers", "gauge", "Running outbox sender tasks.", [({}, stats["workers"])]
+    yield "email_sender_in_flight", "gauge", "Emails being sent.", [({}, stats["in_flight"])]
+    yield "email_sender_sent_total", "counter", "Emails sent.", [({}, stats["sent"])]
+    yield "email_sender_retried_total", "counter", "Sends that failed and were rescheduled.", [({}, stats["retried"])]
+    yield "email_sender_failed_total", "counter", "Emails given up on.", [({}, stats["failed"])]
+    yield "email_sender_timed_out_total", "counter", "Sends abandoned after EMAIL_SEND_TIMEOUT_SECONDS.", [({}, stats["timed_out"])]
+    yield "email_outbox_purged_total", "counter", "Failed emails deleted after the retention period.", [({}, stats["purged"])]
+
+
+def _otp_purge():
+    stats = otp_purge_job.stats()
+    yield "otp_purge_runs_total", "counter", "Completed OTP purge runs.", [({}, stats["runs"])]
+    yield "otp_purged_total", "counter", "Expired OTPs deleted.", [({}, stats["purged"])]
+
+
+def _import_jobs():
+    stats = import_jobs.stats()
+    yield "user_import_jobs_running", "gauge", "User imports being processed.", [({}, stats["running"])]
+    yield "user_import_jobs_queued", "gauge", "User imports waiting for a slot.", [({}, stats["queued"])]
+    yield "user_import_jobs_failed_total", "counter", "User imports that stopped with an error.", [({}, stats["failed"])]
+
+
+def _rate_limit_store():
+    stats = rate_limiter.backend.stats()
+    if "keys" in stats:
+        yield "rate_limit_buckets", "gauge", "Rate limit buckets held in memory.", [({}, stats["keys"])]
+        yield "rate_limit_evictions_total", "counter", "Buckets dropped to stay within RATE_LIMIT_MAX_KEYS.", [({}, stats["evictions"])]
+
+
+def _file_io_threads():
+    # asyncio.to_thread and aiofiles run on the loop's default executor;
+    # FileResponse and StaticFiles use AnyIO's worker threads.
+    executor = getattr(asyncio.get_running_loop(), "_default_executor", None)
+    threads = len(getattr(executor, "_threads", ()))
+    queued = executor._work_queue.qsize() if executor is not None else 0
+    max_threads = getattr(executor, "_max_workers", 0)
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    yield "file_io_threads", "gauge", "Threads started by the default executor.", [({}, threads)]
+    yield "file_io_threads_max", "gauge", "Maximum threads of the default executor.", [({}, max_threads)]
+    yield "file_io_queued", "gauge", "Blocking calls waiting for a default executor thread.", [({}, queued)]
+    yield "anyio_threads_busy", "gauge", "AnyIO worker threads in use.", [({}, limiter.borrowed_tokens)]
+    yield "anyio_threads_max", "gauge", "AnyIO worker thread limit.", [({}, limiter.total_tokens)]
+
+
+def _caches():
+    principal = principal_cache.stats()
+    yield "principal_cache_entries", "gauge", "Cached principals.", [({}, principal["size"])]
+    yield "principal_cache_hits_total", "counter", "Principal cache hits.", [({}, principal["hits"])]
+    yield "principal_cache_misses_total", "counter", "Principal cache misses.", [({}, principal["misses"])]
+    yield "principal_cache_evictions_total", "counter", "Principal cache evictions.", [({}, principal["evictions"])]
+    versions = token_versions.stats()
+    yield "token_version_cache_entries", "gauge", "Cached user token versions.", [({}, versions["size"])]
+    yield "token_version_cache_hits_total", "counter", "Token version cache hits.", [({}, versions["hits"])]
+    yield "token_version_cache_misses_total", "counter", "Token version cache misses.", [({}, versions["misses"])]
+    matrix = permission_matrix.stats()
+    yield "permission_matrix_version", "gauge", "Changes applied to the permission matrix.", [({}, matrix["version"])]
+    schemas = field_schema_cache.stats()
+    yield "field_schema_cache_roles", "gauge", "Roles with a compiled field schema.", [({}, schemas["roles"])]
+
+
+for _collector in (_db_pool, _process_pools, _email_sender, _otp_purge, _import_jobs, _rate_limit_store, _file_io_threads, _caches):
+    registry.register_collector(_collector)
+
+
+def _is_local(request: Request) -> bool:
+    # Anything relayed by a reverse proxy is treated as remote
+    if "x-forwarded-for" in request.headers or "forwarded" in request.headers:
+        return False
+    host = request.client.host if request.client else None
+    try:
+        return host is not None and ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(request: Request):
+    # Scraped by a Prometheus agent on the same host only
+    if not _is_local(request):
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
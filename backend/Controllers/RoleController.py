@@ -4,6 +4,7 @@ from backend.BusinessAccessLayer.Users import UsersBAL
 from backend.Schemas.ResponseMessage import ResponseMessage
 from fastapi.responses import JSONResponse
 from backend.Schemas.Roles import RoleRequest
+from backend.Utils.query_budget import query_budget
 
 router = APIRouter()
 roles_bal = RolesBAL()
@@ -28,6 +29,7 @@ async def get_roles_for_signup():
     return ResponseMessage(status="success", message="Signup roles fetched", data=[role_to_dict(r) for r in roles])
 
 @router.get("/creatable", response_model=ResponseMessage)
+@query_budget(2)
 async def get_roles_actor_can_create(
     actor=Depends(users_bal.is_user_authenticated())
 ):
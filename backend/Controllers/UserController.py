@@ -1,12 +1,18 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.responses import StreamingResponse
 from backend.BusinessAccessLayer.Users import UsersBAL
 from backend.BusinessAccessLayer.UsersFieldData import UsersFieldDataBAL
 from backend.BusinessAccessLayer.RequiredFieldsForUsers import RequiredFieldsForUsersBAL
 from backend.Schemas.ResponseMessage import ResponseMessage
-from backend.Schemas.Users import UserFieldValue
-from backend.Utils.media import save_protected_file, read_protected_file, del_protected_file
+from backend.Schemas.Users import UserFieldValue, UserFieldValues, BulkFieldValue, UserIdList
+from backend.BusinessAccessLayer.ProtectedFiles import protected_files_bal
+from backend.Utils.media import resolve_protected_file, protected_file_response
+from backend.Utils.uploads import receive_protected_upload
+from backend.Utils.user_import import import_format, iter_import_rows
+from backend.Utils.roster_export import export_format, EXPORT_MEDIA_TYPES
+from backend.Utils.query_budget import query_budget
+from backend.db import release_request_connection
 import uuid
 from backend.Schemas.Users import CreateUserModel
 from backend.BusinessAccessLayer.Roles import RolesBAL
@@ -17,15 +23,12 @@ fields_bal = RequiredFieldsForUsersBAL()
 roles_bal = RolesBAL()
 user_fields_data_bal = UsersFieldDataBAL()
 
-@router.post("/create-user", response_model=ResponseMessage)
-async def create_user(
-    response: Response,
-    user_data: CreateUserModel,
-    actor=Depends(users_bal.is_user_authenticated())
-):
-    # STEP 1 — Fetch the target role being assigned to the new user
-    target_role = await roles_bal.get_role(user_data.role_id)
-    if not target_role:
+async def _get_creatable_role(actor, role_id: int):
+    """The target role, if `actor` may create users with it (else 404/403)."""
+    # Fetch the target role being assigned to the new user(s)
+    try:
+        target_role = await roles_bal.get_role(role_id)
+    except ValueError:
         raise HTTPException(
             status_code=404,
             detail="Target role does not exist"
@@ -34,39 +37,119 @@ async def create_user(
     actor_role_id = actor.RoleId
     actor_role_name = actor.Role.Name if actor.Role else None
 
-    # STEP 2 — Super User / Admin can create any role
+    # Super User / Admin can create any role
     if actor_role_name in ("Super User", "Admin"):
-        pass  # always allowed
+        return target_role
+
+    if target_role.RegistrationAllowed:
+        raise HTTPException(
+            status_code=403,
+            detail="Public signup is allowed for this role, use signup endpoint instead"
+        )
+
+    # Otherwise the actor's role must be listed in registration_by_roles
+    allowed_roles = target_role.RegistrationByRoles or []
+    if actor_role_id not in allowed_roles:
+        raise HTTPException(
+            status_code=403,
+            detail="You do not have permission to create a user with this role"
+        )
+    return target_role
 
-    else:
-        if target_role.RegistrationAllowed:
-            raise HTTPException(
-                status_code=403,
-                detail="Public signup is allowed for this role, use signup endpoint instead"
-            )
-        else:
-            # STEP 4 — Check if actor’s role is listed in registration_by_roles
-            allowed_roles = target_role.RegistrationByRoles or []
 
-            if actor_role_id not in allowed_roles:
-                raise HTTPException(
-                    status_code=403,
-                    detail="You do not have permission to create a user with this role"
-                )
+@router.post("/create-user", response_model=ResponseMessage)
+@query_budget(7)  # auth, role, email + role check, user insert + refresh, outbox insert + refresh
+async def create_user(
+    response: Response,
+    user_data: CreateUserModel,
+    actor=Depends(users_bal.is_user_authenticated())
+):
+    # STEP 1 — Ensure the actor may create users of the target role
+    target_role = await _get_creatable_role(actor, user_data.role_id)
 
-    # STEP 5 — Proceed with actual user creation
+    # STEP 2 — Proceed with actual user creation
     new_user = await users_bal.create_user(
         user_data.full_name,
         user_data.email,
         user_data.password,
-        user_data.role_id
+        user_data.role_id,
+        role=target_role
     )
 
     return new_user
 
+# Bulk-create users of one role from a CSV (header: full_name,email[,password])
+# or JSONL body. The body is parsed and validated as it streams in; the users
+# are then created by a background job whose id is returned (202). Rows without
+# a password get a generated one that is never sent; the welcome email points
+# to "Forgot Password?".
+@router.post(
+    "/import",
+    response_model=ResponseMessage,
+    status_code=202,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}}
+            }
+        }
+    }
+)
+async def import_users(
+    request: Request,
+    role_id: int = Query(...),
+    format: Optional[str] = Query(None, description="csv or jsonl; defaults from Content-Type"),
+    actor=Depends(users_bal.is_user_authenticated())
+):
+    target_role = await _get_creatable_role(actor, role_id)
+    fmt = import_format(request.headers.get("content-type"), format)
+    return await users_bal.import_users(target_role, actor, iter_import_rows(request.stream(), fmt))
+
+
+# Progress of an import started by POST /import; includes the per-row report once done
+@router.get("/import/{job_id}", response_model=ResponseMessage)
+async def get_import_job(
+    job_id: str,
+    actor=Depends(users_bal.is_user_authenticated())
+):
+    return users_bal.get_import_job(job_id, actor)
+
+
+# Export every user of a role with their field values as CSV or JSONL.
+# The file is streamed as rows are read, so exports of any size start at once.
+@router.get("/export/{role_id}")
+async def export_users_by_role(
+    role_id: int,
+    format: str = Query("csv"),
+    active: Optional[bool] = Query(None),
+    actor=Depends(users_bal.is_valid_user('Super User', 'Admin'))
+):
+    fmt = export_format(format)
+    try:
+        target_role = await roles_bal.get_role(role_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Target role not found")
+    if target_role.Name == "Admin" and (actor.Role.Name if actor.Role else None) != "Super User":
+        raise HTTPException(status_code=403, detail="You are not allowed to export Admin users")
+
+    body = await user_fields_data_bal.export_roster(role_id, fmt, active=active)
+    filename = f"{target_role.Name.lower().replace(' ', '_')}_users.{fmt}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"content-disposition": f'attachment; filename="{filename}"', "cache-control": "no-store"}
+    )
+
+
 @router.get("/by-role/{role_id}", response_model=ResponseMessage)
+@query_budget(3)
 async def get_users_by_role_id(
     role_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+    active: bool = Query(True),
     actor=Depends(users_bal.is_user_authenticated())
 ):
     # Fetch target role
@@ -88,12 +171,7 @@ async def get_users_by_role_id(
                 detail="You are not allowed to view Admin users"
             )
 
-        users = await users_bal.get_all_users(filters={"RoleId": role_id})
-        return ResponseMessage(
-            status="success",
-            message="Users fetched successfully",
-            data=users
-        )
+        return await users_bal.get_users_page(role_id, limit, cursor=cursor, active=active)
 
     # 2️⃣ NORMAL USER — must be explicitly allowed
     if target_role.RegistrationAllowed:
@@ -117,17 +195,12 @@ async def get_users_by_role_id(
             detail="You are not allowed to view users of this role"
         )
 
-    # 3️⃣ GET USERS
-    users = await users_bal.get_all_users(filters={"RoleId": role_id})
-
-    return ResponseMessage(
-        status="success",
-        message="Users fetched successfully",
-        data=users
-    )
+    # 3️⃣ GET USERS (one page; follow next_cursor for more)
+    return await users_bal.get_users_page(role_id, limit, cursor=cursor, active=active)
 
 
 @router.get("/me/fields", response_model=ResponseMessage)
+@query_budget(2)
 async def get_my_fields(
     target_user_id: Optional[str] = Query(None),
     actor = Depends(users_bal.is_user_authenticated())
@@ -147,8 +220,27 @@ async def get_my_fields(
     )
 
 
+# Save a whole form: {field_id: value} for all non-document fields at once.
+# Either every field is saved or none is, and all errors are returned together.
+@router.put("/me/fields", response_model=ResponseMessage)
+@query_budget(5)
+async def update_my_fields(
+    body: UserFieldValues,
+    target_user_id: Optional[str] = Query(None),
+    actor=Depends(users_bal.is_user_authenticated())
+):
+    target_id = target_user_id or str(actor.Id)
+
+    return await user_fields_data_bal.set_user_fields(
+        actor_user=actor,
+        target_user_id=target_id,
+        values=body.values
+    )
+
+
 # Existing update route (modified to accept optional target_user_id)
 @router.post("/me/fields/{field_id}", response_model=ResponseMessage)
+@query_budget(6)
 async def update_my_field(
     field_id: int,
     body: UserFieldValue,
@@ -175,59 +267,101 @@ async def update_my_field(
     )
 
 
-# Upload a document for a document-type field
-@router.post("/me/fields/{field_id}/upload", response_model=ResponseMessage)
+# Fields and values of many users at once, for admin grid views
+@router.post("/fields/matrix", response_model=ResponseMessage)
+@query_budget(2)
+async def get_fields_matrix(
+    body: UserIdList,
+    actor=Depends(users_bal.is_valid_user('Super User', 'Admin'))
+):
+    return await user_fields_data_bal.get_user_fields_matrix(body.user_ids)
+
+
+# Set one field to the same value for many users at once (admin only)
+@router.post("/fields/{field_id}/bulk", response_model=ResponseMessage)
+@query_budget(5)
+async def bulk_update_field(
+    field_id: int,
+    body: BulkFieldValue,
+    actor=Depends(users_bal.is_valid_user('Super User', 'Admin'))
+):
+    return await user_fields_data_bal.bulk_set_field_value(field_id, body.user_ids, body.value)
+
+
+# Upload a document for a document-type field.
+# The body is streamed straight to disk (see receive_protected_upload), so it is
+# read from the request rather than declared as an UploadFile parameter.
+@router.post(
+    "/me/fields/{field_id}/upload",
+    response_model=ResponseMessage,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                        "required": ["file"]
+                    }
+                }
+            }
+        }
+    }
+)
 async def upload_field_file(
     field_id: int,
-    file: UploadFile = File(...),
+    request: Request,
     target_user_id: Optional[str] = Query(None),
     actor=Depends(users_bal.is_user_authenticated())
 ):
     # Determine target
-    target_id = target_user_id or str(actor.Id)
+    try:
+        target_id = uuid.UUID(target_user_id) if target_user_id else actor.Id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid target user id")
 
-    # Validate field exists and is of type 'document'
-    required_field = await fields_bal.dal.get_by_id(field_id)
-    if not required_field:
-        raise HTTPException(status_code=404, detail="Field not found")
-    if required_field.FieldType != "document":
-        raise HTTPException(status_code=400, detail="Field is not a document type")
+    # Field type and fill/edit permissions are checked before the body is read
+    required_field = await user_fields_data_bal.check_document_upload(actor, target_id, field_id)
 
-    # Read file bytes
-    try:
-        file_bytes = await file.read()
-    except Exception:
-        raise HTTPException(status_code=400, detail="Failed to read uploaded file")
+    # Nothing is held open while the file streams in
+    await release_request_connection()
 
-    # Validate extension and size against field.Validation (if present)
+    # Extension and size limits are enforced while the file streams in
     validation = required_field.Validation or {}
-    allowed_exts = validation.get("allowed_extensions", [])
-    max_size_mb = validation.get("max_size_mb", None)
-
-    # Extension check
-    filename = file.filename or ""
-    _, ext = (filename.rsplit(".", 1) + [""])[:2]
-    ext = f".{ext}" if ext else ""
-    if allowed_exts and ext.lower() not in [e.lower() for e in allowed_exts]:
-        raise HTTPException(status_code=400, detail=f"File extension not allowed. Allowed: {allowed_exts}")
-
-    # Size check
-    size_mb = len(file_bytes) / (1024 * 1024)
-    if max_size_mb is not None and size_mb > float(max_size_mb):
-        raise HTTPException(status_code=400, detail=f"File size exceeds maximum of {max_size_mb} MB")
-
-    # Save protected file
-    stored_name, _ = await save_protected_file(file_bytes, file.content_type)
-
-    # Save field value (we store only { "name": stored_name, "size_mb": size_mb })
-    final_value = {"name": stored_name, "size_mb": round(size_mb, 4)}
-    updated = await user_fields_data_bal.set_user_field_data(
-        actor_user=actor,
-        target_user_id=target_id,
-        required_field_id=field_id,
-        value=final_value
+    upload = await receive_protected_upload(
+        request,
+        field_name="file",
+        allowed_extensions=validation.get("allowed_extensions", []),
+        max_size_mb=validation.get("max_size_mb", None)
     )
 
+    # The document being replaced, if any, is released once the new one is saved
+    existing_data = await user_fields_data_bal.dal.get_by_user_and_field(target_id, field_id)
+    previous_info = protected_files_bal.document_info(existing_data.Value) if existing_data else None
+
+    # Identical content already in the store is referenced, not written again
+    file_info, created = await protected_files_bal.store_upload(upload)
+
+    # Save field value ({ "name": "<sha256><ext>", "size_mb": size_mb, "sha256": digest, "ref": tag })
+    try:
+        updated = await user_fields_data_bal.set_user_document(
+            actor_user=actor,
+            target_user_id=target_id,
+            required_field_id=field_id,
+            file_info=file_info
+        )
+    except Exception:
+        if created:
+            await protected_files_bal.discard_new_blob(file_info)
+        raise
+
+    if previous_info and previous_info.get("name") != file_info["name"]:
+        await protected_files_bal.release(previous_info)
+    elif previous_info:
+        # Same content re-uploaded: keep a single reference
+        await protected_files_bal.release(file_info)
+
     return ResponseMessage(
         status="success",
         message="File uploaded and field updated",
@@ -239,6 +373,7 @@ async def upload_field_file(
 @router.get("/me/fields/{field_id}/download")
 async def download_field_file(
     field_id: int,
+    request: Request,
     target_user_id: Optional[str] = Query(None),
     actor=Depends(users_bal.is_user_authenticated())
 ):
@@ -253,10 +388,9 @@ async def download_field_file(
     if not existing_data:
         raise HTTPException(status_code=404, detail="No file uploaded for this field")
 
-    # File info expected to be { "name": "<stored_filename>", "size_mb": ... }
-    file_info = existing_data.Value.get("data") if isinstance(existing_data.Value, dict) else existing_data.Value
-    stored_name = file_info.get("name") if isinstance(file_info, dict) else None
-    if not stored_name:
+    # File info expected to be { "name": "<stored_filename>", "size_mb": ..., "sha256": ... }
+    file_info = protected_files_bal.document_info(existing_data.Value)
+    if not file_info:
         raise HTTPException(status_code=404, detail="Stored file not found in record")
 
     # Permission: allow if actor role id equals FilledByRoleId or EditableByRoleId,
@@ -270,21 +404,15 @@ async def download_field_file(
     if not allowed:
         raise HTTPException(status_code=403, detail="You do not have permission to download this file")
 
-    # Read file bytes and stream
+    # Stream from disk; honours Range / If-None-Match / If-Modified-Since
     try:
-        data = await read_protected_file(stored_name)
+        path = await resolve_protected_file(file_info)
+        return await protected_file_response(request, path, file_info["name"], sha256=file_info.get("sha256"))
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Protected file not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read file: {e}")
 
-    # Guess MIME
-    import mimetypes
-    mime_type = mimetypes.guess_type(stored_name)[0] or "application/octet-stream"
-
-    return StreamingResponse(iter([data]), media_type=mime_type,
-                             headers={"Content-Disposition": f"attachment; filename={stored_name}"})
-
 # Delete stored file for a field
 @router.delete("/me/fields/{field_id}/file", response_model=ResponseMessage)
 async def delete_field_file(
@@ -302,9 +430,8 @@ async def delete_field_file(
     if not existing_data:
         raise HTTPException(status_code=404, detail="No file uploaded for this field")
 
-    file_info = existing_data.Value.get("data") if isinstance(existing_data.Value, dict) else existing_data.Value
-    stored_name = file_info.get("name") if isinstance(file_info, dict) else None
-    if not stored_name:
+    file_info = protected_files_bal.document_info(existing_data.Value)
+    if not file_info:
         raise HTTPException(status_code=404, detail="Stored file not found in record")
 
     # Permission check (same as download)
@@ -317,11 +444,11 @@ async def delete_field_file(
     if not allowed:
         raise HTTPException(status_code=403, detail="You do not have permission to delete this file")
 
-    # Delete file from disk
-    await del_protected_file(stored_name)
-
     # Clear the field (set to null or empty depending on requirement).
     # Here we'll delete the user field record entirely.
     await user_fields_data_bal.dal.delete_user_field_data(existing_data.Id)
 
+    # Drop the record's reference; the blob goes once nothing else uses it
+    await protected_files_bal.release(file_info)
+
     return ResponseMessage(status="success", message="File deleted")
@@ -1,6 +1,28 @@
-from backend.db import async_session
-from sqlalchemy import select
+from backend.db import async_session, get_request_session
+from sqlalchemy import select, func, and_, or_, tuple_, bindparam
 from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+
+def _like_prefix(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+# Filter operators: "Column__op" -> (build the SQL condition from the column
+# and its bind parameter(s), turn the filter value into the parameter value(s)).
+# isnull is special-cased: its value changes the SQL, not a parameter.
+_OPERATORS = {
+    "eq": (lambda col, p: col == p(), None),
+    "ne": (lambda col, p: col != p(), None),
+    "in": (lambda col, p: col.in_(p(expanding=True)), list),
+    "notin": (lambda col, p: col.not_in(p(expanding=True)), list),
+    "gt": (lambda col, p: col > p(), None),
+    "gte": (lambda col, p: col >= p(), None),
+    "lt": (lambda col, p: col < p(), None),
+    "lte": (lambda col, p: col <= p(), None),
+    "prefix": (lambda col, p: col.like(p(), escape="\\"), _like_prefix),
+    "contains": (lambda col, p: col.contains(p()), None),
+}
 
 class BaseDAL:
     _session_factory = async_session  # async sessionmaker
@@ -10,7 +32,18 @@ class BaseDAL:
 
     @asynccontextmanager
     async def session_scope(self):
-        """Provide a transactional scope around a series of operations."""
+        """
+        Provide a transactional scope around a series of operations.
+        Inside a request this is the shared request session: work is flushed
+        here and committed once by `request_session_scope`. Otherwise a
+        dedicated session is opened and committed per call.
+        """
+        session = get_request_session()
+        if session is not None:
+            yield session
+            await session.flush()
+            return
+
         async with self._session_factory() as session:
             try:
                 yield session
@@ -24,13 +57,147 @@ class BaseDAL:
             return await session.get(self.model, id_)
 
     async def get_all(self, filters=None):
+        return await self.query(filters=filters)
+
+    # ---------------- QUERY SPECS ----------------
+    # Compiled statements per (model, query shape); the values travel as bind
+    # parameters, so every call with the same shape reuses one statement.
+    _statement_cache: Dict[tuple, tuple] = {}
+
+    async def query(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        columns: Optional[Sequence[str]] = None,
+        order_by: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        after: Optional[Sequence[Any]] = None
+    ):
+        """
+        Run a declarative query against this DAL's model.
+
+        filters:  {"Column": v} or {"Column__op": v}; op is one of eq, ne, in,
+                  notin, gt, gte, lt, lte, range ((low, high), either may be
+                  None; inclusive), prefix, contains and isnull (True/False).
+        columns:  column names to select; rows are returned instead of entities.
+        order_by: column names, "-Column" for descending.
+        after:    keyset cursor: the order_by values of the last row of the
+                  previous page; rows strictly after it are returned.
+        """
+        stmt, params = self._compile(filters, columns, order_by, limit, offset, after)
+        async with self.session_scope() as session:
+            result = await session.execute(stmt, params)
+            return result.all() if columns else result.scalars().all()
+
+    async def query_one(self, filters: Optional[Dict[str, Any]] = None, columns: Optional[Sequence[str]] = None):
+        rows = await self.query(filters=filters, columns=columns, limit=1)
+        return rows[0] if rows else None
+
+    async def count(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        stmt, params = self._compile(filters, None, None, None, None, None, count=True)
         async with self.session_scope() as session:
+            result = await session.execute(stmt, params)
+            return result.scalar_one()
+
+    def _column(self, name: str):
+        column = self.model.__table__.columns.get(name)
+        if column is None:
+            raise ValueError(f"{self.model.__name__} has no column '{name}'")
+        return getattr(self.model, name)
+
+    def _compile(self, filters, columns, order_by, limit, offset, after, count: bool = False) -> Tuple[Any, dict]:
+        conditions, params = [], {}
+        shape = []
+        for i, (key, value) in enumerate((filters or {}).items()):
+            name, _, op = key.partition("__")
+            op = op or "eq"
+            if op == "isnull":
+                shape.append((name, op, bool(value)))
+            elif op == "range":
+                low, high = value
+                shape.append((name, op, low is not None, high is not None))
+                if low is not None:
+                    params[f"f{i}_low"] = low
+                if high is not None:
+                    params[f"f{i}_high"] = high
+            elif op in _OPERATORS:
+                shape.append((name, op))
+                convert = _OPERATORS[op][1]
+                params[f"f{i}"] = convert(value) if convert else value
+            else:
+                raise ValueError(f"Unknown filter operator '{op}' in '{key}'")
+
+        order = tuple(order_by or ())
+        if after is not None:
+            if len(after) != len(order):
+                raise ValueError("Keyset cursor needs one value per order_by column")
+            for j, value in enumerate(after):
+                params[f"k{j}"] = value
+
+        key = (
+            self.model, tuple(shape), tuple(columns or ()), order,
+            limit is not None, offset is not None, after is not None, count
+        )
+        cached = self._statement_cache.get(key)
+        if cached is None:
+            cached = self._build(shape, columns, order, limit is not None, offset is not None, after is not None, count)
+            self._statement_cache[key] = cached
+
+        if limit is not None:
+            params["limit"] = limit
+        if offset is not None:
+            params["offset"] = offset
+        return cached, params
+
+    def _build(self, shape, columns, order, has_limit, has_offset, has_after, count):
+        if count:
+            stmt = select(func.count()).select_from(self.model)
+        elif columns:
+            stmt = select(*(self._column(c) for c in columns))
+        else:
             stmt = select(self.model)
-            if filters:
-                for k, v in filters.items():
-                    stmt = stmt.where(getattr(self.model, k) == v)
-            result = await session.execute(stmt)
-            return result.scalars().all()
+
+        for i, spec in enumerate(shape):
+            name, op = spec[0], spec[1]
+            column = self._column(name)
+
+            def param(suffix="", type_=column.type, expanding=False):
+                return bindparam(f"f{i}{suffix}", type_=type_, expanding=expanding)
+
+            if op == "isnull":
+                stmt = stmt.where(column.is_(None) if spec[2] else column.is_not(None))
+            elif op == "range":
+                if spec[2]:
+                    stmt = stmt.where(column >= param("_low"))
+                if spec[3]:
+                    stmt = stmt.where(column <= param("_high"))
+            else:
+                stmt = stmt.where(_OPERATORS[op][0](column, param))
+
+        keys = [(self._column(o.lstrip("-")), o.startswith("-")) for o in order]
+        if has_after:
+            keyset = [bindparam(f"k{j}", type_=col.type) for j, (col, _) in enumerate(keys)]
+            if len(keys) == 1:
+                col, desc = keys[0]
+                stmt = stmt.where(col < keyset[0] if desc else col > keyset[0])
+            elif len({desc for _, desc in keys}) == 1:
+                # Uniform direction: one row-value comparison the index can serve
+                lhs, rhs = tuple_(*(col for col, _ in keys)), tuple_(*keyset)
+                stmt = stmt.where(lhs < rhs if keys[0][1] else lhs > rhs)
+            else:
+                branches = []
+                for j, (col, desc) in enumerate(keys):
+                    equal = [keys[m][0] == keyset[m] for m in range(j)]
+                    branches.append(and_(*equal, col < keyset[j] if desc else col > keyset[j]))
+                stmt = stmt.where(or_(*branches))
+
+        if keys:
+            stmt = stmt.order_by(*(col.desc() if desc else col.asc() for col, desc in keys))
+        if has_limit:
+            stmt = stmt.limit(bindparam("limit"))
+        if has_offset:
+            stmt = stmt.offset(bindparam("offset"))
+        return stmt
 
     async def add(self, obj):
         async with self.session_scope() as session:
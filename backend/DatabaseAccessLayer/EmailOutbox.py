@@ -0,0 +1,173 @@
+import datetime
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import select, update, insert, delete, func, or_, and_
+from backend.Entities.EmailOutbox import EmailOutbox
+from backend.DatabaseAccessLayer.Base import BaseDAL
+
+
+class EmailOutboxDAL(BaseDAL):
+    def __init__(self):
+        super().__init__(EmailOutbox)
+
+    async def enqueue(self, to_address: str, subject: str, plain_text: str, html_content: str = None) -> EmailOutbox:
+        """
+        Queue an email. Inside a request this joins the request transaction,
+        so the message only becomes visible to the senders if the row that
+        triggered it (user, OTP, ...) is committed too.
+        """
+        message = EmailOutbox(
+            ToAddress=to_address,
+            Subject=subject,
+            PlainText=plain_text,
+            HtmlContent=html_content,
+            Status="pending",
+            Attempts=0
+        )
+        return await self.add(message)
+
+    async def enqueue_many(self, messages: Iterable[dict]) -> int:
+        """
+        Queue many emails with one multi-row INSERT.
+        Each item: {"to_address", "subject", "plain_text", "html_content"?}.
+        """
+        rows = [
+            {
+                "ToAddress": m["to_address"],
+                "Subject": m["subject"],
+                "PlainText": m["plain_text"],
+                "HtmlContent": m.get("html_content"),
+                "Status": "pending",
+                "Attempts": 0,
+            }
+            for m in messages
+        ]
+        if not rows:
+            return 0
+        async with self.session_scope() as session:
+            await session.execute(insert(EmailOutbox), rows)
+        return len(rows)
+
+    async def claim_batch(self, limit: int, lease_seconds: int, max_attempts: int) -> Tuple[List, int]:
+        """
+        Atomically claim up to `limit` due messages for sending.
+
+        Rows are picked with FOR UPDATE SKIP LOCKED so concurrent senders
+        never claim the same message, marked 'sending' and leased until
+        now + lease_seconds; a sender that dies mid-send leaves the row to be
+        picked up again once the lease runs out. A row whose lease ran out
+        after its last allowed attempt is given up as 'failed' instead.
+
+        Returns the claimed rows and the number of messages given up.
+        """
+        abandon = (
+            update(EmailOutbox)
+            .where(
+                EmailOutbox.Status == "sending",
+                EmailOutbox.NextAttemptAt <= func.now(),
+                EmailOutbox.Attempts >= max_attempts
+            )
+            .values(
+                Status="failed",
+                PlainText=None,
+                HtmlContent=None,
+                LastError="Send lease expired on the last attempt"
+            )
+            .execution_options(synchronize_session=False)
+        )
+        due = (
+            select(EmailOutbox.Id)
+            .where(
+                or_(
+                    EmailOutbox.Status == "pending",
+                    and_(EmailOutbox.Status == "sending", EmailOutbox.Attempts < max_attempts)
+                ),
+                EmailOutbox.NextAttemptAt <= func.now()
+            )
+            .order_by(EmailOutbox.NextAttemptAt)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(EmailOutbox)
+            .where(EmailOutbox.Id.in_(due.scalar_subquery()))
+            .values(
+                Status="sending",
+                Attempts=EmailOutbox.Attempts + 1,
+                NextAttemptAt=func.now() + datetime.timedelta(seconds=lease_seconds)
+            )
+            .returning(
+                EmailOutbox.Id,
+                EmailOutbox.ToAddress,
+                EmailOutbox.Subject,
+                EmailOutbox.PlainText,
+                EmailOutbox.HtmlContent,
+                EmailOutbox.Attempts
+            )
+            .execution_options(synchronize_session=False)
+        )
+        async with self.session_scope() as session:
+            abandoned = (await session.execute(abandon)).rowcount
+            result = await session.execute(stmt)
+            return result.all(), abandoned
+
+    async def mark_sent(self, message_id: int, provider_message_id: Optional[str]) -> None:
+        # Bodies are dropped once delivered: OTP mails carry a code.
+        stmt = (
+            update(EmailOutbox)
+            .where(EmailOutbox.Id == message_id)
+            .values(
+                Status="sent",
+                SentAt=func.now(),
+                ProviderMessageId=provider_message_id,
+                PlainText=None,
+                HtmlContent=None,
+                LastError=None
+            )
+            .execution_options(synchronize_session=False)
+        )
+        async with self.session_scope() as session:
+            await session.execute(stmt)
+
+    async def mark_failed(self, message_id: int, error: str, retry_in_seconds: Optional[float]) -> None:
+        """
+        Record a failed attempt. With `retry_in_seconds` the message goes back
+        to 'pending' and becomes due again after the backoff; without it the
+        message is given up as 'failed' and its body is dropped, as on success.
+        """
+        values = {"LastError": error[:2000]}
+        if retry_in_seconds is None:
+            values.update(Status="failed", PlainText=None, HtmlContent=None)
+        else:
+            values["Status"] = "pending"
+            values["NextAttemptAt"] = func.now() + datetime.timedelta(seconds=retry_in_seconds)
+
+        stmt = (
+            update(EmailOutbox)
+            .where(EmailOutbox.Id == message_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        async with self.session_scope() as session:
+            await session.execute(stmt)
+
+    async def purge_failed(self, older_than_days: int, limit: int) -> int:
+        """Delete up to `limit` messages given up more than `older_than_days` ago; returns how many went."""
+        expired = (
+            select(EmailOutbox.Id)
+            .where(
+                EmailOutbox.Status == "failed",
+                EmailOutbox.CreatedAt < func.now() - datetime.timedelta(days=older_than_days)
+            )
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = delete(EmailOutbox).where(EmailOutbox.Id.in_(expired.scalar_subquery()))
+        async with self.session_scope() as session:
+            result = await session.execute(stmt)
+            return result.rowcount
+
+    async def count_by_status(self) -> dict:
+        stmt = select(EmailOutbox.Status, func.count()).group_by(EmailOutbox.Status)
+        async with self.session_scope() as session:
+            result = await session.execute(stmt)
+            return {status: count for status, count in result.all()}
@@ -1,7 +1,7 @@
 import datetime
 from backend.Entities.Otps import Otps
 from backend.DatabaseAccessLayer.Base import BaseDAL
-from sqlalchemy import select
+from sqlalchemy import select, update, delete, func, false
 from uuid import UUID
 
 class OtpsDAL(BaseDAL):
@@ -13,28 +13,41 @@ class OtpsDAL(BaseDAL):
         otp = Otps(UserId=user_id, Code=code, ExpiresAt=expires_at)
         return await self.add(otp)  # BaseDAL helper
 
-    async def get_valid_otp(self, user_id: str, code: str):
+    async def consume_otp(self, user_id: UUID, code: str) -> bool:
         """
-        Fetch OTP if it exists, is not used, and not expired
+        Mark a matching unused, unexpired OTP as used in one statement and
+        report whether there was one. Of two concurrent calls with the same
+        code only one sees the row, so an OTP cannot be spent twice.
+        Served by the partial index idx_otps_unused.
         """
-        now = datetime.datetime.now(datetime.UTC)
         stmt = (
-            select(Otps)
+            update(Otps)
             .where(
                 Otps.UserId == user_id,
                 Otps.Code == code,
-                Otps.IsUsed.is_(False),
-                Otps.ExpiresAt >= now
+                Otps.IsUsed == false(),  # same predicate as the partial index
+                Otps.ExpiresAt >= func.now()
             )
+            .values(IsUsed=True)
+            .returning(Otps.Id)
         )
         async with self.session_scope() as session:
             result = await session.execute(stmt)
-            return result.scalar_one_or_none()
+            return result.first() is not None
 
-
-    async def mark_otp_used(self, otp_id: str):
-        otp = await self.get_by_id(otp_id)
-        if otp:
-            otp.IsUsed = True
-            return await self.update(otp)  # BaseDAL helper
-        return None
+    async def purge_expired(self, limit: int) -> int:
+        """
+        Delete up to `limit` expired OTPs (used or not) and return how many
+        went. Rows are picked with SKIP LOCKED, so concurrent purges from
+        several workers do not block each other or a consume.
+        """
+        expired = (
+            select(Otps.Id)
+            .where(Otps.ExpiresAt < func.now())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = delete(Otps).where(Otps.Id.in_(expired.scalar_subquery()))
+        async with self.session_scope() as session:
+            result = await session.execute(stmt)
+            return result.rowcount
@@ -0,0 +1,74 @@
+from backend.Entities.ProtectedFiles import ProtectedFiles
+from backend.DatabaseAccessLayer.Base import BaseDAL
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from typing import Optional
+
+
+class ProtectedFilesDAL(BaseDAL):
+    """
+    Reference counts for the content-addressed protected file store.
+
+    Every method first takes a transaction-scoped advisory lock on the
+    digest, so taking a reference, dropping the last one and removing the
+    blob from disk are serialised per digest across all workers.
+    """
+
+    def __init__(self):
+        super().__init__(ProtectedFiles)
+
+    @staticmethod
+    async def _lock(session, digest: str):
+        await session.execute(select(func.pg_advisory_xact_lock(func.hashtext(digest))))
+
+    async def acquire(self, digest: str, size_bytes: int, mime_type: str = None) -> int:
+        """Add one reference to `digest`, creating the row if needed. Returns the new count."""
+        stmt = (
+            insert(ProtectedFiles)
+            .values(Digest=digest, SizeBytes=size_bytes, MimeType=mime_type, RefCount=1)
+            .on_conflict_do_update(
+                index_elements=[ProtectedFiles.Digest],
+                set_={"RefCount": ProtectedFiles.RefCount + 1, "UpdatedAt": func.now()}
+            )
+            .returning(ProtectedFiles.RefCount)
+        )
+        async with self.session_scope() as session:
+            await self._lock(session, digest)
+            result = await session.execute(stmt)
+            return result.scalar_one()
+
+    async def release(self, digest: str) -> Optional[int]:
+        """
+        Drop one reference to `digest` and return the remaining count; at 0
+        the row is deleted and the blob may be collected. Returns None when
+        the digest is not tracked (files stored before the content-addressed
+        store).
+        """
+        stmt = (
+            update(ProtectedFiles)
+            .where(ProtectedFiles.Digest == digest, ProtectedFiles.RefCount > 0)
+            .values(RefCount=ProtectedFiles.RefCount - 1, UpdatedAt=func.now())
+            .returning(ProtectedFiles.RefCount)
+            .execution_options(synchronize_session=False)
+        )
+        async with self.session_scope() as session:
+            await self._lock(session, digest)
+            remaining = (await session.execute(stmt)).scalar_one_or_none()
+            if remaining == 0:
+                await session.execute(
+                    delete(ProtectedFiles)
+                    .where(ProtectedFiles.Digest == digest, ProtectedFiles.RefCount == 0)
+                    .execution_options(synchronize_session=False)
+                )
+            return remaining
+
+    async def is_unreferenced(self, digest: str) -> bool:
+        """
+        Lock `digest` and report whether nothing references it any more.
+        Run inside a unit of work so the lock is held until the blob has
+        been removed and a concurrent upload of the same content waits.
+        """
+        async with self.session_scope() as session:
+            await self._lock(session, digest)
+            result = await session.execute(select(ProtectedFiles.Digest).where(ProtectedFiles.Digest == digest))
+            return result.scalar_one_or_none() is None
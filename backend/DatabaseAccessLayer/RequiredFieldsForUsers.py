@@ -1,6 +1,7 @@
 from backend.Entities.RequiredFieldsForUsers import RequiredFieldsForUsers
 from backend.DatabaseAccessLayer.Base import BaseDAL
-from sqlalchemy import select, and_
+from backend.Utils.field_schema import field_schema_cache, RoleFieldSchema
+from backend.config import settings
 from datetime import datetime
 
 class RequiredFieldsForUsersDAL(BaseDAL):
@@ -45,59 +46,52 @@ class RequiredFieldsForUsersDAL(BaseDAL):
         return await self.add(new_field) 
 
     async def get_fields_by_role(self, role_id: int):
-        stmt = select(RequiredFieldsForUsers).where(RequiredFieldsForUsers.RoleId == role_id)
-        async with self.session_scope() as session:
-            result = await session.execute(stmt)
-            return result.scalars().all()
+        return await self.query({"RoleId": role_id}, order_by=["DisplayOrder", "Id"])
+
+    async def count_fields_by_role(self, role_id: int) -> int:
+        return await self.count({"RoleId": role_id})
         
     async def get_field_by_name(self, role_id: int, field_name: str):
-        stmt = select(RequiredFieldsForUsers).where(
-            and_(
-                RequiredFieldsForUsers.RoleId == role_id,
-                RequiredFieldsForUsers.FieldName == field_name
-            )
-        )
-        async with self.session_scope() as session:
-            result = await session.execute(stmt)
-            return result.scalar_one_or_none()
+        return await self.query_one({"RoleId": role_id, "FieldName": field_name})
 
     async def get_active_fields(self, role_id: int = None):
-        stmt = select(RequiredFieldsForUsers).where(RequiredFieldsForUsers.IsActive.is_(True))
+        filters = {"IsActive": True}
         if role_id is not None:
-            stmt = stmt.where(RequiredFieldsForUsers.RoleId == role_id)
-        async with self.session_scope() as session:
-            result = await session.execute(stmt)
-            return result.scalars().all()
+            filters["RoleId"] = role_id
+        return await self.query(filters, order_by=["DisplayOrder", "Id"])
+
+    async def get_role_schema(self, role_id: int) -> RoleFieldSchema:
+        """The compiled active fields of a role, from field_schema_cache when it is current."""
+        schema = field_schema_cache.get(role_id, settings.FIELD_SCHEMA_REFRESH_SECONDS)
+        if schema is not None:
+            return schema
+        version = field_schema_cache.version(role_id)
+        return field_schema_cache.build(role_id, version, await self.get_active_fields(role_id))
 
+    # delete/deactivate/activate return the affected field (None if not found)
     async def delete_field(self, field_id: int):
         field = await self.get_by_id(field_id)
         if field:
             await self.delete(field)
-            return True
-        return False
+            return field
+        return None
 
-    async def deactivate_field(self, field_id: int) -> bool:
+    async def deactivate_field(self, field_id: int):
         field = await self.get_by_id(field_id)
         if not field:
-            return False  # Field not found
+            return None  # Field not found
 
         field.IsActive = False
-        async with self.session_scope() as session:
-            session.add(field)
-            await session.commit()
-            await session.refresh(field)
+        await self.update(field)
 
-        return True
+        return field
     
-    async def activate_field(self, field_id: int) -> bool:
+    async def activate_field(self, field_id: int):
         field = await self.get_by_id(field_id)
         if not field:
-            return False  # Field not found
+            return None  # Field not found
 
         field.IsActive = True
-        async with self.session_scope() as session:
-            session.add(field)
-            await session.commit()
-            await session.refresh(field)
+        await self.update(field)
 
-        return True
\ No newline at end of file
+        return field
\ No newline at end of file
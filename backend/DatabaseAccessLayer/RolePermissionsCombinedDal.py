@@ -2,7 +2,12 @@ from backend.DatabaseAccessLayer.Base import BaseDAL
 from backend.Entities.Permissions import Permissions
 from backend.Entities.RolePermissions import RolePermissions
 from backend.Entities.Roles import Roles
+from backend.Utils.permission_matrix import permission_matrix
+from backend.db import after_commit
+from backend.config import settings
 from sqlalchemy import select, delete
+from typing import Dict, Iterable, Tuple
+import asyncio
 
 
 class RolePermissionsCombinedDAL(BaseDAL):
@@ -11,10 +16,33 @@ class RolePermissionsCombinedDAL(BaseDAL):
         - Permissions table
         - RolePermissions table (many-to-many mapping)
     """
+    _matrix_lock = asyncio.Lock()
+
     def __init__(self):
         # The model does not matter for BaseDAL since we override all methods.
         super().__init__(RolePermissions)
 
+    async def _ensure_matrix(self):
+        """
+        Load the compiled role→permission matrix on first use, after an
+        invalidation, or once it is older than PERMISSION_MATRIX_REFRESH_SECONDS.
+        Concurrent callers wait for a single load.
+        """
+        max_age = settings.PERMISSION_MATRIX_REFRESH_SECONDS
+        if permission_matrix.is_fresh(max_age):
+            return
+        async with self._matrix_lock:
+            if permission_matrix.is_fresh(max_age):
+                return
+            async with self.session_scope() as session:
+                permissions = (await session.execute(
+                    select(Permissions.Id, Permissions.TableName, Permissions.Method)
+                )).all()
+                grants = (await session.execute(
+                    select(RolePermissions.RoleId, RolePermissions.PermissionId)
+                )).all()
+            permission_matrix.build(permissions, grants)
+
     async def create_permission(self, table_name: str, method: str, description: str = None):
         """
         Adds a new permission to the Permissions table.
@@ -24,7 +52,9 @@ class RolePermissionsCombinedDAL(BaseDAL):
             Method=method.lower(),
             Description=description
         )
-        return await self.add(perm)
+        perm = await self.add(perm)
+        after_commit(lambda: permission_matrix.add_permission(perm.Id, perm.TableName, perm.Method))
+        return perm
 
     async def get_permission_by_id(self, permission_id: int):
         return await self.get_by_id(permission_id)
@@ -52,20 +82,25 @@ class RolePermissionsCombinedDAL(BaseDAL):
 
     async def role_has_permission(self, role_id: int, table_name: str, method: str) -> bool:
         """
-        Returns True if the given role has {table}.{method} permission
+        Returns True if the given role has {table}.{method} permission.
+        Answered from the in-memory permission matrix.
         """
-        async with self.session_scope() as session:
-            stmt = (
-                select(RolePermissions)
-                .join(Permissions)
-                .where(
-                    RolePermissions.RoleId == role_id,
-                    Permissions.TableName.ilike(table_name),
-                    Permissions.Method.ilike(method)
-                )
-            )
-            result = await session.execute(stmt)
-            return result.scalar_one_or_none() is not None
+        await self._ensure_matrix()
+        return permission_matrix.has(role_id, table_name, method)
+
+    async def role_has_permissions(
+        self,
+        role_id: int,
+        checks: Iterable[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], bool]:
+        """
+        Batch variant of role_has_permission: {(table, method): allowed}.
+        """
+        await self._ensure_matrix()
+        return {
+            (table_name, method): permission_matrix.has(role_id, table_name, method)
+            for table_name, method in checks
+        }
 
     async def get_permissions_for_role(self, role_id: int):
         """
@@ -98,7 +133,8 @@ class RolePermissionsCombinedDAL(BaseDAL):
                 raise ValueError(f"Permission with id '{permission_id}' does not exist")
 
         # Check duplicate
-        exists = await self.role_has_permission(role_id, perm.TableName, perm.Method)
+        async with self.session_scope() as session:
+            exists = await session.get(RolePermissions, (role_id, permission_id))
         if exists:
             return False
 
@@ -106,7 +142,9 @@ class RolePermissionsCombinedDAL(BaseDAL):
             RoleId=role_id,
             PermissionId=permission_id
         )
-        return await self.add(role_perm)
+        role_perm = await self.add(role_perm)
+        after_commit(lambda: permission_matrix.grant(role_id, permission_id))
+        return role_perm
 
     async def remove_permission_from_role(self, role_id: int, permission_id: int):
         """
@@ -122,7 +160,10 @@ class RolePermissionsCombinedDAL(BaseDAL):
                 .returning(RolePermissions.RoleId)
             )
             result = await session.execute(stmt)
-            return result.scalar_one_or_none() is not None
+            removed = result.scalar_one_or_none() is not None
+        if removed:
+            after_commit(lambda: permission_matrix.revoke(role_id, permission_id))
+        return removed
 
     async def clear_permissions_for_role(self, role_id: int):
         """
@@ -131,4 +172,5 @@ class RolePermissionsCombinedDAL(BaseDAL):
         async with self.session_scope() as session:
             stmt = delete(RolePermissions).where(RolePermissions.RoleId == role_id)
             await session.execute(stmt)
+        after_commit(lambda: permission_matrix.clear_role(role_id))
         return True
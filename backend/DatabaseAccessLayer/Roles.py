@@ -1,7 +1,13 @@
 from backend.Entities.Roles import Roles
 from backend.Entities.Users import Users
 from backend.DatabaseAccessLayer.Base import BaseDAL
-from sqlalchemy import select, func
+from backend.Utils.principal_cache import principal_cache
+from backend.Utils.permission_matrix import permission_matrix
+from backend.Utils.token_versions import token_versions
+from backend.db import after_commit
+from sqlalchemy import select, update, func, and_, or_, bindparam, Integer
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.orm import aliased
 
 class RolesDAL(BaseDAL):
     def __init__(self):
@@ -27,7 +33,7 @@ class RolesDAL(BaseDAL):
         return await self.add(new_role)
 
     async def get_all_roles(self):
-        return await self.get_all()
+        return await self.query(order_by=["Id"])
 
     async def update_role(
         self,
@@ -41,10 +47,12 @@ class RolesDAL(BaseDAL):
         if not role:
             return None
 
+        renamed = False
         if name:
             existing_role = await self.get_role_by_name(name)
             if existing_role and existing_role.Id != role_id:
                 raise ValueError("Role name must be unique")
+            renamed = role.Name != name
             role.Name = name
 
         if description is not None:
@@ -56,7 +64,20 @@ class RolesDAL(BaseDAL):
         if registration_by_roles is not None:
             role.RegistrationByRoles = registration_by_roles
 
-        return await self.update(role)
+        updated = await self.update(role)
+        after_commit(lambda: principal_cache.invalidate_role(role_id))
+        if renamed:
+            # Access tokens carry the role name; make its users' tokens stale
+            stmt = (
+                update(Users)
+                .where(Users.RoleId == role_id)
+                .values(TokenVersion=Users.TokenVersion + 1)
+                .execution_options(synchronize_session=False)
+            )
+            async with self.session_scope() as session:
+                await session.execute(stmt)
+            after_commit(lambda: token_versions.invalidate_role(role_id))
+        return updated
 
     async def delete_role(self, role_id: int):
         # Check if users exist for this role
@@ -71,20 +92,16 @@ class RolesDAL(BaseDAL):
         role = await self.get_by_id(role_id)
         if role:
             await self.delete(role) 
+            # RolePermissions rows go with the role (ON DELETE CASCADE)
+            after_commit(lambda: permission_matrix.clear_role(role_id))
             return True
         return False
 
     async def get_role_by_name(self, name: str):
-        stmt = select(Roles).where(Roles.Name == name)
-        async with self.session_scope() as session:
-            result = await session.execute(stmt)
-            return result.scalar_one_or_none()
+        return await self.query_one({"Name": name})
         
     async def get_roles_for_signup(self):
-        stmt = select(Roles).where(Roles.RegistrationAllowed == True)
-        async with self.session_scope() as session:
-            result = await session.execute(stmt)
-            return result.scalars().all()
+        return await self.query({"RegistrationAllowed": True}, order_by=["Id"])
 
     async def get_roles_actor_can_create(self, actor_role_id: int):
         """
@@ -103,56 +120,29 @@ class RolesDAL(BaseDAL):
             * Cannot create their own role
         """
 
+        # One query: the actor's role is joined in, so its name picks the
+        # rule without a separate lookup. Unknown actor role → no rows.
+        actor_role = aliased(Roles)
+        actor_id = bindparam("actor_role_id", type_=Integer)
+        stmt = (
+            select(Roles)
+            .join(actor_role, actor_role.Id == actor_id)
+            .where(or_(
+                # 1️⃣ SUPER USER → full access (no exclusions)
+                actor_role.Name == "Super User",
+                # 2️⃣ ADMIN → can create all EXCEPT Super User & own role
+                and_(actor_role.Name == "Admin", Roles.Name != "Super User", Roles.Id != actor_id),
+                # 3️⃣ NORMAL USERS → Only roles they are allowed to create,
+                # never their own role and never Admin
+                and_(
+                    actor_role.Name.notin_(["Super User", "Admin"]),
+                    Roles.RegistrationByRoles.contains(array([actor_id])),
+                    Roles.Id != actor_id,
+                    Roles.Name != "Admin",
+                ),
+            ))
+            .order_by(Roles.Id)
+        )
         async with self.session_scope() as session:
-
-            # 1️⃣ Fetch actor role
-            actor_stmt = select(Roles).where(Roles.Id == actor_role_id)
-            actor_result = await session.execute(actor_stmt)
-            actor_role = actor_result.scalar_one_or_none()
-
-            if not actor_role:
-                return []
-
-            actor_role_name = actor_role.Name
-
-            # Fetch Super User & Admin IDs
-            super_stmt = select(Roles).where(Roles.Name == "Super User")
-            super_role = (await session.execute(super_stmt)).scalar_one_or_none()
-            super_role_id = super_role.Id if super_role else None
-
-            admin_stmt = select(Roles).where(Roles.Name == "Admin")
-            admin_role = (await session.execute(admin_stmt)).scalar_one_or_none()
-            admin_role_id = admin_role.Id if admin_role else None
-
-            # 2️⃣ SUPER USER → full access (no exclusions)
-            if actor_role_name == "Super User":
-                stmt = select(Roles)  # SUPER USER sees all
-                result = await session.execute(stmt)
-                return result.scalars().all()
-
-            # 3️⃣ ADMIN → can create all EXCEPT Super User & own role
-            if actor_role_name == "Admin":
-                stmt = select(Roles)
-
-                # Exclude Super User
-                if super_role_id:
-                    stmt = stmt.where(Roles.Id != super_role_id)
-
-                # Exclude their own role
-                stmt = stmt.where(Roles.Id != actor_role_id)
-
-                result = await session.execute(stmt)
-                return result.scalars().all()
-
-            # 4️⃣ NORMAL USERS → Only roles they are allowed to create
-            stmt = select(Roles).where(
-                Roles.RegistrationByRoles.contains([actor_role_id]),
-                Roles.Id != actor_role_id  # cannot create own role
-            )
-
-            # Exclude Admin always
-            if admin_role_id:
-                stmt = stmt.where(Roles.Id != admin_role_id)
-
-            result = await session.execute(stmt)
+            result = await session.execute(stmt, {"actor_role_id": actor_role_id})
             return result.scalars().all()
@@ -1,25 +1,33 @@
 from backend.Entities.Users import Users
 from backend.Entities.Roles import Roles
+from backend.Entities.UsersFieldData import UsersFieldData
 from backend.DatabaseAccessLayer.Base import BaseDAL
+from backend.Utils.principal_cache import principal_cache
+from backend.Utils.token_versions import token_versions
+from backend.db import after_commit
 from sqlalchemy.orm import joinedload
-from sqlalchemy import select
-from uuid import UUID
+from sqlalchemy import select, exists, func, JSON
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+from uuid import UUID, uuid4
 
 class UsersDAL(BaseDAL):
     def __init__(self):
         super().__init__(Users)
 
     async def create_user(self, full_name: str, email: str, password: str, role_id: int):
-        # Check if email exists
-        existing_user = await self.get_user_by_email(email)
-        if existing_user:
-            raise ValueError(f"User with email '{email}' already exists")
-
-        # Ensure role exists
+        # Email taken / role exists, in one round trip
+        stmt = select(
+            exists().where(Users.Email == email),
+            exists().where(Roles.Id == role_id)
+        )
         async with self.session_scope() as session:
-            role = await session.get(Roles, role_id)
-            if not role:
-                raise ValueError(f"Role with id '{role_id}' does not exist")
+            email_taken, role_exists = (await session.execute(stmt)).one()
+        if email_taken:
+            raise ValueError(f"User with email '{email}' already exists")
+        if not role_exists:
+            raise ValueError(f"Role with id '{role_id}' does not exist")
 
         new_user = Users(
             FullName=full_name,
@@ -29,6 +37,40 @@ class UsersDAL(BaseDAL):
         )
         return await self.add(new_user)  # BaseDAL helper
 
+    async def insert_many(self, users: List[dict]) -> List:
+        """
+        Insert many users with one multi-row INSERT ... ON CONFLICT (Email)
+        DO NOTHING. Each item: {"full_name", "email", "password" (hashed),
+        "role_id"}. Returns (Id, Email) rows for the users actually created;
+        emails that already exist are skipped.
+        """
+        if not users:
+            return []
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "Id": uuid4(),
+                "FullName": u["full_name"],
+                "Email": u["email"],
+                "Password": u["password"],
+                "RoleId": u["role_id"],
+                "IsActive": True,
+                "TokenVersion": 0,
+                "CreatedAt": now,
+                "UpdatedAt": now,
+            }
+            for u in users
+        ]
+        stmt = (
+            insert(Users)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[Users.Email])
+            .returning(Users.Id, Users.Email)
+        )
+        async with self.session_scope() as session:
+            result = await session.execute(stmt)
+            return result.all()
+
     async def get_user_by_id(self, user_id: UUID, active: bool = None):
         user = await self.get_by_id(user_id)  # BaseDAL helper
         if user and active is not None and user.IsActive != active:
@@ -36,19 +78,73 @@ class UsersDAL(BaseDAL):
         return user
 
     async def get_user_by_email(self, email: str, active: bool = None):
-        stmt = select(Users).where(Users.Email == email)
-        async with self.session_scope() as session:
-            result = await session.execute(stmt)
-            user = result.scalar_one_or_none()
-        if user and active is not None and user.IsActive != active:
-            return None
-        return user
+        filters = {"Email": email}
+        if active is not None:
+            filters["IsActive"] = active
+        return await self.query_one(filters)
 
     async def get_all_users(self, filters=None, active: bool = None):
-        users = await self.get_all(filters)  # BaseDAL helper
+        filters = dict(filters or {})
         if active is not None:
-            users = [u for u in users if u.IsActive == active]
-        return users
+            filters["IsActive"] = active
+        return await self.query(filters=filters)
+
+    async def get_users_page(
+        self,
+        role_id: int,
+        limit: int,
+        after: Optional[Tuple[datetime, UUID]] = None,
+        active: bool = True
+    ) -> List:
+        """
+        One page of a role's users ordered by (CreatedAt, Id), starting after
+        the (CreatedAt, Id) key of the previous page's last row. Served from
+        idx_users_role_active_created, so the cost does not grow with the
+        page number. Only the listing columns are selected.
+        """
+        return await self.query(
+            filters={"RoleId": role_id, "IsActive": active},
+            columns=["Id", "FullName", "Email", "ProfilePicture", "CreatedAt"],
+            order_by=["CreatedAt", "Id"],
+            limit=limit,
+            after=after
+        )
+
+    async def stream_roster(
+        self,
+        role_id: int,
+        field_ids: List[int],
+        active: Optional[bool] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator:
+        """
+        Yield a role's users (Id, FullName, Email, IsActive, CreatedAt) with
+        their values of `field_ids` pivoted into FieldValues
+        ({"<field id>": Value}, via json_object_agg), ordered by (CreatedAt, Id).
+
+        Rows come from a server-side cursor, `batch_size` at a time. This runs
+        in its own session, not the request's, because a streamed response is
+        still being read after the endpoint has returned.
+        """
+        field_values = (
+            select(func.json_object_agg(UsersFieldData.RequiredFieldId, UsersFieldData.Value, type_=JSON))
+            .where(UsersFieldData.UserId == Users.Id, UsersFieldData.RequiredFieldId.in_(field_ids))
+            .scalar_subquery()
+        )
+        stmt = (
+            select(Users.Id, Users.FullName, Users.Email, Users.IsActive, Users.CreatedAt,
+                   field_values.label("FieldValues"))
+            .where(Users.RoleId == role_id)
+            .order_by(Users.CreatedAt, Users.Id)
+            .execution_options(yield_per=batch_size)
+        )
+        if active is not None:
+            stmt = stmt.where(Users.IsActive.is_(active))
+
+        async with self._session_factory() as session:
+            result = await session.stream(stmt)
+            async for row in result:
+                yield row
 
     async def update_user(self, user_id: UUID, full_name: str = None, email: str = None,
                           password: str = None, role_id: int = None, profile_picture: str = None):
@@ -62,28 +158,58 @@ class UsersDAL(BaseDAL):
                 raise ValueError("Email must be unique")
             user.Email = email
 
+        revoke_tokens = False
         if full_name:
             user.FullName = full_name
         if password:
             user.Password = password
+            revoke_tokens = True
         if role_id:
             async with self.session_scope() as session:
                 role = await session.get(Roles, role_id)
                 if not role:
                     raise ValueError(f"Role with id '{role_id}' does not exist")
+            revoke_tokens = revoke_tokens or user.RoleId != role_id
             user.RoleId = role_id
         if profile_picture is not None:
             user.ProfilePicture = profile_picture
+        if revoke_tokens:
+            user.TokenVersion = (user.TokenVersion or 0) + 1
 
-        return await self.update(user)  # BaseDAL helper
+        updated = await self.update(user)  # BaseDAL helper
+        after_commit(lambda: principal_cache.invalidate_user(user_id))
+        if revoke_tokens:
+            version, new_role_id = updated.TokenVersion, updated.RoleId
+            after_commit(lambda: token_versions.put(user_id, version, new_role_id))
+        return updated
+
+    async def deactivate_user(self, user_id: UUID):
+        user = await self.get_by_id(user_id)
+        if not user:
+            return None
+        user.IsActive = False
+        user.TokenVersion = (user.TokenVersion or 0) + 1
+        updated = await self.update(user)  # BaseDAL helper
+        after_commit(lambda: principal_cache.invalidate_user(user_id))
+        after_commit(lambda: token_versions.revoke(user_id))
+        return updated
 
     async def delete_user(self, user_id: UUID):
         user = await self.get_by_id(user_id)
         if not user:
             return False
         await self.delete(user)  # BaseDAL helper
+        after_commit(lambda: principal_cache.invalidate_user(user_id))
+        after_commit(lambda: token_versions.revoke(user_id))
         return True
 
+    async def get_token_state(self, user_id: UUID) -> Optional[Tuple[int, int]]:
+        """(TokenVersion, RoleId) of an active user, or None; reads no other columns."""
+        stmt = select(Users.TokenVersion, Users.RoleId).where(Users.Id == user_id, Users.IsActive.is_(True))
+        async with self.session_scope() as session:
+            row = (await session.execute(stmt)).first()
+        return tuple(row) if row else None
+
     async def get_user_with_role(self, user_id: UUID, active: bool = None):
         stmt = select(Users).options(joinedload(Users.Role)).where(Users.Id == user_id)
         async with self.session_scope() as session:
@@ -1,55 +1,121 @@
 from backend.Entities.UsersFieldData import UsersFieldData
+from backend.Entities.RequiredFieldsForUsers import RequiredFieldsForUsers
+from backend.Entities.Users import Users
 from backend.DatabaseAccessLayer.Base import BaseDAL
-from sqlalchemy import select, and_
-from typing import Optional, List
+from sqlalchemy import select, func, and_
+from sqlalchemy.dialects.postgresql import insert
+from typing import Any, Iterable, Optional, List, Tuple
 import uuid
 
+# Rows per statement; keeps bind parameters well under the driver's 32767 limit
+BULK_UPSERT_CHUNK = 5000
+
 
 class UsersFieldDataDAL(BaseDAL):
     def __init__(self):
         super().__init__(UsersFieldData)
 
+    @staticmethod
+    def _upsert(rows: List[dict]):
+        stmt = insert(UsersFieldData).values(rows)
+        return stmt.on_conflict_do_update(
+            constraint="uq_usersfielddata_user_field",
+            set_={"Value": stmt.excluded.Value, "UpdatedAt": func.now()}
+        )
+
     async def create_or_update_user_field_data(
         self,
         user_id: uuid.UUID,
         required_field_id: int,
         value
     ) -> UsersFieldData:
-        # Wrap value in {"data": ...}
-        value_json = {"data": value}
-
-        # Check if entry already exists
-        existing_data = await self.get_by_user_and_field(user_id, required_field_id)
-
-        if existing_data:
-            existing_data.Value = value_json
-            async with self.session_scope() as session:
-                session.add(existing_data)
-                await session.commit()
-                await session.refresh(existing_data)
-            return existing_data
-
-        # Create new entry
-        new_data = UsersFieldData(
-            UserId=user_id,
-            RequiredFieldId=required_field_id,
-            Value=value_json
+        # Wrap value in {"data": ...}; one INSERT ... ON CONFLICT DO UPDATE round trip
+        stmt = (
+            self._upsert([{"UserId": user_id, "RequiredFieldId": required_field_id, "Value": {"data": value}}])
+            .returning(UsersFieldData)
+            .execution_options(populate_existing=True)
         )
-        return await self.add(new_data)
+        async with self.session_scope() as session:
+            result = await session.execute(stmt)
+            return result.scalar_one()
+
+    async def bulk_upsert(self, items: Iterable[Tuple[uuid.UUID, int, Any]]) -> List:
+        """
+        Set many (user_id, required_field_id, value) triples with multi-row
+        INSERT ... ON CONFLICT (UserId, RequiredFieldId) DO UPDATE statements.
+        A later triple for the same user and field wins. Returns
+        (Id, UserId, RequiredFieldId) rows.
+        """
+        rows = {}
+        for user_id, required_field_id, value in items:
+            rows[(user_id, required_field_id)] = {"UserId": user_id, "RequiredFieldId": required_field_id, "Value": {"data": value}}
+        rows = list(rows.values())
+
+        saved = []
+        async with self.session_scope() as session:
+            for i in range(0, len(rows), BULK_UPSERT_CHUNK):
+                stmt = (
+                    self._upsert(rows[i:i + BULK_UPSERT_CHUNK])
+                    .returning(UsersFieldData.Id, UsersFieldData.UserId, UsersFieldData.RequiredFieldId)
+                )
+                result = await session.execute(stmt)
+                saved.extend(result.all())
+        return saved
 
     async def get_by_user_and_field(self, user_id: uuid.UUID, required_field_id: int) -> Optional[UsersFieldData]:
-        stmt = select(UsersFieldData).where(
-            and_(
-                UsersFieldData.UserId == user_id,
-                UsersFieldData.RequiredFieldId == required_field_id
+        return await self.query_one({"UserId": user_id, "RequiredFieldId": required_field_id})
+
+    async def get_all_by_user(self, user_id: uuid.UUID) -> List[UsersFieldData]:
+        return await self.query({"UserId": user_id}, order_by=["Id"])
+
+    async def get_values_by_user(self, user_id: uuid.UUID) -> List:
+        """(RequiredFieldId, Value) rows only, for read-only views of a user's data."""
+        return await self.query({"UserId": user_id}, columns=["RequiredFieldId", "Value"])
+
+    async def get_fields_with_values(self, user_ids: List[uuid.UUID]) -> List:
+        """
+        Active fields of each user's role joined with that user's values, in
+        one query: Users -> RequiredFieldsForUsers -> UsersFieldData, both
+        LEFT JOINed. Rows are ordered by user, then DisplayOrder. A user whose
+        role has no active fields gets a single row with FieldId None; unknown
+        users get no rows. Value is None for fields not filled yet.
+        """
+        stmt = (
+            select(
+                Users.Id.label("UserId"),
+                Users.RoleId,
+                RequiredFieldsForUsers.Id.label("FieldId"),
+                RequiredFieldsForUsers.FieldName,
+                RequiredFieldsForUsers.FieldType,
+                RequiredFieldsForUsers.IsRequired,
+                RequiredFieldsForUsers.Options,
+                RequiredFieldsForUsers.Validation,
+                RequiredFieldsForUsers.DisplayOrder,
+                UsersFieldData.Value
             )
+            .select_from(Users)
+            .outerjoin(
+                RequiredFieldsForUsers,
+                and_(RequiredFieldsForUsers.RoleId == Users.RoleId, RequiredFieldsForUsers.IsActive.is_(True))
+            )
+            .outerjoin(
+                UsersFieldData,
+                and_(UsersFieldData.UserId == Users.Id, UsersFieldData.RequiredFieldId == RequiredFieldsForUsers.Id)
+            )
+            .where(Users.Id.in_(user_ids))
+            .order_by(Users.Id, RequiredFieldsForUsers.DisplayOrder, RequiredFieldsForUsers.Id)
         )
         async with self.session_scope() as session:
             result = await session.execute(stmt)
-            return result.scalar_one_or_none()
+            return result.all()
 
-    async def get_all_by_user(self, user_id: uuid.UUID) -> List[UsersFieldData]:
-        stmt = select(UsersFieldData).where(UsersFieldData.UserId == user_id)
+    async def get_all_by_field_type(self, field_type: str) -> List[UsersFieldData]:
+        stmt = (
+            select(UsersFieldData)
+            .join(RequiredFieldsForUsers, RequiredFieldsForUsers.Id == UsersFieldData.RequiredFieldId)
+            .where(RequiredFieldsForUsers.FieldType == field_type)
+            .order_by(UsersFieldData.Id)
+        )
         async with self.session_scope() as session:
             result = await session.execute(stmt)
             return result.scalars().all()
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, BigInteger, Integer, String, Text, TIMESTAMP, Index, func, text
+from backend.Entities.Base import Base
+
+
+class EmailOutbox(Base):
+    __tablename__ = "EmailOutbox"
+
+    Id = Column(BigInteger, primary_key=True, autoincrement=True)
+    ToAddress = Column(String(255), nullable=False)
+    Subject = Column(String(255), nullable=False)
+    PlainText = Column(Text, nullable=True)
+    HtmlContent = Column(Text, nullable=True)
+    Status = Column(String(20), nullable=False, default="pending")  # pending | sending | sent | failed
+    Attempts = Column(Integer, nullable=False, default=0)
+    NextAttemptAt = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    LastError = Column(Text, nullable=True)
+    ProviderMessageId = Column(String(255), nullable=True)
+    CreatedAt = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    SentAt = Column(TIMESTAMP(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index(
+            "idx_emailoutbox_due",
+            "NextAttemptAt",
+            postgresql_where=text("\"Status\" IN ('pending', 'sending')")
+        ),
+    )
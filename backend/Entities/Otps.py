@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, String, Boolean, TIMESTAMP, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import datetime
@@ -13,7 +13,14 @@ class Otps(Base):
     Code = Column(String(10), nullable=False)
     IsUsed = Column(Boolean, nullable=False, default=False)
     ExpiresAt = Column(TIMESTAMP(timezone=True), nullable=False)
-    CreatedAt = Column(TIMESTAMP(timezone=True), default=datetime.datetime.now(datetime.UTC), nullable=False)
+    CreatedAt = Column(TIMESTAMP(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC), nullable=False)
 
     # Relationship to user
     User = relationship("Users", backref="Otps")
+
+    __table_args__ = (
+        # OTP consume (OtpsDAL.consume_otp) only looks at unused codes
+        Index("idx_otps_unused", "UserId", "Code", postgresql_where=text('"IsUsed" = FALSE')),
+        # Background purge of expired codes (OtpsDAL.purge_expired)
+        Index("idx_otps_expires", "ExpiresAt"),
+    )
@@ -14,12 +14,12 @@ class Permissions(Base):
 
     CreatedAt = Column(
         TIMESTAMP(timezone=True),
-        default=datetime.datetime.now(datetime.UTC)
+        default=lambda: datetime.datetime.now(datetime.UTC)
     )
     UpdatedAt = Column(
         TIMESTAMP(timezone=True),
-        default=datetime.datetime.now(datetime.UTC),
-        onupdate=datetime.datetime.now(datetime.UTC)
+        default=lambda: datetime.datetime.now(datetime.UTC),
+        onupdate=lambda: datetime.datetime.now(datetime.UTC)
     )
 
     RolePermissions = relationship("RolePermissions", back_populates="Permission")
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, CHAR, String, Integer, BigInteger, TIMESTAMP, CheckConstraint, func
+from backend.Entities.Base import Base
+
+
+class ProtectedFiles(Base):
+    """One row per distinct protected document, keyed by its SHA-256 content digest."""
+    __tablename__ = "ProtectedFiles"
+
+    Digest = Column(CHAR(64), primary_key=True)
+    SizeBytes = Column(BigInteger, nullable=False)
+    MimeType = Column(String(255), nullable=True)
+    RefCount = Column(Integer, nullable=False, default=1)
+    CreatedAt = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    UpdatedAt = Column(TIMESTAMP(timezone=True), nullable=True)
+
+    __table_args__ = (
+        CheckConstraint('"RefCount" >= 0', name="check_protectedfiles_refcount"),
+    )
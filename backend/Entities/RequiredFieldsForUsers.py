@@ -29,11 +29,11 @@ class RequiredFieldsForUsers(Base):
     Validation = Column(JSON, nullable=True)
     DisplayOrder = Column(Integer, nullable=True)
     IsActive = Column(Boolean, nullable=False, default=True)
-    CreatedAt = Column(TIMESTAMP(timezone=True), default=datetime.datetime.now(datetime.UTC))
+    CreatedAt = Column(TIMESTAMP(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC))
     UpdatedAt = Column(
         TIMESTAMP(timezone=True),
-        default=datetime.datetime.now(datetime.UTC),
-        onupdate=datetime.datetime.now(datetime.UTC)
+        default=lambda: datetime.datetime.now(datetime.UTC),
+        onupdate=lambda: datetime.datetime.now(datetime.UTC)
     )
 
     __table_args__ = (
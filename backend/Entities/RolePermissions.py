@@ -12,12 +12,12 @@ class RolePermissions(Base):
 
     CreatedAt = Column(
         TIMESTAMP(timezone=True),
-        default=datetime.datetime.now(datetime.UTC)
+        default=lambda: datetime.datetime.now(datetime.UTC)
     )
     UpdatedAt = Column(
         TIMESTAMP(timezone=True),
-        default=datetime.datetime.now(datetime.UTC),
-        onupdate=datetime.datetime.now(datetime.UTC)
+        default=lambda: datetime.datetime.now(datetime.UTC),
+        onupdate=lambda: datetime.datetime.now(datetime.UTC)
     )
 
     __table_args__ = (
@@ -11,6 +11,6 @@ class Roles(Base):
     Description = Column(Text, nullable=True)
     RegistrationAllowed = Column(Boolean, nullable=False, default=False)
     RegistrationByRoles = Column(ARRAY(Integer), nullable=False, default=list)
-    CreatedAt = Column(TIMESTAMP(timezone=True), default=datetime.datetime.now(datetime.UTC))
-    UpdatedAt = Column(TIMESTAMP(timezone=True), default=datetime.datetime.now(datetime.UTC), onupdate=datetime.datetime.now(datetime.UTC))
+    CreatedAt = Column(TIMESTAMP(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC))
+    UpdatedAt = Column(TIMESTAMP(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC), onupdate=lambda: datetime.datetime.now(datetime.UTC))
  
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, TIMESTAMP, ForeignKey, Boolean, Integer
+from sqlalchemy import Column, String, TIMESTAMP, ForeignKey, Boolean, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import datetime
@@ -15,9 +15,11 @@ class Users(Base):
     RoleId = Column(Integer, ForeignKey('Roles.Id'), nullable=False)
     ProfilePicture = Column(String(255), nullable=True)
     IsActive = Column(Boolean, nullable=False, default=True)
+    # Bumped whenever issued access tokens must stop working (see Utils/token_versions.py)
+    TokenVersion = Column(Integer, nullable=False, default=0, server_default="0")
 
-    CreatedAt = Column(TIMESTAMP(timezone=True), default=datetime.datetime.now(datetime.UTC))
-    UpdatedAt = Column(TIMESTAMP(timezone=True), default=datetime.datetime.now(datetime.UTC), onupdate=datetime.datetime.now(datetime.UTC))
+    CreatedAt = Column(TIMESTAMP(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC))
+    UpdatedAt = Column(TIMESTAMP(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC), onupdate=lambda: datetime.datetime.now(datetime.UTC))
 
     Role = relationship("Roles", backref="Users")
     fields_data = relationship(
@@ -25,3 +27,8 @@ class Users(Base):
         back_populates="user",
         cascade="all, delete-orphan"
     )
+
+    __table_args__ = (
+        # Keyset pagination of a role's users (UsersDAL.get_users_page)
+        Index("idx_users_role_active_created", "RoleId", "IsActive", "CreatedAt", "Id"),
+    )
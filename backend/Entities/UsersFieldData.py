@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, JSON, TIMESTAMP
+from sqlalchemy import Column, Integer, ForeignKey, JSON, TIMESTAMP, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import relationship
 from backend.Entities.Base import Base
@@ -11,9 +11,14 @@ class UsersFieldData(Base):
     UserId = Column(PGUUID(as_uuid=True), ForeignKey("Users.Id"), nullable=False)
     RequiredFieldId = Column(Integer, ForeignKey("RequiredFieldsForUsers.Id"), nullable=False)
     Value = Column(JSON, nullable=False)  # can store text, number, date, or selected options
-    CreatedAt = Column(TIMESTAMP(timezone=True), default=datetime.datetime.now(datetime.UTC))
-    UpdatedAt = Column(TIMESTAMP(timezone=True), default=datetime.datetime.now(datetime.UTC), onupdate=datetime.datetime.now(datetime.UTC))
+    CreatedAt = Column(TIMESTAMP(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC))
+    UpdatedAt = Column(TIMESTAMP(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC), onupdate=lambda: datetime.datetime.now(datetime.UTC))
 
     # optional relationships
     user = relationship("Users", back_populates="fields_data")  # assuming Users model
     required_field = relationship("RequiredFieldsForUsers", back_populates="user_values")
+
+    __table_args__ = (
+        # One value per user and field; also the conflict target of the upserts
+        UniqueConstraint("UserId", "RequiredFieldId", name="uq_usersfielddata_user_field"),
+    )
@@ -1,4 +1,5 @@
-from pydantic import BaseModel, EmailStr, constr
+from pydantic import BaseModel, EmailStr, Field, constr, conlist
+from uuid import UUID
 from typing import Any, Optional, Dict, List
 
 class CreateUserModel(BaseModel):
@@ -25,4 +26,17 @@ class UserFieldResponse(BaseModel):
 
     
 class UserFieldValue(BaseModel):
-    value: Any
\ No newline at end of file
+    value: Any
+
+
+class UserFieldValues(BaseModel):
+    values: Dict[int, Any] = Field(..., min_length=1)
+
+
+class UserIdList(BaseModel):
+    user_ids: conlist(UUID, min_length=1, max_length=500)
+
+
+class BulkFieldValue(BaseModel):
+    user_ids: conlist(UUID, min_length=1, max_length=10000)
+    value: Any
@@ -0,0 +1,254 @@
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from fastapi import HTTPException
+
+Validator = Callable[[Any], Any]
+
+
+@dataclass(frozen=True)
+class CompiledField:
+    """
+    A RequiredFieldsForUsers row with its validation rules turned into a
+    `validate(value) -> normalized value` closure. Attribute names mirror the
+    entity, so it can be used wherever a field row is only read.
+    """
+    Id: int
+    RoleId: int
+    FieldName: str
+    FieldType: str
+    IsRequired: bool
+    FilledByRoleId: Optional[int]
+    EditableByRoleId: Optional[int]
+    Options: Any
+    Validation: Any
+    DisplayOrder: Optional[int]
+    IsActive: bool
+    validate: Validator
+
+
+@dataclass(frozen=True)
+class RoleFieldSchema:
+    role_id: int
+    version: int
+    fields: Tuple[CompiledField, ...]  # active fields, in display order
+    by_id: Dict[int, CompiledField]
+
+
+# ---------------- VALIDATORS ----------------
+def _text_validator(validation: dict) -> Validator:
+    min_len = validation.get("min_length")
+    max_len = validation.get("max_length")
+
+    def validate(value):
+        if not isinstance(value, str):
+            raise HTTPException(status_code=400, detail="Expected string for text field")
+        if min_len is not None and len(value) < min_len:
+            raise HTTPException(status_code=400, detail=f"Text too short, min length {min_len}")
+        if max_len is not None and len(value) > max_len:
+            raise HTTPException(status_code=400, detail=f"Text too long, max length {max_len}")
+        return value
+    return validate
+
+
+def _number_validator(validation: dict) -> Validator:
+    min_val = validation.get("min_value")
+    max_val = validation.get("max_value")
+
+    def validate(value):
+        if not isinstance(value, (int, float)):
+            raise HTTPException(status_code=400, detail="Expected number for number field")
+        if min_val is not None and value < min_val:
+            raise HTTPException(status_code=400, detail=f"Number too small, min {min_val}")
+        if max_val is not None and value > max_val:
+            raise HTTPException(status_code=400, detail=f"Number too large, max {max_val}")
+        return value
+    return validate
+
+
+def _date_validator(field_name: str, validation: dict) -> Validator:
+    min_date = validation.get("min_date")
+    max_date = validation.get("max_date")
+    try:
+        min_bound = datetime.fromisoformat(min_date) if min_date else None
+        max_bound = datetime.fromisoformat(max_date) if max_date else None
+    except (TypeError, ValueError):
+        # Report the broken definition on use instead of failing the whole role
+        def invalid(value):
+            raise HTTPException(status_code=500, detail=f"Field '{field_name}' has an invalid date range")
+        return invalid
+
+    def validate(value):
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value)
+            except Exception:
+                raise HTTPException(status_code=400, detail="Invalid date string")
+        elif not isinstance(value, datetime):
+            raise HTTPException(status_code=400, detail="Expected datetime object for date field")
+        if min_bound and value < min_bound:
+            raise HTTPException(status_code=400, detail=f"Date too early, min {min_date}")
+        if max_bound and value > max_bound:
+            raise HTTPException(status_code=400, detail=f"Date too late, max {max_date}")
+        return value.isoformat()
+    return validate
+
+
+def _option_labels(options) -> frozenset:
+    return frozenset(
+        opt["label"] for opt in (options or [])
+        if isinstance(opt, dict) and "label" in opt
+    )
+
+
+def _mcq_validator(options) -> Validator:
+    labels = _option_labels(options)
+
+    def validate(value):
+        try:
+            valid = value in labels
+        except TypeError:  # unhashable, so not a label
+            valid = False
+        if not valid:
+            raise HTTPException(status_code=400, detail=f"Invalid option chosen for MCQ: {value}")
+        return value
+    return validate
+
+
+def _msq_validator(options) -> Validator:
+    labels = _option_labels(options)
+
+    def validate(value):
+        if not isinstance(value, list):
+            raise HTTPException(status_code=400, detail="Expected list of options for MSQ")
+        try:
+            valid = labels.issuperset(value)
+        except TypeError:
+            valid = False
+        if not valid:
+            raise HTTPException(status_code=400, detail="One or more invalid options for MSQ")
+        return value
+    return validate
+
+
+def _document_validator(validation: dict) -> Validator:
+    allowed_exts = tuple(validation.get("allowed_extensions", []) or [])
+    max_size = validation.get("max_size_mb")
+
+    def validate(value):
+        if not isinstance(value, dict) or "name" not in value or "size_mb" not in value:
+            raise HTTPException(status_code=400, detail="Document must be a dict with 'name' and 'size_mb'")
+        if allowed_exts and not value["name"].endswith(allowed_exts):
+            raise HTTPException(status_code=400, detail=f"File extension not allowed, allowed: {list(allowed_exts)}")
+        if max_size is not None and value["size_mb"] > max_size:
+            raise HTTPException(status_code=400, detail=f"File size exceeds max {max_size} MB")
+        return value
+    return validate
+
+
+def _unknown_validator(field_type: str) -> Validator:
+    def validate(value):
+        raise HTTPException(status_code=400, detail=f"Unknown field type: {field_type}")
+    return validate
+
+
+def compile_field(field) -> CompiledField:
+    """Build the CompiledField of a RequiredFieldsForUsers row (or return it if already compiled)."""
+    if isinstance(field, CompiledField):
+        return field
+
+    validation = field.Validation or {}
+    field_type = field.FieldType
+    if field_type == "text":
+        validate = _text_validator(validation)
+    elif field_type == "number":
+        validate = _number_validator(validation)
+    elif field_type == "date":
+        validate = _date_validator(field.FieldName, validation)
+    elif field_type == "mcq":
+        validate = _mcq_validator(field.Options)
+    elif field_type == "msq":
+        validate = _msq_validator(field.Options)
+    elif field_type == "document":
+        validate = _document_validator(validation)
+    else:
+        validate = _unknown_validator(field_type)
+
+    return CompiledField(
+        Id=field.Id,
+        RoleId=field.RoleId,
+        FieldName=field.FieldName,
+        FieldType=field_type,
+        IsRequired=field.IsRequired,
+        FilledByRoleId=field.FilledByRoleId,
+        EditableByRoleId=field.EditableByRoleId,
+        Options=field.Options,
+        Validation=field.Validation,
+        DisplayOrder=field.DisplayOrder,
+        IsActive=field.IsActive,
+        validate=validate
+    )
+
+
+# ---------------- CACHE ----------------
+class FieldSchemaCache:
+    """
+    Compiled active-field schema per role.
+
+    RequiredFieldsForUsersDAL loads and compiles a role's active fields on
+    first use; RequiredFieldsForUsersBAL invalidates the role after every
+    committed change to its fields. Each role has a version that is bumped
+    on invalidation, so a load that was already running when the fields
+    changed is not cached. Entries older than FIELD_SCHEMA_REFRESH_SECONDS
+    are reloaded, which picks up changes made by other worker processes.
+    """
+
+    def __init__(self):
+        self._schemas: Dict[int, Tuple[float, RoleFieldSchema]] = {}
+        self._versions: Dict[int, int] = {}
+
+    def version(self, role_id: int) -> int:
+        return self._versions.get(role_id, 0)
+
+    def get(self, role_id: int, max_age_seconds: float) -> Optional[RoleFieldSchema]:
+        entry = self._schemas.get(role_id)
+        if entry is None:
+            return None
+        loaded_at, schema = entry
+        if schema.version != self.version(role_id) or time.monotonic() - loaded_at >= max_age_seconds:
+            return None
+        return schema
+
+    def build(self, role_id: int, version: int, fields: Iterable) -> RoleFieldSchema:
+        """
+        Compile `fields` (already in display order) into a schema. It is only
+        cached if the role was not invalidated since `version` was read.
+        """
+        compiled = tuple(compile_field(field) for field in fields)
+        schema = RoleFieldSchema(
+            role_id=role_id,
+            version=version,
+            fields=compiled,
+            by_id={field.Id: field for field in compiled}
+        )
+        if version == self.version(role_id):
+            self._schemas[role_id] = (time.monotonic(), schema)
+        return schema
+
+    def invalidate(self, role_id: int) -> None:
+        self._versions[role_id] = self.version(role_id) + 1
+        self._schemas.pop(role_id, None)
+
+    def clear(self) -> None:
+        for role_id in list(self._schemas):
+            self.invalidate(role_id)
+
+    def stats(self) -> dict:
+        return {
+            "roles": len(self._schemas),
+            "fields": sum(len(schema.fields) for _, schema in self._schemas.values()),
+        }
+
+
+field_schema_cache = FieldSchemaCache()
@@ -7,6 +7,8 @@ from fastapi import HTTPException
 from passlib.context import CryptContext
 from backend.config import settings
 import secrets
+import base64
+import json
 import re
 import string
 
@@ -33,15 +35,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
     return encoded_jwt
 
-def verify_token(token: str) -> str:
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """All claims of a valid access token; `sub` is always present."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid authentication token")
-        return user_id
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication token")
+    if payload.get("sub") is None:
+        raise HTTPException(status_code=401, detail="Invalid authentication token")
+    return payload
+
+def verify_token(token: str) -> str:
+    return decode_access_token(token)["sub"]
 
 def validate_password_format(Password: str):
     if not re.search(r'[A-Z]', Password):
@@ -63,3 +68,19 @@ allowed_validators_per_type_serializable = {
     "date": {"min_date": "date", "max_date": "date"},
     "document": {"allowed_extensions": "list[str]", "max_size_mb": "number"}
 }
+
+
+def encode_cursor(created_at: datetime, row_id: Any) -> str:
+    """Opaque keyset cursor for the row a page ended on."""
+    raw = json.dumps([created_at.isoformat(), str(row_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Inverse of encode_cursor: (created_at, id as string). Raises 400 on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), row_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,94 @@
+import re
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+from PIL import Image, ImageOps
+from backend.config import settings
+from backend.Utils.workers import BoundedProcessPool, PoolSaturatedError, pool_saturated_http_error
+
+# Square bounding boxes (px) rendered for every profile picture. The largest
+# one is what Users.ProfilePicture points at.
+PROFILE_PICTURE_SIZES = (64, 128, 512)
+ALLOWED_IMAGE_FORMATS = ("jpeg", "png", "gif", "webp")
+
+image_pool = BoundedProcessPool(
+    "image_processing",
+    max_workers=settings.IMAGE_PROCESS_WORKERS,
+    max_queue=settings.IMAGE_PROCESS_MAX_QUEUE
+)
+
+_VARIANT_URL = re.compile(
+    r"^/media/(?P<guid>[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})"
+    rf"_{max(PROFILE_PICTURE_SIZES)}(?P<ext>\.[a-z]+)$"
+)
+
+
+class InvalidImageError(ValueError):
+    """The uploaded bytes are not a decodable image in an allowed format."""
+
+
+def _encode(image: Image.Image, image_format: str) -> bytes:
+    buffer = BytesIO()
+    if image_format == "jpeg":
+        image.convert("RGB").save(buffer, format="JPEG", quality=85, optimize=True, progressive=True)
+    elif image_format == "webp":
+        image.save(buffer, format="WEBP", quality=80, method=4)
+    else:
+        image.save(buffer, format=image_format.upper(), optimize=True)
+    return buffer.getvalue()
+
+
+# Executed inside the worker processes; must stay module-level so it can be pickled.
+def _render_variants(data: bytes, sizes: Tuple[int, ...]) -> Tuple[str, Dict[str, bytes]]:
+    """
+    Decode `data` once and encode every size in the original format and as
+    WebP. Returns the original file extension and {"<size><ext>": bytes}.
+    """
+    try:
+        with Image.open(BytesIO(data)) as image:
+            image_format = (image.format or "").lower()
+            if image_format not in ALLOWED_IMAGE_FORMATS:
+                raise InvalidImageError(f"Unsupported image format '{image_format}'")
+            # JPEG can decode straight at a reduced scale, skipping most of the work for large photos
+            image.draft("RGB", (max(sizes), max(sizes)))
+            image.load()
+            image = ImageOps.exif_transpose(image)
+    except InvalidImageError:
+        raise
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        raise InvalidImageError(str(e))
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+
+    ext = ".jpg" if image_format == "jpeg" else f".{image_format}"
+    files = {}
+    for size in sorted(sizes, reverse=True):
+        # Downscale from the previous (larger) variant rather than the full image
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        files[f"{size}{ext}"] = _encode(image, image_format)
+        files[f"{size}.webp"] = _encode(image, "webp")
+    return ext, files
+
+
+async def render_profile_picture(data: bytes) -> Tuple[str, Dict[str, bytes]]:
+    """Validate and render all profile picture variants in the image pool."""
+    try:
+        return await image_pool.run(_render_variants, data, PROFILE_PICTURE_SIZES)
+    except PoolSaturatedError:
+        raise pool_saturated_http_error()
+
+
+def profile_picture_variants(profile_picture: Optional[str]) -> Optional[dict]:
+    """
+    URLs of every rendered size for a stored ProfilePicture URL:
+    {"sizes": {"64": ..., "128": ..., "512": ...}, "webp": {...}}.
+    Pictures uploaded before variants existed have none (None).
+    """
+    match = _VARIANT_URL.match(profile_picture or "")
+    if not match:
+        return None
+    guid, ext = match.group("guid"), match.group("ext")
+    return {
+        "sizes": {str(size): f"/media/{guid}_{size}{ext}" for size in PROFILE_PICTURE_SIZES},
+        "webp": {str(size): f"/media/{guid}_{size}.webp" for size in PROFILE_PICTURE_SIZES},
+    }
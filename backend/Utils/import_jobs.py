@@ -0,0 +1,141 @@
+import asyncio
+import contextvars
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional, Set
+from backend.config import settings
+
+
+@dataclass
+class ImportJob:
+    """Progress and outcome of one background user import."""
+    id: str
+    role_id: int
+    actor_id: str
+    total: int  # valid rows queued for creation
+    processed: int = 0
+    status: str = "queued"  # queued | running | done | failed
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result: Optional[dict] = None
+
+    def to_dict(self, include_result: bool = True) -> dict:
+        data = {
+            "job_id": self.id,
+            "role_id": self.role_id,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+class ImportJobRegistry:
+    """
+    In-process registry of background user imports.
+
+    A job runs in a fresh context, so it never sees the request session or
+    query budget of the request that submitted it, and at most
+    `max_concurrent` jobs run at once; the rest wait as "queued". Finished
+    jobs are kept for `retention_seconds` so their report can be fetched,
+    and never more than `max_jobs` overall (see `is_full`). The registry is per process:
+    the status endpoint must be served by the worker that took the upload.
+    """
+
+    def __init__(self, max_concurrent: int, retention_seconds: float, max_jobs: int):
+        self.max_concurrent = max(1, max_concurrent)
+        self.retention_seconds = retention_seconds
+        self.max_jobs = max(1, max_jobs)
+        self._jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+
+    def is_full(self) -> bool:
+        """True when `max_jobs` imports are queued or running; new ones should be refused."""
+        self._prune()
+        return len(self._jobs) >= self.max_jobs
+
+    def create(self, role_id: int, actor_id: str, total: int) -> ImportJob:
+        self._prune()
+        job = ImportJob(id=uuid.uuid4().hex, role_id=role_id, actor_id=str(actor_id), total=total)
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        return self._jobs.get(job_id)
+
+    def submit(self, job: ImportJob, run: Callable[[ImportJob], Awaitable[dict]]) -> None:
+        """Run `run(job)` in the background; its return value becomes the job's result."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        task = asyncio.create_task(self._run(job, run), name=f"user-import-{job.id}", context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self.submitted += 1
+
+    async def _run(self, job: ImportJob, run: Callable[[ImportJob], Awaitable[dict]]) -> None:
+        try:
+            async with self._semaphore:
+                job.status = "running"
+                job.result = await run(job)
+            job.status = "done"
+            self.completed += 1
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "Import was interrupted by a server shutdown"
+            self.failed += 1
+            raise
+        except Exception as e:
+            print(f"User import {job.id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+            self.failed += 1
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention_seconds
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and job.finished_at < cutoff:
+                del self._jobs[job_id]
+        # Over the cap: drop the oldest finished jobs first
+        for job_id, job in list(self._jobs.items()):
+            if len(self._jobs) < self.max_jobs:
+                break
+            if job.finished_at is not None:
+                del self._jobs[job_id]
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "jobs": len(self._jobs),
+            "running": sum(1 for job in self._jobs.values() if job.status == "running"),
+            "queued": sum(1 for job in self._jobs.values() if job.status == "queued"),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+import_jobs = ImportJobRegistry(
+    max_concurrent=settings.USER_IMPORT_CONCURRENT_JOBS,
+    retention_seconds=settings.USER_IMPORT_JOB_RETENTION_SECONDS,
+    max_jobs=settings.USER_IMPORT_MAX_JOBS
+)
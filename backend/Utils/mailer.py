@@ -1,37 +1,152 @@
-from azure.communication.email import EmailClient
 import asyncio
-from backend.config import settings 
+import os
+import smtplib
+import uuid
+from abc import ABC, abstractmethod
+from email.message import EmailMessage
+from backend.config import settings
 
-client = EmailClient.from_connection_string(settings.AZURE_COMMUNICATION_CONNECTION_STRING)
-sender_address = settings.AZURE_COMMUNICATION_SENDER
 
-async def send_email_async(to_address: str, subject: str, plain_text: str, html_content: str = None):
-    content = {
-        "subject": subject,
-        "plainText": plain_text,
-    }
-    if html_content:
-        content["html"] = html_content
+class EmailTransport(ABC):
+    """Delivers one email and returns the provider's message id."""
 
-    message = {
-        "senderAddress": sender_address,
-        "recipients": {
-            "to": [{"address": to_address}]
-        },
-        "content": content,
-    }
+    @abstractmethod
+    async def send(self, to_address: str, subject: str, plain_text: str, html_content: str = None) -> str:
+        ...
+
+
+class AzureEmailTransport(EmailTransport):
+    def __init__(self, connection_string: str, sender_address: str, timeout: float = 60.0):
+        self.connection_string = connection_string
+        self.sender_address = sender_address
+        self.timeout = timeout
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            from azure.communication.email import EmailClient
+            self._client = EmailClient.from_connection_string(self.connection_string)
+        return self._client
+
+    async def send(self, to_address: str, subject: str, plain_text: str, html_content: str = None) -> str:
+        content = {
+            "subject": subject,
+            "plainText": plain_text,
+        }
+        if html_content:
+            content["html"] = html_content
+
+        message = {
+            "senderAddress": self.sender_address,
+            "recipients": {
+                "to": [{"address": to_address}]
+            },
+            "content": content,
+        }
 
-    try:
         def send():
-            poller = client.begin_send(message)
-            result = poller.result()
+            poller = self._get_client().begin_send(message)
+            # Bound the polling thread too; the caller's wait_for cannot stop it.
+            result = poller.result(timeout=self.timeout)
+            if not poller.done():
+                raise TimeoutError(f"Azure send still running after {self.timeout:g}s")
             return result.get("messageId") or "no-message-Id"
 
-        message_id = await asyncio.to_thread(send)
-        print(message_id)
+        return await asyncio.to_thread(send)
+
+
+def _build_message(sender: str, to_address: str, subject: str, plain_text: str, html_content: str = None) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = to_address
+    message["Subject"] = subject
+    message["Message-ID"] = f"<{uuid.uuid4()}@etree>"
+    message.set_content(plain_text or "")
+    if html_content:
+        message.add_alternative(html_content, subtype="html")
+    return message
+
+
+class SmtpEmailTransport(EmailTransport):
+    def __init__(self, host: str, port: int, sender_address: str,
+                 username: str = "", password: str = "", use_tls: bool = False, timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.sender_address = sender_address
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+
+    async def send(self, to_address: str, subject: str, plain_text: str, html_content: str = None) -> str:
+        message = _build_message(self.sender_address, to_address, subject, plain_text, html_content)
+
+        def send():
+            with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+                if self.use_tls:
+                    smtp.starttls()
+                if self.username:
+                    smtp.login(self.username, self.password)
+                smtp.send_message(message)
+            return message["Message-ID"]
+
+        return await asyncio.to_thread(send)
+
+
+class FileEmailTransport(EmailTransport):
+    """Writes every email as an .eml file; for local development and offline load tests."""
+
+    def __init__(self, directory: str, sender_address: str):
+        self.directory = directory
+        self.sender_address = sender_address
+
+    async def send(self, to_address: str, subject: str, plain_text: str, html_content: str = None) -> str:
+        message = _build_message(self.sender_address, to_address, subject, plain_text, html_content)
+        message_id = str(uuid.uuid4())
+        path = os.path.join(self.directory, f"{message_id}.eml")
+
+        def write():
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(message.as_bytes())
+
+        await asyncio.to_thread(write)
+        return message_id
+
+
+def create_transport() -> EmailTransport:
+    sender = settings.AZURE_COMMUNICATION_SENDER or "noreply@localhost"
+    transport = settings.EMAIL_TRANSPORT.lower()
+    if transport == "azure":
+        return AzureEmailTransport(
+            settings.AZURE_COMMUNICATION_CONNECTION_STRING,
+            sender,
+            timeout=settings.EMAIL_SEND_TIMEOUT_SECONDS
+        )
+    if transport == "smtp":
+        return SmtpEmailTransport(
+            settings.SMTP_HOST,
+            settings.SMTP_PORT,
+            sender,
+            username=settings.SMTP_USERNAME,
+            password=settings.SMTP_PASSWORD,
+            use_tls=settings.SMTP_USE_TLS,
+            timeout=settings.EMAIL_SEND_TIMEOUT_SECONDS
+        )
+    if transport == "file":
+        return FileEmailTransport(settings.EMAIL_FILE_SINK_DIR, sender)
+    raise ValueError(f"Unknown EMAIL_TRANSPORT '{settings.EMAIL_TRANSPORT}'. Use 'azure', 'smtp' or 'file'")
+
+
+transport = create_transport()
+
+
+async def send_email_async(to_address: str, subject: str, plain_text: str, html_content: str = None):
+    """Send immediately, bypassing the outbox. Prefer EmailOutboxBAL.queue_email in request handlers."""
+    try:
+        message_id = await transport.send(to_address, subject, plain_text, html_content)
         return {"message": "Email sent", "message_id": message_id}
 
     except Exception as ex:
         print(ex)
         return {"error": str(ex)}
-
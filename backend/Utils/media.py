@@ -1,9 +1,14 @@
+import glob
 import os
 import uuid
+import hashlib
 import mimetypes
 import aiofiles
 import asyncio
-from typing import Tuple
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Tuple
+from starlette.requests import Request
+from starlette.responses import Response, FileResponse
 
 async def save_media(data: bytes, mime_type: str = None) -> str:
     try:
@@ -52,6 +57,64 @@ async def del_media(media_id: str) -> bool:
         return False
 
 
+def _get_media_dir() -> str:
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, 'Media')
+
+
+async def save_media_variants(files: Dict[str, bytes]) -> str:
+    """
+    Write a group of files that belong together (e.g. resized variants of one
+    image) as Media/<guid>_<suffix>, where `files` maps suffix -> bytes.
+    Returns the shared guid; nothing is left behind if any write fails.
+    """
+    media_dir = _get_media_dir()
+    await asyncio.to_thread(os.makedirs, media_dir, exist_ok=True)
+    file_guid = str(uuid.uuid4())
+
+    async def write(suffix: str, data: bytes) -> None:
+        async with aiofiles.open(os.path.join(media_dir, f"{file_guid}_{suffix}"), 'wb') as f:
+            await f.write(data)
+
+    try:
+        await asyncio.gather(*(write(suffix, data) for suffix, data in files.items()))
+    except Exception as e:
+        await del_media_group(file_guid)
+        raise RuntimeError(f"Failed to save media: {e}")
+    return file_guid
+
+
+async def del_media_group(media_id: str) -> int:
+    """
+    Delete every file of the group `media_id` belongs to: "<guid>", any
+    "<guid>_<suffix>" and the single "<guid><ext>" files written by
+    save_media. Only guid-named files are ever matched, so shared files such
+    as default.png are never touched. Returns the number of files removed.
+    """
+    name = os.path.basename(media_id or "")
+    file_guid = name[:36]
+    try:
+        uuid.UUID(file_guid)
+    except ValueError:
+        return 0
+
+    def remove_group() -> int:
+        removed = 0
+        for path in glob.glob(os.path.join(_get_media_dir(), glob.escape(file_guid) + "*")):
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    try:
+        return await asyncio.to_thread(remove_group)
+    except Exception as e:
+        print(f"Failed to delete media {media_id}: {e}")
+        return 0
+
+
 def _get_protected_dir() -> str:
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     protected_dir = os.path.join(base_dir, "Protected_Media")
@@ -85,6 +148,71 @@ async def save_protected_file(data: bytes, mime_type: str | None = None) -> Tupl
     except Exception as e:
         raise RuntimeError(f"Failed to save protected file: {e}")
 
+async def new_protected_temp_path() -> str:
+    """
+    Path for an in-progress upload. It lives inside Protected_Media so the
+    final rename in place_protected_blob stays on one filesystem (atomic).
+    """
+    await _ensure_protected_dir_exists()
+    return os.path.join(_get_protected_dir(), f".upload-{uuid.uuid4()}.part")
+
+def is_sha256_digest(digest: str) -> bool:
+    return isinstance(digest, str) and len(digest) == 64 and all(c in "0123456789abcdef" for c in digest)
+
+def protected_blob_path(digest: str) -> str:
+    """Content-addressed location of a protected file: Protected_Media/blobs/<ab>/<sha256>."""
+    if not is_sha256_digest(digest):
+        raise ValueError(f"Invalid content digest '{digest}'")
+    return os.path.join(_get_protected_dir(), "blobs", digest[:2], digest)
+
+async def place_protected_blob(temp_path: str, digest: str) -> bool:
+    """
+    Move a finished upload into the content-addressed store.
+    Returns True if the blob was written, False if identical content was
+    already stored (the temp file is then simply discarded).
+    """
+    blob_path = protected_blob_path(digest)
+
+    def place() -> bool:
+        if os.path.exists(blob_path):
+            os.remove(temp_path)
+            return False
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        os.replace(temp_path, blob_path)
+        return True
+
+    return await asyncio.to_thread(place)
+
+async def remove_protected_blob(digest: str) -> bool:
+    try:
+        await asyncio.to_thread(os.remove, protected_blob_path(digest))
+        return True
+    except FileNotFoundError:
+        return False
+
+async def resolve_protected_file(file_info: dict) -> str:
+    """
+    Path on disk for a document record ({"name", "sha256", ...}).
+    Records written before the content-addressed store (no digest, or not
+    yet migrated) are looked up by their stored name.
+    Raises FileNotFoundError if neither exists.
+    """
+    digest = file_info.get("sha256")
+    if is_sha256_digest(digest):
+        blob_path = protected_blob_path(digest)
+        if await asyncio.to_thread(os.path.isfile, blob_path):
+            return blob_path
+    path = _protected_path(file_info.get("name"))
+    if not await asyncio.to_thread(os.path.isfile, path):
+        raise FileNotFoundError(f"Protected file '{file_info.get('name')}' not found")
+    return path
+
+async def discard_protected_temp(temp_path: str) -> None:
+    try:
+        await asyncio.to_thread(os.remove, temp_path)
+    except FileNotFoundError:
+        pass
+
 async def del_protected_file(stored_filename: str) -> bool:
     
     try:
@@ -109,4 +237,54 @@ async def read_protected_file(stored_filename: str) -> bytes:
     if not await asyncio.to_thread(os.path.exists, path):
         raise FileNotFoundError(f"Protected file '{stored_filename}' not found")
     async with aiofiles.open(path, "rb") as f:
-        return await f.read()
\ No newline at end of file
+        return await f.read()
+
+def _protected_path(stored_filename: str) -> str:
+    # Stored names are generated by us; refuse anything that could escape the directory.
+    if not stored_filename or os.path.basename(stored_filename) != stored_filename or stored_filename.startswith("."):
+        raise FileNotFoundError(f"Protected file '{stored_filename}' not found")
+    return os.path.join(_get_protected_dir(), stored_filename)
+
+def _is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+async def protected_file_response(request: Request, path: str, filename: str, sha256: str | None = None) -> Response:
+    """
+    Serve a protected file from disk in chunks (FileResponse), with HTTP Range
+    / 206 support, an ETag (the content digest when known) and Last-Modified,
+    answering matching conditional requests with 304.
+    """
+    stat_result = await asyncio.to_thread(os.stat, path)
+
+    if sha256:
+        etag = f'"{sha256}"'
+    else:
+        etag_base = f"{stat_result.st_mtime}-{stat_result.st_size}"
+        etag = f'"{hashlib.md5(etag_base.encode(), usedforsecurity=False).hexdigest()}"'
+
+    headers = {
+        "etag": etag,
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "cache-control": "private, no-cache",
+    }
+    if _is_not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(
+        path,
+        headers=headers,
+        media_type=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+        filename=filename,
+        stat_result=stat_result
+    )
@@ -0,0 +1,242 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters and histograms are updated as requests and queries happen;
+collectors registered with `registry.register_collector` are called at
+scrape time to report gauges read from the pools, caches and workers.
+Everything runs on the event loop thread, so no locking is needed.
+"""
+import math
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+Labels = Dict[str, str]
+# (metric name, type, help, [(labels, value), ...]); histograms pass
+# (labels, (bucket bounds, per-bucket counts incl. +Inf, sum)) as the value
+Family = Tuple[str, str, str, List[Tuple[Labels, object]]]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value) -> str:
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(int(value)) if value.is_integer() else repr(value)
+
+
+def _histogram_lines(name: str, labels: Labels, buckets: Sequence[float], counts: Sequence[int], total: float) -> List[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(list(buckets) + [math.inf], counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values, amount: float = 1.0) -> None:
+        self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def family(self) -> Family:
+        return self.name, "counter", self.help, [
+            (dict(zip(self.label_names, key)), value) for key, value in self._values.items()
+        ]
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._values: Dict[Tuple[str, ...], list] = {}  # key -> [per-bucket counts, sum]
+
+    def observe(self, value: float, *label_values) -> None:
+        state = self._values.get(label_values)
+        if state is None:
+            state = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def family(self) -> Family:
+        return self.name, "histogram", self.help, [
+            (dict(zip(self.label_names, key)), (self.buckets, counts, total))
+            for key, (counts, total) in self._values.items()
+        ]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """`collector()` is called on every scrape and returns metric families."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        families = [metric.family() for metric in self._metrics]
+        for collector in self._collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                print(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+
+        lines = []
+        for name, metric_type, help_text, samples in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                if metric_type == "histogram":
+                    lines.extend(_histogram_lines(name, labels, *value))
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status code.", ("method", "route", "status"))
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency, including streaming the body.", ("method", "route"))
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request.", ("method", "route"), QUERY_COUNT_BUCKETS)
+http_request_db_duration = registry.histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per HTTP request.", ("method", "route"))
+db_queries_total = registry.counter("db_queries_total", "SQL statements executed, in or outside requests.")
+db_query_duration = registry.histogram("db_query_duration_seconds", "Latency of single SQL statements.")
+
+_in_progress = 0
+
+
+# ---------------- PER-REQUEST DB STATS ----------------
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    """DB work of the HTTP request being handled, if any."""
+    return _request_stats.get()
+
+
+def instrument_engine(engine) -> None:
+    """Count and time every SQL statement run through `engine` (an AsyncEngine)."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        db_queries_total.inc()
+        db_query_duration.observe(elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+
+# ---------------- HTTP MIDDLEWARE ----------------
+def _route_label(scope) -> str:
+    # Templates ("/api/user/me/fields/{field_id}") keep label cardinality bounded
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    if "app_root_path" in scope:  # served by a mounted app (static files)
+        return f"{scope.get('root_path', '')}/*"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status and DB work per route. Plain
+    ASGI rather than BaseHTTPMiddleware, so streamed bodies pass through
+    untouched and are included in the measured time.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        global _in_progress
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        _in_progress += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _in_progress -= 1
+            _request_stats.reset(token)
+            method, route = scope["method"], _route_label(scope)
+            http_requests_total.inc(method, route, str(status_code))
+            http_request_duration.observe(time.perf_counter() - started, method, route)
+            http_request_db_queries.observe(stats.queries, method, route)
+            http_request_db_duration.observe(stats.db_seconds, method, route)
+
+
+def _http_in_progress() -> Iterable[Family]:
+    yield "http_requests_in_progress", "gauge", "HTTP requests being handled.", [({}, _in_progress)]
+
+
+registry.register_collector(_http_in_progress)
+
+
+def render_metrics() -> str:
+    return registry.render()
@@ -0,0 +1,135 @@
+"""
+One-off migration of protected documents into the content-addressed store.
+
+Every document record in UsersFieldData that still points at a legacy
+Protected_Media/<uuid><ext> file is hashed, moved to
+Protected_Media/blobs/<ab>/<sha256>, counted in ProtectedFiles and rewritten
+to {"name": "<sha256><ext>", "size_mb", "sha256", "ref"}. Identical files collapse
+into one blob. Records are migrated one transaction at a time and already
+migrated records are skipped, so the script can be re-run after a failure.
+
+    python -m backend.Utils.migrate_protected_media --dry-run
+    python -m backend.Utils.migrate_protected_media [--delete-orphans]
+"""
+import argparse
+import asyncio
+import hashlib
+import mimetypes
+import os
+import shutil
+from backend.BusinessAccessLayer.ProtectedFiles import ProtectedFilesBAL
+from backend.DatabaseAccessLayer.UsersFieldData import UsersFieldDataDAL
+from backend.Utils.media import (
+    _get_protected_dir, _protected_path, new_protected_temp_path, discard_protected_temp,
+    del_protected_file, place_protected_blob, remove_protected_blob, protected_blob_path, is_sha256_digest
+)
+from backend.db import unit_of_work, engine
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def _hash_file(path: str) -> tuple:
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _is_migrated(file_info: dict) -> bool:
+    digest = file_info.get("sha256")
+    return (
+        is_sha256_digest(digest)
+        and file_info["name"].startswith(digest)
+        and os.path.isfile(protected_blob_path(digest))
+    )
+
+
+async def migrate(dry_run: bool = False, delete_orphans: bool = False) -> dict:
+    files_bal = ProtectedFilesBAL()
+    field_data_dal = UsersFieldDataDAL()
+    report = {"migrated": 0, "deduplicated": 0, "skipped": 0, "missing": 0, "failed": 0, "orphans": 0}
+    referenced = set()
+
+    for record in await field_data_dal.get_all_by_field_type("document"):
+        file_info = files_bal.document_info(record.Value)
+        if not file_info:
+            continue
+        referenced.add(file_info["name"])
+
+        if await asyncio.to_thread(_is_migrated, file_info):
+            report["skipped"] += 1
+            continue
+
+        try:
+            legacy_path = _protected_path(file_info["name"])
+        except FileNotFoundError:
+            legacy_path = None
+        if not legacy_path or not await asyncio.to_thread(os.path.isfile, legacy_path):
+            print(f"Record {record.Id}: file '{file_info['name']}' is missing, left unchanged")
+            report["missing"] += 1
+            continue
+
+        digest, size_bytes = await asyncio.to_thread(_hash_file, legacy_path)
+        ext = os.path.splitext(file_info["name"])[1].lower()
+        new_info = {**file_info, **files_bal.document_record(digest, size_bytes, ext)}
+        if dry_run:
+            print(f"Record {record.Id}: {file_info['name']} -> {new_info['name']}")
+            report["migrated"] += 1
+            continue
+
+        # Copy rather than move, so the record stays readable until the
+        # transaction that repoints it has committed.
+        temp_path = await new_protected_temp_path()
+        await asyncio.to_thread(shutil.copyfile, legacy_path, temp_path)
+        created = False
+        try:
+            async with unit_of_work():
+                await files_bal.dal.acquire(digest, size_bytes, mimetypes.guess_type(file_info["name"])[0])
+                created = await place_protected_blob(temp_path, digest)
+                record.Value = {"data": new_info}
+                await field_data_dal.update(record)
+        except Exception as e:
+            await discard_protected_temp(temp_path)
+            if created:
+                await remove_protected_blob(digest)
+            print(f"Record {record.Id}: migration failed: {e}")
+            report["failed"] += 1
+            continue
+
+        await del_protected_file(file_info["name"])
+        referenced.add(new_info["name"])
+        report["migrated" if created else "deduplicated"] += 1
+
+    # Legacy files no record points at, e.g. left behind by an interrupted run
+    protected_dir = _get_protected_dir()
+    if await asyncio.to_thread(os.path.isdir, protected_dir):
+        for entry in await asyncio.to_thread(os.listdir, protected_dir):
+            path = os.path.join(protected_dir, entry)
+            if entry.startswith(".") or entry in referenced or not os.path.isfile(path):
+                continue
+            report["orphans"] += 1
+            if delete_orphans and not dry_run:
+                await del_protected_file(entry)
+            else:
+                print(f"Unreferenced legacy file: {entry}")
+
+    return report
+
+
+async def main(dry_run: bool, delete_orphans: bool) -> None:
+    try:
+        report = await migrate(dry_run=dry_run, delete_orphans=delete_orphans)
+        print(("Dry run: " if dry_run else "") + ", ".join(f"{k}={v}" for k, v in report.items()))
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move protected documents into the content-addressed store")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without touching anything")
+    parser.add_argument("--delete-orphans", action="store_true", help="delete legacy files no record references")
+    args = parser.parse_args()
+    asyncio.run(main(args.dry_run, args.delete_orphans))
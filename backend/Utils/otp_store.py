@@ -0,0 +1,182 @@
+"""
+Where one-time passwords live, selected by OTP_BACKEND.
+
+"database" (default) keeps them in the Otps table: issuing joins the
+request transaction, consuming is a single atomic UPDATE ... RETURNING,
+and a background job deletes expired rows in bounded batches. "memory"
+keeps them in this process only, for single-node deployments; codes are
+lost on restart and not shared between worker processes.
+"""
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+from uuid import UUID
+from backend.DatabaseAccessLayer.Otps import OtpsDAL
+from backend.config import settings
+from backend.db import after_commit, after_rollback
+
+
+class OtpStore(ABC):
+    @abstractmethod
+    async def issue(self, user_id: UUID, code: str, expires_in_minutes: int) -> None:
+        ...
+
+    @abstractmethod
+    async def consume(self, user_id: UUID, code: str) -> bool:
+        """Spend a valid code; True at most once per issued code."""
+        ...
+
+    @abstractmethod
+    async def purge_expired(self, limit: int) -> int:
+        """Remove up to `limit` expired codes; returns how many were removed."""
+        ...
+
+
+class DatabaseOtpStore(OtpStore):
+    def __init__(self):
+        self.dal = OtpsDAL()
+
+    async def issue(self, user_id: UUID, code: str, expires_in_minutes: int) -> None:
+        await self.dal.create_otp(user_id, code, expires_in_minutes)
+
+    async def consume(self, user_id: UUID, code: str) -> bool:
+        return await self.dal.consume_otp(user_id, code)
+
+    async def purge_expired(self, limit: int) -> int:
+        return await self.dal.purge_expired(limit)
+
+
+class MemoryOtpStore(OtpStore):
+    """
+    Codes per user with a monotonic-clock expiry. Everything runs on the
+    event loop thread and consume does not await between the check and the
+    removal, so a code is spent at most once. As with the database store, a
+    code spent by a request that then rolls back is restored.
+    """
+
+    def __init__(self):
+        self._codes: Dict[UUID, Dict[str, float]] = {}
+
+    async def issue(self, user_id: UUID, code: str, expires_in_minutes: int) -> None:
+        expires_at = time.monotonic() + expires_in_minutes * 60
+
+        def store():
+            self._codes.setdefault(user_id, {})[code] = expires_at
+
+        # Only once the request that generated (and emailed) the code commits
+        after_commit(store)
+
+    async def consume(self, user_id: UUID, code: str) -> bool:
+        codes = self._codes.get(user_id)
+        if not codes:
+            return False
+        expires_at = codes.pop(code, None)
+        if not codes:
+            self._codes.pop(user_id, None)
+        if expires_at is None or expires_at < time.monotonic():
+            return False
+
+        def restore():
+            self._codes.setdefault(user_id, {})[code] = expires_at
+
+        after_rollback(restore)
+        return True
+
+    async def purge_expired(self, limit: int) -> int:
+        now = time.monotonic()
+        removed = 0
+        for user_id in list(self._codes):
+            codes = self._codes[user_id]
+            for code in [c for c, expires_at in codes.items() if expires_at < now]:
+                del codes[code]
+                removed += 1
+            if not codes:
+                del self._codes[user_id]
+            if removed >= limit:
+                break
+        return removed
+
+    def __len__(self) -> int:
+        return sum(len(codes) for codes in self._codes.values())
+
+
+def create_otp_store() -> OtpStore:
+    """Build the store selected by OTP_BACKEND."""
+    backend = settings.OTP_BACKEND.lower()
+    if backend == "database":
+        return DatabaseOtpStore()
+    if backend == "memory":
+        return MemoryOtpStore()
+    raise ValueError(f"Unknown OTP_BACKEND '{settings.OTP_BACKEND}'. Use 'database' or 'memory'")
+
+
+otp_store = create_otp_store()
+
+
+class OtpPurgeJob:
+    """
+    Periodically deletes expired OTPs. Each run removes batches of up to
+    batch_size codes, one transaction per batch, until a batch comes back
+    short; then it sleeps for interval_seconds.
+    """
+
+    def __init__(self, store: OtpStore, interval_seconds: float, batch_size: int):
+        self.store = store
+        self.interval_seconds = interval_seconds
+        self.batch_size = max(1, batch_size)
+        self._task: Optional[asyncio.Task] = None
+
+        self.runs = 0
+        self.purged = 0
+        self.last_error: Optional[str] = None
+
+    def start(self) -> None:
+        if self._task is not None or self.interval_seconds <= 0:
+            return
+        self._task = asyncio.create_task(self._run(), name="otp-purge")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def purge(self) -> int:
+        removed = 0
+        while True:
+            batch = await self.store.purge_expired(self.batch_size)
+            removed += batch
+            if batch < self.batch_size:
+                break
+        self.runs += 1
+        self.purged += removed
+        return removed
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.purge()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"OTP purge failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "backend": settings.OTP_BACKEND.lower(),
+            "running": self._task is not None,
+            "runs": self.runs,
+            "purged": self.purged,
+            "last_error": self.last_error,
+        }
+
+
+otp_purge_job = OtpPurgeJob(
+    otp_store,
+    interval_seconds=settings.OTP_PURGE_INTERVAL_SECONDS,
+    batch_size=settings.OTP_PURGE_BATCH_SIZE
+)
@@ -0,0 +1,72 @@
+import asyncio
+from typing import List
+from backend.config import settings
+from backend.Utils.helpers import pwd_context
+from backend.Utils.workers import BoundedProcessPool, PoolSaturatedError, pool_saturated_http_error
+
+password_pool = BoundedProcessPool(
+    "password_hashing",
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
+
+# Bulk imports hash in their own processes so a large import never queues
+# ahead of interactive logins in password_pool.
+bulk_password_pool = BoundedProcessPool(
+    "bulk_password_hashing",
+    max_workers=settings.BULK_PASSWORD_HASH_WORKERS,
+    max_queue=settings.BULK_PASSWORD_HASH_WORKERS
+)
+
+
+# Executed inside the worker processes; must stay module-level so they can be pickled.
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _hash_many(passwords: List[str]) -> List[str]:
+    return [pwd_context.hash(password) for password in passwords]
+
+
+async def hash_password_async(password: str) -> str:
+    try:
+        return await password_pool.run(_hash, password)
+    except PoolSaturatedError:
+        raise pool_saturated_http_error()
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return await password_pool.run(_verify, plain_password, hashed_password)
+    except PoolSaturatedError:
+        raise pool_saturated_http_error()
+
+
+async def hash_passwords_async(passwords: List[str]) -> List[str]:
+    """
+    Hash many passwords (bulk import) on all bulk pool workers in parallel.
+
+    Work is sent in chunks of PASSWORD_HASH_BATCH_SIZE, at most one chunk per
+    worker in flight, which keeps IPC overhead low without one import
+    claiming the whole queue. A pool saturated by concurrent imports is
+    waited out briefly rather than failing the batch.
+    """
+    size = max(1, settings.PASSWORD_HASH_BATCH_SIZE)
+    chunks = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    slots = asyncio.Semaphore(bulk_password_pool.max_workers)
+
+    async def hash_chunk(chunk: List[str]) -> List[str]:
+        async with slots:
+            for attempt in range(20):
+                try:
+                    return await bulk_password_pool.run(_hash_many, chunk)
+                except PoolSaturatedError:
+                    await asyncio.sleep(min(0.05 * 2 ** attempt, 1.0))
+            raise pool_saturated_http_error()
+
+    hashed = await asyncio.gather(*(hash_chunk(chunk) for chunk in chunks))
+    return [h for chunk in hashed for h in chunk]
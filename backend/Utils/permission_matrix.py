@@ -0,0 +1,122 @@
+import time
+from typing import Dict, Iterable, Tuple
+
+
+class PermissionMatrix:
+    """
+    Compiled, in-memory copy of Permissions / RolePermissions.
+
+    Every permission gets a small integer bit index and every role a bitmask
+    of the permissions it holds, so a {table}.{method} check is two dict
+    lookups and a bitwise AND with no I/O. Keys are lower-cased, matching
+    the case-insensitive ILIKE lookups the DAL used to run.
+
+    The matrix is loaded once by RolePermissionsCombinedDAL and then patched
+    incrementally by the DAL write methods. `invalidate()` forces a reload;
+    `is_fresh()` lets callers also reload periodically so changes made by
+    other worker processes are picked up.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.loaded_at = 0.0
+        self.version = 0
+        self._bit_by_key: Dict[str, int] = {}
+        self._bit_by_permission_id: Dict[int, int] = {}
+        self._role_masks: Dict[int, int] = {}
+
+    @staticmethod
+    def key(table_name: str, method: str) -> str:
+        return f"{table_name.strip().lower()}.{method.strip().lower()}"
+
+    def build(
+        self,
+        permissions: Iterable[Tuple[int, str, str]],
+        grants: Iterable[Tuple[int, int]]
+    ) -> None:
+        """Replace the matrix from (permission_id, table, method) and (role_id, permission_id) rows."""
+        self._bit_by_key = {}
+        self._bit_by_permission_id = {}
+        self._role_masks = {}
+        for permission_id, table_name, method in permissions:
+            self._register(permission_id, table_name, method)
+        for role_id, permission_id in grants:
+            self._set(role_id, permission_id)
+        self.loaded = True
+        self.loaded_at = time.monotonic()
+        self.version += 1
+
+    def invalidate(self) -> None:
+        self.loaded = False
+
+    def is_fresh(self, max_age_seconds: float) -> bool:
+        return self.loaded and time.monotonic() - self.loaded_at < max_age_seconds
+
+    def _register(self, permission_id: int, table_name: str, method: str) -> None:
+        key = self.key(table_name, method)
+        bit = self._bit_by_key.get(key)
+        if bit is None:
+            bit = len(self._bit_by_key)
+            self._bit_by_key[key] = bit
+        self._bit_by_permission_id[permission_id] = bit
+
+    def _set(self, role_id: int, permission_id: int) -> bool:
+        bit = self._bit_by_permission_id.get(permission_id)
+        if bit is None:
+            return False
+        self._role_masks[role_id] = self._role_masks.get(role_id, 0) | (1 << bit)
+        return True
+
+    # ---------------- INCREMENTAL UPDATES ----------------
+    def add_permission(self, permission_id: int, table_name: str, method: str) -> None:
+        if not self.loaded:
+            return
+        self._register(permission_id, table_name, method)
+        self.version += 1
+
+    def grant(self, role_id: int, permission_id: int) -> None:
+        if not self.loaded:
+            return
+        if not self._set(role_id, permission_id):
+            # Permission was created elsewhere; reload rather than guess.
+            self.invalidate()
+            return
+        self.version += 1
+
+    def revoke(self, role_id: int, permission_id: int) -> None:
+        if not self.loaded:
+            return
+        bit = self._bit_by_permission_id.get(permission_id)
+        if bit is None:
+            return
+        self._role_masks[role_id] = self._role_masks.get(role_id, 0) & ~(1 << bit)
+        self.version += 1
+
+    def clear_role(self, role_id: int) -> None:
+        if not self.loaded:
+            return
+        self._role_masks.pop(role_id, None)
+        self.version += 1
+
+    # ---------------- CHECKS ----------------
+    def has(self, role_id: int, table_name: str, method: str) -> bool:
+        bit = self._bit_by_key.get(self.key(table_name, method))
+        if bit is None:
+            return False
+        return bool(self._role_masks.get(role_id, 0) >> bit & 1)
+
+    def role_keys(self, role_id: int) -> frozenset:
+        mask = self._role_masks.get(role_id, 0)
+        return frozenset(key for key, bit in self._bit_by_key.items() if mask >> bit & 1)
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "age_seconds": round(time.monotonic() - self.loaded_at, 1) if self.loaded else None,
+            "version": self.version,
+            "permissions": len(self._bit_by_key),
+            "roles": len(self._role_masks),
+        }
+
+
+permission_matrix = PermissionMatrix()
@@ -0,0 +1,145 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from backend.config import settings
+
+
+@dataclass(frozen=True)
+class RoleSnapshot:
+    Id: int
+    Name: str
+    Description: Optional[str]
+    RegistrationAllowed: bool
+    RegistrationByRoles: Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class PrincipalSnapshot:
+    """
+    Immutable copy of an authenticated user and their role.
+    Exposes the same attribute names as the Users entity so controllers
+    and BALs can keep using user.Id / user.RoleId / user.Role.Name.
+    """
+    Id: object
+    FullName: str
+    Email: str
+    RoleId: int
+    ProfilePicture: Optional[str]
+    IsActive: bool
+    Role: Optional[RoleSnapshot]
+
+    @classmethod
+    def from_user(cls, user) -> "PrincipalSnapshot":
+        role = user.Role
+        return cls(
+            Id=user.Id,
+            FullName=user.FullName,
+            Email=user.Email,
+            RoleId=user.RoleId,
+            ProfilePicture=user.ProfilePicture,
+            IsActive=user.IsActive,
+            Role=RoleSnapshot(
+                Id=role.Id,
+                Name=role.Name,
+                Description=role.Description,
+                RegistrationAllowed=role.RegistrationAllowed,
+                RegistrationByRoles=tuple(role.RegistrationByRoles or ()),
+            ) if role else None,
+        )
+
+
+@dataclass(frozen=True)
+class RoleClaims:
+    Id: int
+    Name: str
+
+
+@dataclass(frozen=True)
+class TokenPrincipal:
+    """
+    Principal taken from the claims of an access token (AUTH_TOKEN_MODE=claims)
+    once its token version has been checked. It only carries what the token
+    does, so profile fields (FullName, Email, ...) need UsersBAL.load_profile.
+    """
+    Id: object
+    RoleId: int
+    Role: RoleClaims
+    IsActive: bool = True
+
+
+class PrincipalCache:
+    """
+    Bounded LRU cache of authenticated principals keyed by user id.
+
+    Entries expire after `ttl_seconds` (never longer than the JWT lifetime)
+    and are evicted explicitly whenever the user or their role is changed
+    through the DAL. The cache is per process; other workers fall back to
+    the TTL for changes they did not make themselves.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, PrincipalSnapshot]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id) -> Optional[PrincipalSnapshot]:
+        key = str(user_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, principal = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return principal
+
+    def put(self, principal: PrincipalSnapshot) -> None:
+        if self.max_entries <= 0:
+            return
+        key = str(principal.Id)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, principal)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate_user(self, user_id) -> None:
+        if self._entries.pop(str(user_id), None) is not None:
+            self.evictions += 1
+
+    def invalidate_role(self, role_id: int) -> None:
+        stale = [key for key, (_, p) in self._entries.items() if p.RoleId == role_id]
+        for key in stale:
+            del self._entries[key]
+        self.evictions += len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=min(settings.PRINCIPAL_CACHE_TTL_SECONDS, settings.JWT_TOKEN_EXPIRE_MINUTES * 60),
+)
@@ -0,0 +1,144 @@
+"""
+Per-request SQL query budget and N+1 detector, for development and tests.
+
+With QUERY_BUDGET_MODE=warn or fail, every statement run while handling a
+request is counted and fingerprinted (literals and bind placeholders
+stripped). A request is flagged when it runs more statements than its
+route's budget (`@query_budget(...)`, else QUERY_BUDGET_DEFAULT) or the
+same statement QUERY_REPEAT_THRESHOLD times or more, which is the usual
+shape of an N+1 loop. "warn" prints a report once the request is done;
+"fail" raises QueryBudgetExceeded from the offending statement so tests
+fail where the regression happens. Responses carry X-Query-Count.
+"""
+import re
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+from sqlalchemy import event
+from backend.config import settings
+
+QUERY_BUDGET_MODES = ("off", "warn", "fail")
+
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|\?|'(?:[^']|'')*'|\b\d+\b")
+_PLACEHOLDER_GROUP = re.compile(r"\(\?(?:, \?)*\)")
+_REPEATED_GROUPS = re.compile(r"\(\?\+\)(?:, \(\?\+\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in "fail" mode when a request exceeds its query budget or repeats a statement."""
+
+
+def query_budget(max_queries: Optional[int] = None, max_repeats: Optional[int] = None):
+    """
+    Declare the most SQL statements a route may run, dependencies included,
+    and optionally how often one statement may repeat (0 = no limit, for
+    routes that deliberately run the same statement per batch).
+    Place it below the router decorator.
+    """
+    def decorator(endpoint):
+        endpoint.__query_budget__ = (max_queries, max_repeats)
+        return endpoint
+    return decorator
+
+
+def fingerprint(statement: str) -> str:
+    """The statement with values, placeholders and IN/VALUES list lengths normalised away."""
+    text = _WHITESPACE.sub(" ", statement).strip()
+    text = _PLACEHOLDER.sub("?", text)
+    text = _PLACEHOLDER_GROUP.sub("(?+)", text)
+    return _REPEATED_GROUPS.sub("(?+)+", text)
+
+
+@dataclass
+class QueryLog:
+    scope: dict
+    queries: int = 0
+    statements: Counter = field(default_factory=Counter)
+
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path", "")
+
+    def limits(self):
+        """(max_queries, max_repeats) for the matched route, with the configured defaults."""
+        route = self.scope.get("route")
+        declared = getattr(getattr(route, "endpoint", None), "__query_budget__", (None, None))
+        max_queries, max_repeats = declared
+        if max_queries is None:
+            max_queries = settings.QUERY_BUDGET_DEFAULT or None
+        if max_repeats is None:
+            max_repeats = settings.QUERY_REPEAT_THRESHOLD
+        return max_queries, max_repeats or None
+
+    def problems(self) -> list:
+        max_queries, max_repeats = self.limits()
+        found = []
+        if max_queries is not None and self.queries > max_queries:
+            found.append(f"ran {self.queries} SQL statements, budget is {max_queries}")
+        if max_repeats is not None:
+            for statement, count in self.statements.items():
+                if count >= max_repeats:
+                    found.append(f"ran the same statement {count} times (possible N+1): {statement[:300]}")
+        return found
+
+
+_query_log: ContextVar[Optional[QueryLog]] = ContextVar("query_log", default=None)
+
+
+def install_query_budget(engine) -> None:
+    """Hook the counting into `engine` (an AsyncEngine) unless QUERY_BUDGET_MODE is off."""
+    mode = settings.QUERY_BUDGET_MODE
+    if mode not in QUERY_BUDGET_MODES:
+        raise ValueError(f"QUERY_BUDGET_MODE must be one of {list(QUERY_BUDGET_MODES)}")
+    if mode == "off":
+        return
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count_statement(conn, cursor, statement, parameters, context, executemany):
+        log = _query_log.get()
+        if log is None:
+            return
+        log.queries += 1
+        statement = fingerprint(statement)
+        log.statements[statement] += 1
+        if mode != "fail":
+            return
+
+        max_queries, max_repeats = log.limits()
+        if max_queries is not None and log.queries > max_queries:
+            raise QueryBudgetExceeded(f"{log.route()} exceeded its budget of {max_queries} SQL statements")
+        if max_repeats is not None and log.statements[statement] >= max_repeats:
+            raise QueryBudgetExceeded(
+                f"{log.route()} ran the same statement {max_repeats} times (possible N+1): {statement[:300]}"
+            )
+
+
+class QueryBudgetMiddleware:
+    """Tracks the statements of each HTTP request; only installed when QUERY_BUDGET_MODE is not off."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog(scope)
+        token = _query_log.set(log)
+
+        async def send_with_count(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(log.queries).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_count)
+        finally:
+            _query_log.reset(token)
+            for problem in log.problems():
+                print(f"Query budget: {scope['method']} {log.route()} {problem}")
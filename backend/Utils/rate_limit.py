@@ -0,0 +1,204 @@
+"""
+Token-bucket rate limiting for the expensive auth endpoints.
+
+Each Limit is a bucket of `capacity` tokens per key (a client IP, an
+email, or one shared key for a global cap) that refills continuously at
+capacity / period_seconds. A request takes one token from each bucket it
+is checked against. If a bucket is empty, the request is rejected with a
+429 and Retry-After before any DB or bcrypt work happens.
+
+RATE_LIMIT_BACKEND selects where buckets live:
+- "memory" (default) keeps them in this process, sharded so that eviction
+  stays cheap. It is also the stand-in for a shared store in tests: pass
+  a fake `clock` to control time.
+- "package.module:factory" names a zero-argument callable that returns a
+  RateLimitBackend. Use it for a store shared by every worker process,
+  e.g. Redis, where `take` runs as one atomic script per key.
+"""
+import importlib
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional, Tuple
+from fastapi import HTTPException, Request
+from backend.config import settings
+from backend.Schemas.ResponseMessage import ResponseMessage
+from backend.Utils.metrics import registry
+
+rate_limit_decisions = registry.counter(
+    "rate_limit_decisions_total", "Rate-limited requests by limit and outcome (allowed or rejected).", ("limit", "outcome"))
+
+
+@dataclass(frozen=True)
+class Limit:
+    name: str
+    capacity: int  # requests allowed in a burst; 0 disables the limit
+    period_seconds: float = 60.0  # time to refill from empty to full
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period_seconds
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def take(self, key: str, limit: Limit) -> float:
+        """
+        Take one token from the bucket of `key`: 0 if it was allowed, else
+        the seconds until a token is available again (nothing is taken).
+        """
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Buckets in process memory, as {key: (tokens, updated_at)} spread over
+    `shards` LRU dicts by key hash. Once a shard is full, its least
+    recently used bucket is dropped. That bucket was idle the longest, so
+    it is the one closest to full anyway. Everything runs on the event loop
+    thread and `take` never awaits, so no locking is needed.
+    """
+
+    def __init__(self, shards: int, max_keys: int, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._shards: List[OrderedDict] = [OrderedDict() for _ in range(max(1, shards))]
+        self._max_keys_per_shard = max(1, max_keys // len(self._shards))
+        self.evictions = 0
+
+    async def take(self, key: str, limit: Limit) -> float:
+        shard = self._shards[hash(key) % len(self._shards)]
+        now = self.clock()
+        entry = shard.get(key)
+        if entry is None:
+            tokens = float(limit.capacity)
+        else:
+            tokens, updated_at = entry
+            tokens = min(float(limit.capacity), tokens + (now - updated_at) * limit.rate)
+            shard.move_to_end(key)
+
+        if tokens >= 1:
+            shard[key] = (tokens - 1, now)
+            retry_after = 0.0
+        else:
+            shard[key] = (tokens, now)
+            retry_after = (1 - tokens) / limit.rate
+
+        if len(shard) > self._max_keys_per_shard:
+            shard.popitem(last=False)
+            self.evictions += 1
+        return retry_after
+
+    def stats(self) -> dict:
+        return {
+            "keys": sum(len(shard) for shard in self._shards),
+            "shards": len(self._shards),
+            "max_keys": self._max_keys_per_shard * len(self._shards),
+            "evictions": self.evictions,
+        }
+
+
+def create_rate_limit_backend() -> RateLimitBackend:
+    """Build the backend selected by RATE_LIMIT_BACKEND."""
+    name = settings.RATE_LIMIT_BACKEND
+    if name.lower() == "memory":
+        return MemoryRateLimitBackend(settings.RATE_LIMIT_SHARDS, settings.RATE_LIMIT_MAX_KEYS)
+    module_name, _, factory_name = name.partition(":")
+    if not module_name or not factory_name:
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{name}'. Use 'memory' or 'package.module:factory'")
+    backend = getattr(importlib.import_module(module_name), factory_name)()
+    if not isinstance(backend, RateLimitBackend):
+        raise ValueError(f"RATE_LIMIT_BACKEND factory '{name}' did not return a RateLimitBackend")
+    return backend
+
+
+def client_ip(request: Request) -> str:
+    """
+    The caller's address. With RATE_LIMIT_TRUSTED_PROXIES = n, it is the
+    address the n-th proxy from us saw in X-Forwarded-For. Clients can set
+    that header to anything, so only the hops our own proxies appended
+    are used.
+    """
+    hops = settings.RATE_LIMIT_TRUSTED_PROXIES
+    if hops > 0:
+        forwarded = [part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+
+    async def check(self, checks: Iterable[Tuple[Limit, Optional[str]]]) -> None:
+        """
+        Take a token for each (limit, key) in order and raise 429 at the
+        first empty bucket. Later buckets are then left untouched, so a
+        flood from one IP does not drain the buckets of the emails it
+        targets.
+        """
+        if not self.enabled:
+            return
+        for limit, key in checks:
+            if limit.capacity <= 0 or key is None:
+                continue
+            retry_after = await self.backend.take(f"{limit.name}:{key}", limit)
+            if retry_after > 0:
+                rate_limit_decisions.inc(limit.name, "rejected")
+                raise HTTPException(
+                    status_code=429,
+                    detail=ResponseMessage(status="error", message="Too many requests, please try again later").dict(),
+                    headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+                )
+            rate_limit_decisions.inc(limit.name, "allowed")
+
+    async def guard(self, request: Request, email: Optional[str], limits: "EndpointLimits") -> None:
+        """Check one endpoint's global, per-IP and per-email limits for this request."""
+        normalized = email.strip().lower() if email else None
+        await self.check((
+            (limits.overall, "all"),
+            (limits.per_ip, client_ip(request)),
+            (limits.per_email, normalized),
+        ))
+
+
+@dataclass(frozen=True)
+class EndpointLimits:
+    overall: Limit
+    per_ip: Limit
+    per_email: Limit
+
+
+def _endpoint_limits(name: str, overall_per_minute: int, per_ip_per_minute: int, per_email_per_minute: int) -> EndpointLimits:
+    return EndpointLimits(
+        overall=Limit(f"{name}_overall", overall_per_minute),
+        per_ip=Limit(f"{name}_ip", per_ip_per_minute),
+        per_email=Limit(f"{name}_email", per_email_per_minute),
+    )
+
+
+LOGIN_LIMITS = _endpoint_limits(
+    "login",
+    settings.LOGIN_RATE_LIMIT_OVERALL_PER_MINUTE,
+    settings.LOGIN_RATE_LIMIT_PER_IP_PER_MINUTE,
+    settings.LOGIN_RATE_LIMIT_PER_EMAIL_PER_MINUTE
+)
+OTP_GENERATE_LIMITS = _endpoint_limits(
+    "otp_generate",
+    settings.OTP_GENERATE_RATE_LIMIT_OVERALL_PER_MINUTE,
+    settings.OTP_GENERATE_RATE_LIMIT_PER_IP_PER_MINUTE,
+    settings.OTP_GENERATE_RATE_LIMIT_PER_EMAIL_PER_MINUTE
+)
+OTP_VERIFY_LIMITS = _endpoint_limits(
+    "otp_verify",
+    settings.OTP_VERIFY_RATE_LIMIT_OVERALL_PER_MINUTE,
+    settings.OTP_VERIFY_RATE_LIMIT_PER_IP_PER_MINUTE,
+    settings.OTP_VERIFY_RATE_LIMIT_PER_EMAIL_PER_MINUTE
+)
+
+rate_limiter = RateLimiter(create_rate_limit_backend(), enabled=settings.RATE_LIMIT_ENABLED)
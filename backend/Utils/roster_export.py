@@ -0,0 +1,116 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterable, List, Optional
+from fastapi import HTTPException
+
+EXPORT_FORMATS = ("csv", "jsonl")
+EXPORT_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "jsonl": "application/x-ndjson"}
+BASE_COLUMNS = ("user_id", "full_name", "email", "is_active", "created_at")
+DOCUMENT_KEYS = ("name", "size_mb", "sha256")
+
+# Encoded output is sent once this much has accumulated
+FLUSH_BYTES = 64 * 1024
+
+# Leading characters that make spreadsheet apps evaluate a cell as a formula
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def export_format(requested: Optional[str]) -> str:
+    fmt = (requested or "csv").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format. Use one of {list(EXPORT_FORMATS)}")
+    return fmt
+
+
+def _stored_value(values: Optional[dict], field_id: int):
+    raw = (values or {}).get(str(field_id))
+    return raw.get("data") if isinstance(raw, dict) and "data" in raw else raw
+
+
+def _document_metadata(value) -> Optional[dict]:
+    if not isinstance(value, dict):
+        return None
+    return {key: value.get(key) for key in DOCUMENT_KEYS}
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        value = "; ".join(str(v) for v in value)
+    elif not isinstance(value, str):
+        return str(value)
+    return f"'{value}" if value.startswith(_FORMULA_PREFIXES) else value
+
+
+def csv_header(fields: Iterable) -> List[str]:
+    header = list(BASE_COLUMNS)
+    for field in fields:
+        if field.FieldType == "document":
+            header += [field.FieldName, f"{field.FieldName} size_mb", f"{field.FieldName} sha256"]
+        else:
+            header.append(field.FieldName)
+    return header
+
+
+def _csv_row(row, fields) -> list:
+    cells = [str(row.Id), _cell(row.FullName), _cell(row.Email), str(row.IsActive), _cell(row.CreatedAt)]
+    for field in fields:
+        value = _stored_value(row.FieldValues, field.Id)
+        if field.FieldType == "document":
+            document = _document_metadata(value) or {}
+            cells += [_cell(document.get(key)) for key in DOCUMENT_KEYS]
+        else:
+            cells.append(_cell(value))
+    return cells
+
+
+def _jsonl_row(row, fields) -> str:
+    values = {}
+    for field in fields:
+        value = _stored_value(row.FieldValues, field.Id)
+        values[field.FieldName] = _document_metadata(value) if field.FieldType == "document" else value
+    return json.dumps({
+        "user_id": str(row.Id),
+        "full_name": row.FullName,
+        "email": row.Email,
+        "is_active": row.IsActive,
+        "created_at": row.CreatedAt.isoformat() if row.CreatedAt else None,
+        "fields": values,
+    }, default=str) + "\n"
+
+
+async def iter_roster(rows: AsyncIterator, fields: List, fmt: str) -> AsyncIterator[bytes]:
+    """
+    Encode streamed user rows (Id, FullName, Email, IsActive, CreatedAt and
+    FieldValues = {"<field id>": stored value}) as CSV with one column per
+    field, or as JSONL. Document fields carry their metadata, not the file.
+    The CSV header goes out before the first row is fetched; after that,
+    output is sent in FLUSH_BYTES pieces so memory stays flat.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def take() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    if fmt == "csv":
+        # BOM so spreadsheet apps detect UTF-8
+        buffer.write("\ufeff")
+        writer.writerow(csv_header(fields))
+        yield take()
+
+    async for row in rows:
+        if fmt == "csv":
+            writer.writerow(_csv_row(row, fields))
+        else:
+            buffer.write(_jsonl_row(row, fields))
+        if buffer.tell() >= FLUSH_BYTES:
+            yield take()
+
+    if buffer.tell():
+        yield take()
@@ -0,0 +1,78 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from backend.config import settings
+
+# Cached for users that are deleted or inactive: no token version matches it
+REVOKED = -1
+
+
+class TokenVersionCache:
+    """
+    Bounded LRU map of user id -> current Users.TokenVersion, used in
+    AUTH_TOKEN_MODE=claims to check the "tv" claim of an access token
+    without a DB read.
+
+    Changes made through UsersDAL / RolesDAL update this process's map
+    once they commit, so revocation is immediate here. Other worker
+    processes re-read a user's version once their entry is older than
+    `ttl_seconds`, which bounds how long they may accept a revoked token.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires_at, version, role_id)
+        self._entries: "OrderedDict[str, Tuple[float, int, Optional[int]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id) -> Optional[int]:
+        """The cached version (REVOKED for unusable accounts), or None if it must be loaded."""
+        key = str(user_id)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, user_id, version: int, role_id: Optional[int]) -> None:
+        if self.max_entries <= 0:
+            return
+        key = str(user_id)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, version, role_id)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def revoke(self, user_id) -> None:
+        self.put(user_id, REVOKED, None)
+
+    def invalidate_role(self, role_id: int) -> None:
+        stale = [key for key, (_, _, rid) in self._entries.items() if rid == role_id]
+        for key in stale:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "mode": settings.AUTH_TOKEN_MODE,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+token_versions = TokenVersionCache(
+    max_entries=settings.TOKEN_VERSION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.TOKEN_VERSION_CACHE_TTL_SECONDS,
+)
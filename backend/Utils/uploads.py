@@ -0,0 +1,152 @@
+import hashlib
+from dataclasses import dataclass
+from typing import List, Optional
+import aiofiles
+from fastapi import HTTPException, Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+from python_multipart.exceptions import MultipartParseError
+from backend.Utils.media import new_protected_temp_path, discard_protected_temp
+
+# Allowance for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+
+@dataclass
+class StreamedUpload:
+    temp_path: str
+    filename: str
+    content_type: Optional[str]
+    size_bytes: int
+    sha256: str
+
+
+def file_extension(filename: str) -> str:
+    _, ext = (filename.rsplit(".", 1) + [""])[:2]
+    return f".{ext}" if ext else ""
+
+
+def check_extension(filename: str, allowed_extensions: List[str]) -> None:
+    ext = file_extension(filename or "")
+    if allowed_extensions and ext.lower() not in [e.lower() for e in allowed_extensions]:
+        raise HTTPException(status_code=400, detail=f"File extension not allowed. Allowed: {allowed_extensions}")
+
+
+async def receive_protected_upload(
+    request: Request,
+    field_name: str = "file",
+    allowed_extensions: Optional[List[str]] = None,
+    max_size_mb: Optional[float] = None
+) -> StreamedUpload:
+    """
+    Stream one file from a multipart/form-data request body into a temp file
+    under Protected_Media without buffering it in memory.
+
+    The request is rejected before reading the body when Content-Length
+    already exceeds the limit, as soon as the part headers carry a
+    disallowed extension, and as soon as the streamed size passes
+    `max_size_mb`. Size and SHA-256 are computed while writing. The caller
+    owns the returned temp file and must promote or discard it.
+    """
+    max_bytes = int(float(max_size_mb) * 1024 * 1024) if max_size_mb is not None else None
+    size_error = HTTPException(status_code=400, detail=f"File size exceeds maximum of {max_size_mb} MB")
+
+    content_length = request.headers.get("content-length")
+    if max_bytes is not None and content_length and content_length.isdigit():
+        if int(content_length) > max_bytes + MULTIPART_OVERHEAD_BYTES:
+            raise size_error
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    # The parser works through sync callbacks; collect events per network
+    # chunk and handle them (including the async file writes) afterwards.
+    events = []
+    parser = MultipartParser(boundary, {
+        "on_header_field": lambda data, start, end: events.append(("header_field", data[start:end])),
+        "on_header_value": lambda data, start, end: events.append(("header_value", data[start:end])),
+        "on_header_end": lambda: events.append(("header_end", b"")),
+        "on_headers_finished": lambda: events.append(("headers_finished", b"")),
+        "on_part_data": lambda data, start, end: events.append(("part_data", data[start:end])),
+        "on_part_end": lambda: events.append(("part_end", b"")),
+    })
+
+    header_field = bytearray()
+    header_value = bytearray()
+    part_headers = {}
+    in_file_part = False
+    received = None  # StreamedUpload once the file part is complete
+    digest = hashlib.sha256()
+    size = 0
+    temp_path = None
+    out = None
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            pending = bytearray()
+
+            for kind, data in events:
+                if kind == "header_field":
+                    header_field += data
+                elif kind == "header_value":
+                    header_value += data
+                elif kind == "header_end":
+                    part_headers[bytes(header_field).lower()] = bytes(header_value)
+                    header_field.clear()
+                    header_value.clear()
+                elif kind == "headers_finished":
+                    _, disposition = parse_options_header(part_headers.get(b"content-disposition", b""))
+                    name = disposition.get(b"name", b"").decode("latin-1")
+                    filename = disposition.get(b"filename")
+                    in_file_part = received is None and name == field_name and filename is not None
+                    if in_file_part:
+                        filename = filename.decode("utf-8", errors="replace")
+                        check_extension(filename, allowed_extensions)
+                        part_content_type = part_headers.get(b"content-type")
+                        temp_path = await new_protected_temp_path()
+                        out = await aiofiles.open(temp_path, "wb")
+                        received = StreamedUpload(
+                            temp_path=temp_path,
+                            filename=filename,
+                            content_type=part_content_type.decode("latin-1") if part_content_type else None,
+                            size_bytes=0,
+                            sha256=""
+                        )
+                    part_headers = {}
+                elif kind == "part_data" and in_file_part:
+                    size += len(data)
+                    if max_bytes is not None and size > max_bytes:
+                        raise size_error
+                    digest.update(data)
+                    pending += data
+                elif kind == "part_end" and in_file_part:
+                    in_file_part = False
+
+            events.clear()
+            if pending:
+                await out.write(pending)
+
+        parser.finalize()
+    except MultipartParseError:
+        await _cleanup(out, temp_path)
+        raise HTTPException(status_code=400, detail="Malformed multipart upload")
+    except BaseException:
+        await _cleanup(out, temp_path)
+        raise
+
+    if received is None:
+        raise HTTPException(status_code=400, detail=f"No file provided in form field '{field_name}'")
+
+    await out.close()
+    received.size_bytes = size
+    received.sha256 = digest.hexdigest()
+    return received
+
+
+async def _cleanup(out, temp_path: Optional[str]) -> None:
+    if out is not None:
+        await out.close()
+    if temp_path:
+        await discard_protected_temp(temp_path)
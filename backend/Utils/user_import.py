@@ -0,0 +1,86 @@
+import codecs
+import csv
+import json
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+from fastapi import HTTPException
+
+IMPORT_FORMATS = ("csv", "jsonl")
+REQUIRED_COLUMNS = ("full_name", "email")
+
+# A single row longer than this means the body is not line-delimited
+MAX_LINE_BYTES = 64 * 1024
+
+
+@dataclass
+class ImportRow:
+    row: int  # 1-based data row number (the CSV header is not counted)
+    data: Optional[dict] = None
+    error: Optional[str] = None
+
+
+def import_format(content_type: Optional[str], requested: Optional[str] = None) -> str:
+    """Pick csv or jsonl from an explicit ?format= or the request Content-Type."""
+    if requested:
+        if requested.lower() not in IMPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported import format. Use one of {list(IMPORT_FORMATS)}")
+        return requested.lower()
+    content_type = (content_type or "").lower()
+    return "jsonl" if "json" in content_type else "csv"
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a UTF-8 byte stream incrementally and yield it line by line."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line.rstrip("\r")
+            if len(pending) > MAX_LINE_BYTES:
+                raise HTTPException(status_code=400, detail="Import row is too long")
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Import file must be UTF-8 encoded")
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_import_rows(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[ImportRow]:
+    """
+    Parse a streamed CSV (header row required) or JSONL body into rows as
+    they arrive. Rows that cannot be parsed are yielded with an error so the
+    import can report them and carry on; a bad CSV header rejects the file.
+    """
+    header = None
+    row = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+
+        if fmt == "csv" and header is None:
+            header = [column.strip().lower() for column in next(csv.reader([line]))]
+            missing = [column for column in REQUIRED_COLUMNS if column not in header]
+            if missing:
+                raise HTTPException(status_code=400, detail=f"CSV header is missing column(s): {missing}")
+            continue
+
+        row += 1
+        if fmt == "csv":
+            values = next(csv.reader([line]))
+            if len(values) > len(header):
+                yield ImportRow(row, error=f"Expected {len(header)} columns, got {len(values)}")
+                continue
+            yield ImportRow(row, data=dict(zip(header, values)))
+        else:
+            try:
+                data = json.loads(line)
+            except ValueError:
+                yield ImportRow(row, error="Invalid JSON")
+                continue
+            if not isinstance(data, dict):
+                yield ImportRow(row, error="Each line must be a JSON object")
+                continue
+            yield ImportRow(row, data=data)
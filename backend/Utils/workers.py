@@ -0,0 +1,123 @@
+import asyncio
+import multiprocessing
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Coroutine, Optional, Set
+from fastapi import HTTPException
+from backend.Schemas.ResponseMessage import ResponseMessage
+
+# Upper bounds (seconds) of the latency buckets reported by BoundedProcessPool.stats()
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when a BoundedProcessPool already has its maximum number of jobs queued."""
+
+
+def pool_saturated_http_error() -> HTTPException:
+    """The 503 returned to clients when a pool sheds a request."""
+    return HTTPException(
+        status_code=503,
+        detail=ResponseMessage(status="error", message="Server is busy, please try again shortly").dict(),
+        headers={"Retry-After": "1"}
+    )
+
+
+# Fire-and-forget tasks are referenced here until done so they are not garbage collected
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def spawn_background(coro: Coroutine, name: str = None) -> asyncio.Task:
+    """Run `coro` in the background (e.g. cleanup scheduled from an after_commit hook)."""
+    task = asyncio.create_task(coro, name=name)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+class BoundedProcessPool:
+    """
+    Process pool for CPU-bound work that must not run on the event loop.
+
+    At most `max_workers + max_queue` jobs are accepted at once; further
+    submissions fail fast with PoolSaturatedError so callers can shed load
+    instead of piling up latency. The executor is created lazily on first
+    use with the "spawn" start method, which is safe in a threaded server.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    async def run(self, fn: Callable, *args):
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise PoolSaturatedError(f"{self.name} pool is saturated ({self.in_flight} jobs in flight)")
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        start = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._observe(time.perf_counter() - start)
+
+    def _observe(self, seconds: float) -> None:
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.bucket_counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def stats(self) -> dict:
+        finished = self.completed + self.failed
+        return {
+            "name": self.name,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.max_workers),
+            "peak_in_flight": self.peak_in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_seconds": round(self.total_seconds / finished, 6) if finished else 0.0,
+            "max_seconds": round(self.max_seconds, 6),
+            "latency_buckets": {
+                **{str(le): count for le, count in zip(LATENCY_BUCKETS, self.bucket_counts)},
+                "+Inf": self.bucket_counts[-1],
+            },
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,15 @@
+"""
+Load tests and benchmarks against a local PostgreSQL.
+
+    python -m backend.benchmarks.seed --users 200000 --roles 4 --fields-per-role 30
+    python -m backend.benchmarks.load --base-url http://127.0.0.1:8000 --concurrency 32
+    python -m backend.benchmarks.micro
+
+`seed` fills the database configured by DATABASE_URL with bench roles,
+their fields, users with every field filled in and the permission matrix,
+and writes a manifest the load runner reads. `load` runs async HTTP
+scenarios against a running server and reports throughput and latency
+percentiles as JSON, compared against a stored baseline when one exists.
+`micro` times the CPU-bound helpers on the request path in isolation,
+without a database, and reports and compares the same way.
+"""
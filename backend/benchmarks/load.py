@@ -0,0 +1,257 @@
+"""
+Async HTTP load scenarios against a running server seeded by
+`python -m backend.benchmarks.seed`.
+
+Each scenario runs --concurrency virtual users, each with its own client
+and session cookie, in a closed loop: a user sends its next request as
+soon as the previous one completes. Requests made during --warmup seconds
+are not measured; the following --duration seconds are. Responses with a
+status of 400 or more, and transport errors, count as errors.
+
+    python -m backend.benchmarks.load --concurrency 32 --duration 30
+    python -m backend.benchmarks.load --scenarios me,my_fields --save-baseline
+    python -m backend.benchmarks.load --fail-on-regression --threshold 15
+
+The JSON report goes to --output. When --baseline exists, the report is
+compared against it and regressions (throughput down, or a latency
+percentile up, by more than --threshold percent) are listed.
+
+All virtual users share one client IP, so start the server under test with
+RATE_LIMIT_ENABLED=False or the login scenario measures 429s.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+import httpx
+from backend.benchmarks.report import build_report, compare, read_json, summarize, write_json
+from backend.benchmarks.seed import DEFAULT_MANIFEST
+
+DEFAULT_BASELINE = "backend/benchmarks/baseline.json"
+RESULTS_DIR = "backend/benchmarks/results"
+
+
+@dataclass
+class VirtualUser:
+    client: httpx.AsyncClient
+    email: str
+    role: dict
+    rnd: random.Random
+
+    def field_of_type(self, field_type: str) -> dict:
+        for role_field in self.role["fields"]:
+            if role_field["type"] == field_type:
+                return role_field
+        raise SystemExit(f"Bench role {self.role['id']} has no {field_type} field; re-seed with more fields")
+
+
+@dataclass
+class Scenario:
+    name: str
+    request: Callable[["LoadContext", VirtualUser], Awaitable[httpx.Response]]
+    as_super_user: bool = False
+    logged_in: bool = True
+    setup: Optional[Callable[["LoadContext", VirtualUser], Awaitable[None]]] = None
+
+
+class LoadContext:
+    def __init__(self, base_url: str, manifest: dict, upload_kb: int, timeout: float):
+        self.base_url = base_url
+        self.manifest = manifest
+        self.upload_bytes = upload_kb * 1024
+        self.timeout = timeout
+
+    def random_user(self, rnd: random.Random):
+        role = rnd.choice(self.manifest["roles"])
+        return rnd.choice(role["sample_users"]), role
+
+    async def login(self, client: httpx.AsyncClient, email: str) -> httpx.Response:
+        return await client.post("/api/auth/login", json={"email": email, "password": self.manifest["password"]})
+
+    async def virtual_user(self, index: int, scenario: Scenario) -> VirtualUser:
+        rnd = random.Random(index)
+        client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout)
+        if scenario.as_super_user:
+            email, role = self.manifest["super_user"], None
+        else:
+            email, role = self.random_user(rnd)
+        user = VirtualUser(client=client, email=email, role=role, rnd=rnd)
+        if scenario.logged_in:
+            response = await self.login(client, email)
+            if response.status_code != 200:
+                await client.aclose()
+                raise SystemExit(f"Login as {email} failed ({response.status_code}); is the database seeded?")
+        if scenario.setup:
+            await scenario.setup(self, user)
+        return user
+
+
+# ---------------- SCENARIOS ----------------
+async def _login(context: LoadContext, user: VirtualUser) -> httpx.Response:
+    email, _ = context.random_user(user.rnd)
+    user.client.cookies.clear()
+    return await context.login(user.client, email)
+
+
+async def _me(context: LoadContext, user: VirtualUser) -> httpx.Response:
+    return await user.client.get("/api/auth/me")
+
+
+async def _my_fields(context: LoadContext, user: VirtualUser) -> httpx.Response:
+    return await user.client.get("/api/user/me/fields")
+
+
+async def _by_role(context: LoadContext, user: VirtualUser) -> httpx.Response:
+    role = user.rnd.choice(context.manifest["roles"])
+    return await user.client.get(f"/api/user/by-role/{role['id']}", params={"limit": 50})
+
+
+async def _update_field(context: LoadContext, user: VirtualUser) -> httpx.Response:
+    text_field = user.field_of_type("text")
+    value = f"Load test {user.rnd.randrange(1_000_000)}"
+    return await user.client.post(f"/api/user/me/fields/{text_field['id']}", json={"value": value})
+
+
+def _upload_body(context: LoadContext, user: VirtualUser) -> dict:
+    # Fresh bytes every time, so the content-addressed store cannot deduplicate the write away
+    return {"file": ("bench.txt", os.urandom(context.upload_bytes), "text/plain")}
+
+
+async def _upload(context: LoadContext, user: VirtualUser) -> httpx.Response:
+    document_field = user.field_of_type("document")
+    return await user.client.post(f"/api/user/me/fields/{document_field['id']}/upload", files=_upload_body(context, user))
+
+
+async def _setup_download(context: LoadContext, user: VirtualUser) -> None:
+    response = await _upload(context, user)
+    if response.status_code != 200:
+        raise SystemExit(f"Upload for the download scenario failed ({response.status_code}): {response.text[:200]}")
+
+
+async def _download(context: LoadContext, user: VirtualUser) -> httpx.Response:
+    document_field = user.field_of_type("document")
+    return await user.client.get(f"/api/user/me/fields/{document_field['id']}/download")
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    scenario.name: scenario for scenario in (
+        Scenario("login", _login, logged_in=False),
+        Scenario("me", _me),
+        Scenario("my_fields", _my_fields),
+        Scenario("by_role", _by_role, as_super_user=True),
+        Scenario("update_field", _update_field),
+        Scenario("upload", _upload),
+        Scenario("download", _download, setup=_setup_download),
+    )
+}
+
+
+# ---------------- RUNNER ----------------
+async def run_scenario(context: LoadContext, scenario: Scenario, concurrency: int, warmup: float, duration: float) -> dict:
+    users = await asyncio.gather(*(context.virtual_user(i, scenario) for i in range(concurrency)))
+    latencies: List[float] = []
+    errors = 0
+    measure_from = time.perf_counter() + warmup
+    stop_at = measure_from + duration
+
+    async def loop(user: VirtualUser):
+        nonlocal errors
+        while (started := time.perf_counter()) < stop_at:
+            try:
+                response = await scenario.request(context, user)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if started < measure_from:
+                continue
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    try:
+        await asyncio.gather(*(loop(user) for user in users))
+    finally:
+        await asyncio.gather(*(user.client.aclose() for user in users))
+    return summarize(latencies, errors, duration)
+
+
+def _print_summary(name: str, summary: dict) -> None:
+    print(
+        f"{name:<14} {summary['requests']:>8} req  {summary['errors']:>6} err  "
+        f"{summary['throughput_rps']:>9.1f} req/s  p50 {summary['p50_ms']:>8.1f} ms  "
+        f"p95 {summary['p95_ms']:>8.1f} ms  p99 {summary['p99_ms']:>8.1f} ms"
+    )
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Run HTTP load scenarios against a seeded server.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated, from: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before each scenario")
+    parser.add_argument("--upload-kb", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", default=None, help=f"Report path (default {RESULTS_DIR}/load-<time>.json)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed change in percent before a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {unknown}")
+    if args.concurrency < 1 or args.duration <= 0 or args.warmup < 0:
+        parser.error("--concurrency and --duration must be positive, --warmup not negative")
+
+    manifest = read_json(args.manifest)
+    if manifest is None:
+        parser.error(f"Seed manifest {args.manifest} not found; run python -m backend.benchmarks.seed first")
+
+    context = LoadContext(args.base_url, manifest, args.upload_kb, args.timeout)
+    results = {}
+    for name in names:
+        results[name] = await run_scenario(context, SCENARIOS[name], args.concurrency, args.warmup, args.duration)
+        _print_summary(name, results[name])
+
+    report = build_report(
+        results,
+        kind="load",
+        base_url=args.base_url,
+        concurrency=args.concurrency,
+        duration_seconds=args.duration,
+        warmup_seconds=args.warmup,
+        upload_kb=args.upload_kb,
+        seeded_users=manifest.get("users"),
+        fields_per_role=manifest.get("fields_per_role"),
+    )
+
+    baseline = read_json(args.baseline)
+    if baseline is not None:
+        report["comparison"] = compare(report, baseline, args.threshold)
+        for regression in report["comparison"]["regressions"]:
+            print(f"REGRESSION {regression}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{datetime.now():%Y%m%d-%H%M%S}.json")
+    write_json(report, output)
+    print(f"Report written to {output}")
+    if args.save_baseline:
+        write_json({key: report[key] for key in ("meta", "scenarios")}, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+
+    if args.fail_on_regression and report.get("comparison", {}).get("regressions"):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,315 @@
+"""
+Microbenchmarks for the CPU-bound code on the request path. They need
+no database or server.
+
+Each benchmark is one call of the code under test. The harness picks a
+loop count so that one repetition takes at least --min-time seconds.
+It then runs --warmup unmeasured repetitions and --repetitions measured
+ones, with the garbage collector paused as timeit does. Per-call times
+are reported as median, mean, stdev and min, with ops/sec taken from the
+median. One further repetition runs under tracemalloc. It reports the
+peak memory traced during the loop, which is about what a single call
+needs at once, and the bytes per call still held afterwards.
+
+    python -m backend.benchmarks.micro --list
+    python -m backend.benchmarks.micro --filter field_value --repetitions 30
+    python -m backend.benchmarks.micro --save-baseline
+    python -m backend.benchmarks.micro --fail-on-regression --threshold 10
+
+Async code with no real awaits is driven to completion directly, so
+event loop overhead is not part of the measurement.
+"""
+import argparse
+import gc
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+from backend.benchmarks.report import build_report, compare, read_json, write_json
+from backend.BusinessAccessLayer.Users import UsersBAL
+from backend.BusinessAccessLayer.UsersFieldData import UsersFieldDataBAL
+from backend.Schemas.RequiredFieldsForUsers import FieldCreateSchema
+from backend.Schemas.ResponseMessage import ResponseMessage
+from backend.Utils.field_schema import compile_field
+from backend.Utils.helpers import create_access_token, verify_token, generate_random_password
+
+DEFAULT_BASELINE = "backend/benchmarks/micro_baseline.json"
+RESULTS_DIR = "backend/benchmarks/results"
+MICRO_METRICS = (("ops_per_sec", True), ("median_us", False))
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[[], Callable[[], object]]  # returns the call to measure
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str):
+    """Register `setup`, which prepares the inputs and returns the zero-argument call to time."""
+    def decorator(setup):
+        BENCHMARKS[name] = Benchmark(name, setup)
+        return setup
+    return decorator
+
+
+def run_sync(coro):
+    """Result of a coroutine that never suspends, without an event loop."""
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    coro.close()
+    raise RuntimeError("Coroutine suspended; it cannot be microbenchmarked without an event loop")
+
+
+# ---------------- FIXTURES ----------------
+def _field_row(field_type: str, options=None, validation=None):
+    # Attribute-compatible stand-in for a RequiredFieldsForUsers row
+    return SimpleNamespace(
+        Id=1, RoleId=1, FieldName=f"Bench {field_type}", FieldType=field_type, IsRequired=False,
+        FilledByRoleId=1, EditableByRoleId=1, Options=options, Validation=validation,
+        DisplayOrder=1, IsActive=True
+    )
+
+
+_OPTIONS = [{"label": f"Option {letter}"} for letter in "ABCDEFGH"]
+
+FIELD_CASES = {
+    "text": (_field_row("text", validation={"min_length": 1, "max_length": 200}), "A typical free text answer"),
+    "number": (_field_row("number", validation={"min_value": 0, "max_value": 1000000}), 4521),
+    "date": (_field_row("date", validation={"min_date": "1950-01-01", "max_date": "2100-01-01"}), "1994-06-17"),
+    "mcq": (_field_row("mcq", options=_OPTIONS), "Option E"),
+    "msq": (_field_row("msq", options=_OPTIONS), ["Option A", "Option C", "Option H"]),
+    "document": (
+        _field_row("document", validation={"allowed_extensions": [".pdf", ".png"], "max_size_mb": 5}),
+        {"name": "3f2a.pdf", "size_mb": 1.25, "sha256": "3f2a"}
+    ),
+}
+
+FIELD_CREATE_PAYLOADS = {
+    "text": {"role_id": 1, "field_name": "Bio", "field_type": "text", "validation": {"min_length": 1, "max_length": 500}},
+    "mcq": {"role_id": 1, "field_name": "Track", "field_type": "mcq",
+            "options": [{"label": f"Track {n}", "is_correct": None} for n in range(8)]},
+    "date": {"role_id": 1, "field_name": "Birth date", "field_type": "date",
+             "validation": {"min_date": "1950-01-01", "max_date": "2010-12-31"}},
+    "document": {"role_id": 1, "field_name": "Resume", "field_type": "document",
+                 "validation": {"allowed_extensions": [".pdf", ".docx"], "max_size_mb": 10}},
+}
+
+
+def _users(count: int) -> List[SimpleNamespace]:
+    created = datetime(2024, 1, 1)
+    return [
+        SimpleNamespace(
+            Id=uuid.uuid4(),
+            FullName=f"User {n:05d}",
+            Email=f"user{n:05d}@example.com",
+            ProfilePicture=f"{uuid.uuid4().hex}.webp" if n % 2 else None,
+            CreatedAt=created + timedelta(minutes=n)
+        )
+        for n in range(count)
+    ]
+
+
+# ---------------- BENCHMARKS ----------------
+def _register_field_values():
+    bal = UsersFieldDataBAL()
+    for field_type, (row, value) in FIELD_CASES.items():
+        def setup_raw(row=row, value=value):
+            # As called with a plain RequiredFieldsForUsers row: compiled on every call
+            return lambda: run_sync(bal._validate_and_normalize_value(row, value))
+
+        def setup_compiled(row=row, value=value):
+            # As called with a CompiledField from the cached role schema
+            compiled = compile_field(row)
+            return lambda: run_sync(bal._validate_and_normalize_value(compiled, value))
+
+        benchmark(f"field_value.{field_type}")(setup_raw)
+        benchmark(f"field_value.{field_type}.compiled")(setup_compiled)
+
+
+def _register_field_create_schema():
+    for field_type, payload in FIELD_CREATE_PAYLOADS.items():
+        def setup(payload=payload):
+            return lambda: FieldCreateSchema.model_validate(payload)
+        benchmark(f"field_create_schema.{field_type}")(setup)
+
+
+_register_field_values()
+_register_field_create_schema()
+
+
+@benchmark("jwt.create_access_token")
+def _create_token():
+    data = {"sub": str(uuid.uuid4())}
+    return lambda: create_access_token(data, timedelta(minutes=30))
+
+
+@benchmark("jwt.verify_token")
+def _verify_token():
+    token = create_access_token({"sub": str(uuid.uuid4())}, timedelta(days=1))
+    return lambda: verify_token(token)
+
+
+@benchmark("serialize_users.1000")
+def _serialize_users():
+    bal = UsersBAL()
+    users = _users(1000)
+    return lambda: run_sync(bal.serialize_users_list(users))
+
+
+@benchmark("response_message.users_1000.dump_json")
+def _response_message_json():
+    users = run_sync(UsersBAL().serialize_users_list(_users(1000)))
+    return lambda: ResponseMessage(status="success", message="Users fetched", data=users).model_dump_json()
+
+
+@benchmark("response_message.users_1000.dump")
+def _response_message_dump():
+    # What FastAPI does with a response_model=ResponseMessage return value
+    users = run_sync(UsersBAL().serialize_users_list(_users(1000)))
+    return lambda: ResponseMessage(status="success", message="Users fetched", data=users).model_dump(mode="json")
+
+
+@benchmark("generate_random_password.12")
+def _random_password_12():
+    return lambda: generate_random_password(12)
+
+
+@benchmark("generate_random_password.8")
+def _random_password_8():
+    # Short passwords miss a character class more often, so the retry loop runs longer
+    return lambda: generate_random_password(8)
+
+
+# ---------------- HARNESS ----------------
+def _time_loop(call: Callable[[], object], loops: int) -> float:
+    started = time.perf_counter()
+    for _ in range(loops):
+        call()
+    return time.perf_counter() - started
+
+
+def _calibrate(call: Callable[[], object], min_time: float) -> int:
+    loops = 1
+    while True:
+        if _time_loop(call, loops) >= min_time:
+            return loops
+        loops *= 2
+
+
+def _allocations(call: Callable[[], object], loops: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        _time_loop(call, loops)
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_bytes": peak - before,
+        "retained_bytes_per_op": round((after - before) / loops, 1),
+    }
+
+
+def measure(call: Callable[[], object], repetitions: int, warmup: int, min_time: float, keep_gc: bool = False) -> dict:
+    loops = _calibrate(call, min_time)
+    gc_was_enabled = gc.isenabled()
+    if not keep_gc:
+        gc.disable()
+    try:
+        for _ in range(warmup):
+            _time_loop(call, loops)
+        per_op = [_time_loop(call, loops) / loops for _ in range(repetitions)]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    median = statistics.median(per_op)
+    summary = {
+        "loops": loops,
+        "repetitions": repetitions,
+        "ops_per_sec": round(1 / median, 1) if median else 0.0,
+        "median_us": round(median * 1e6, 3),
+        "mean_us": round(statistics.fmean(per_op) * 1e6, 3),
+        "stdev_us": round(statistics.stdev(per_op) * 1e6, 3) if len(per_op) > 1 else 0.0,
+        "min_us": round(min(per_op) * 1e6, 3),
+    }
+    summary.update(_allocations(call, loops))
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run CPU-bound microbenchmarks.")
+    parser.add_argument("--filter", default="", help="Only benchmarks whose name contains this")
+    parser.add_argument("--list", action="store_true")
+    parser.add_argument("--repetitions", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3, help="Unmeasured repetitions")
+    parser.add_argument("--min-time", type=float, default=0.05, help="Minimum seconds per repetition")
+    parser.add_argument("--keep-gc", action="store_true", help="Leave the garbage collector running while timing")
+    parser.add_argument("--output", default=None, help=f"Report path (default {RESULTS_DIR}/micro-<time>.json)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed change in percent before a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    selected = [b for name, b in BENCHMARKS.items() if args.filter in name]
+    if args.list:
+        for bench in selected:
+            print(bench.name)
+        return 0
+    if not selected:
+        parser.error(f"No benchmark matches '{args.filter}'")
+    if args.repetitions < 2 or args.warmup < 0 or args.min_time <= 0:
+        parser.error("--repetitions must be at least 2, --warmup not negative, --min-time positive")
+
+    results = {}
+    for bench in selected:
+        summary = measure(bench.setup(), args.repetitions, args.warmup, args.min_time, args.keep_gc)
+        results[bench.name] = summary
+        print(
+            f"{bench.name:<42} {summary['ops_per_sec']:>12,.0f} ops/s  "
+            f"median {summary['median_us']:>10.3f} us  ±{summary['stdev_us']:>8.3f}  "
+            f"peak {summary['peak_bytes']:>10,} B"
+        )
+
+    report = build_report(
+        results,
+        kind="micro",
+        repetitions=args.repetitions,
+        warmup=args.warmup,
+        min_time_seconds=args.min_time,
+        gc_enabled=args.keep_gc,
+    )
+    baseline = read_json(args.baseline)
+    if baseline is not None:
+        report["comparison"] = compare(report, baseline, args.threshold, MICRO_METRICS)
+        for regression in report["comparison"]["regressions"]:
+            print(f"REGRESSION {regression}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"micro-{datetime.now():%Y%m%d-%H%M%S}.json")
+    write_json(report, output)
+    print(f"Report written to {output}")
+    if args.save_baseline:
+        write_json({key: report[key] for key in ("meta", "scenarios")}, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+
+    if args.fail_on_regression and report.get("comparison", {}).get("regressions"):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Latency summaries and baseline comparison shared by the benchmark runners.
+
+A report is JSON: {"meta": {...}, "scenarios": {name: summary}}. For load
+runs a summary holds the request and error counts, throughput in requests
+per second and latency percentiles in milliseconds; microbenchmarks report
+ops/sec and per-call timings instead (see micro.py).
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+PERCENTILES = (50, 95, 99)
+
+# (summary key, True if a higher value is better)
+COMPARED_METRICS = (
+    ("throughput_rps", True),
+    ("p50_ms", False),
+    ("p95_ms", False),
+    ("p99_ms", False),
+)
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed_seconds: float) -> dict:
+    """Summary of one scenario; `latencies` are seconds per successful request."""
+    values = sorted(latencies)
+    summary = {
+        "requests": len(values) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed_seconds, 2) if elapsed_seconds > 0 else 0.0,
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = round(percentile(values, pct) * 1000, 3)
+    summary["max_ms"] = round(values[-1] * 1000, 3) if values else 0.0
+    return summary
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def build_report(scenarios: Dict[str, dict], **meta) -> dict:
+    return {
+        "meta": {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "host": platform.node(),
+            **meta,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def read_json(path: str) -> Optional[dict]:
+    if not path or not os.path.isfile(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json(data: dict, path: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def compare(report: dict, baseline: dict, threshold_pct: float, metrics: Sequence = COMPARED_METRICS) -> dict:
+    """
+    Change of each of `metrics` ((summary key, higher is better) pairs)
+    against `baseline`, in percent. A metric that got worse by more than
+    `threshold_pct` is a regression; scenarios missing from either side
+    are skipped.
+    """
+    comparison = {"baseline_generated_at": baseline.get("meta", {}).get("generated_at"),
+                  "threshold_pct": threshold_pct, "scenarios": {}, "regressions": []}
+    for name, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        changes = {}
+        for key, higher_is_better in metrics:
+            before, after = previous.get(key), current.get(key)
+            if not before or after is None:
+                continue
+            change_pct = round((after - before) / before * 100, 2)
+            changes[key] = {"baseline": before, "current": after, "change_pct": change_pct}
+            worse_by = -change_pct if higher_is_better else change_pct
+            if worse_by > threshold_pct:
+                comparison["regressions"].append(f"{name}: {key} {before} -> {after} ({change_pct:+.2f}%)")
+        comparison["scenarios"][name] = changes
+    return comparison
@@ -0,0 +1,289 @@
+"""
+Seed a local PostgreSQL with a large, realistic dataset for load tests.
+
+Creates --roles "Bench Role NN" roles with --fields-per-role fields each
+(every field type; the last field of a role is a document field), spreads
+--users users over them with every non-document field filled in, grants
+the bench roles read access plus field writes in the permission matrix,
+and adds a Super User (bench.super@bench.local) for the admin scenarios.
+Users and their field values are written with COPY, one transaction per
+--batch-size users. All bench users share --password, hashed once.
+
+The manifest written to --manifest lists the role and field ids and a
+sample of users, for `python -m backend.benchmarks.load`.
+
+    python -m backend.benchmarks.seed --users 200000 --roles 4 --fields-per-role 30
+    python -m backend.benchmarks.seed --reset-only
+
+--reset removes earlier bench data first. Documents uploaded during load
+runs stay in the protected store; only their UsersFieldData rows go.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Tuple
+from urllib.parse import urlsplit
+import asyncpg
+from backend.config import settings
+from backend.Utils.helpers import pwd_context
+from backend.benchmarks.report import write_json
+
+BENCH_EMAIL_DOMAIN = "bench.local"
+BENCH_ROLE_PREFIX = "Bench Role"
+SUPER_USER_EMAIL = f"bench.super@{BENCH_EMAIL_DOMAIN}"
+DEFAULT_PASSWORD = "Bench#Passw0rd"
+DEFAULT_MANIFEST = "backend/benchmarks/results/seed_manifest.json"
+
+FIELD_TYPES = ("text", "number", "date", "mcq", "msq")
+OPTION_LABELS = ("Option A", "Option B", "Option C", "Option D", "Option E")
+PERMISSION_TABLES = ("Users", "Roles", "RequiredFieldsForUsers", "UsersFieldData", "Permissions", "RolePermissions")
+PERMISSION_METHODS = ("GET", "POST", "PUT", "DELETE")
+# Bench roles may read everything and write their field values
+BENCH_GRANTS = [(table, "GET") for table in PERMISSION_TABLES] + [("UsersFieldData", "POST"), ("UsersFieldData", "PUT")]
+SAMPLE_USERS_PER_ROLE = 500
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1", "")
+
+
+def _dsn() -> str:
+    # asyncpg takes the plain scheme, without SQLAlchemy's driver suffix
+    return settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def _field_definition(index: int, fields_per_role: int) -> Tuple[str, str, object, object]:
+    """(name, type, options, validation) of the index-th bench field of a role."""
+    if index == fields_per_role - 1:
+        return f"Bench Field {index + 1:02d} (document)", "document", None, {
+            "allowed_extensions": [".pdf", ".txt"], "max_size_mb": 5
+        }
+    field_type = FIELD_TYPES[index % len(FIELD_TYPES)]
+    name = f"Bench Field {index + 1:02d} ({field_type})"
+    if field_type == "text":
+        return name, field_type, None, {"max_length": 200}
+    if field_type == "number":
+        return name, field_type, None, {"min_value": 0, "max_value": 1000000}
+    if field_type == "date":
+        return name, field_type, None, {"min_date": "1950-01-01", "max_date": "2100-01-01"}
+    return name, field_type, [{"label": label} for label in OPTION_LABELS], None
+
+
+def _field_value(rnd: random.Random, field_type: str, user_index: int):
+    if field_type == "text":
+        return f"Bench value {user_index}-{rnd.randrange(1_000_000)}"
+    if field_type == "number":
+        return rnd.randrange(100_000)
+    if field_type == "date":
+        return (datetime(1970, 1, 1) + timedelta(days=rnd.randrange(20_000))).isoformat()
+    if field_type == "mcq":
+        return rnd.choice(OPTION_LABELS)
+    return rnd.sample(OPTION_LABELS, rnd.randint(1, 3))
+
+
+# ---------------- RESET ----------------
+async def reset(conn: asyncpg.Connection) -> None:
+    like = f"%@{BENCH_EMAIL_DOMAIN}"
+    async with conn.transaction():
+        await conn.execute(
+            'DELETE FROM "UsersFieldData" WHERE "UserId" IN (SELECT "Id" FROM "Users" WHERE "Email" LIKE $1)', like
+        )
+        await conn.execute(
+            'DELETE FROM "UsersFieldData" WHERE "RequiredFieldId" IN ('
+            'SELECT f."Id" FROM "RequiredFieldsForUsers" f JOIN "Roles" r ON r."Id" = f."RoleId" WHERE r."Name" LIKE $1)',
+            f"{BENCH_ROLE_PREFIX} %"
+        )
+        deleted_users = await conn.execute('DELETE FROM "Users" WHERE "Email" LIKE $1', like)
+        # Fields and role permissions go with their roles (ON DELETE CASCADE)
+        deleted_roles = await conn.execute('DELETE FROM "Roles" WHERE "Name" LIKE $1', f"{BENCH_ROLE_PREFIX} %")
+    print(f"Reset: {deleted_users.split()[-1]} users, {deleted_roles.split()[-1]} roles removed")
+
+
+# ---------------- SEED ----------------
+async def _create_roles(conn: asyncpg.Connection, count: int, super_role_id: int) -> List[int]:
+    role_ids = []
+    for n in range(1, count + 1):
+        role_id = await conn.fetchval(
+            'INSERT INTO "Roles" ("Name", "Description", "RegistrationAllowed", "RegistrationByRoles") '
+            'VALUES ($1, $2, FALSE, $3) RETURNING "Id"',
+            f"{BENCH_ROLE_PREFIX} {n:02d}", "Generated for load tests", [super_role_id]
+        )
+        role_ids.append(role_id)
+    return role_ids
+
+
+async def _create_fields(conn: asyncpg.Connection, role_id: int, fields_per_role: int) -> List[dict]:
+    fields = []
+    for index in range(fields_per_role):
+        name, field_type, options, validation = _field_definition(index, fields_per_role)
+        field_id = await conn.fetchval(
+            'INSERT INTO "RequiredFieldsForUsers" ("RoleId", "FieldName", "FieldType", "IsRequired", '
+            '"FilledByRoleId", "EditableByRoleId", "Options", "Validation", "DisplayOrder", "IsActive") '
+            'VALUES ($1, $2, $3, FALSE, $1, $1, $4::jsonb, $5::jsonb, $6, TRUE) RETURNING "Id"',
+            role_id, name, field_type,
+            json.dumps(options) if options is not None else None,
+            json.dumps(validation) if validation is not None else None,
+            index + 1
+        )
+        fields.append({"id": field_id, "name": name, "type": field_type})
+    return fields
+
+
+async def _grant_permissions(conn: asyncpg.Connection, role_ids: List[int]) -> None:
+    await conn.executemany(
+        'INSERT INTO "Permissions" ("TableName", "Method", "Description") VALUES ($1, $2, $3) '
+        'ON CONFLICT ("TableName", "Method") DO NOTHING',
+        [(table, method, f"{method} on {table}") for table in PERMISSION_TABLES for method in PERMISSION_METHODS]
+    )
+    rows = await conn.fetch('SELECT "Id", "TableName", "Method" FROM "Permissions"')
+    permission_ids = {(row["TableName"], row["Method"]): row["Id"] for row in rows}
+    await conn.executemany(
+        'INSERT INTO "RolePermissions" ("RoleId", "PermissionId") VALUES ($1, $2) ON CONFLICT DO NOTHING',
+        [(role_id, permission_ids[grant]) for role_id in role_ids for grant in BENCH_GRANTS]
+    )
+
+
+async def _copy_users(
+    conn: asyncpg.Connection,
+    rnd: random.Random,
+    roles: List[dict],
+    users: int,
+    batch_size: int,
+    password_hash: str
+) -> dict:
+    samples = {role["id"]: [] for role in roles}
+    started = time.perf_counter()
+    values_written = 0
+
+    for batch_start in range(0, users, batch_size):
+        user_rows, value_rows = [], []
+        for index in range(batch_start, min(batch_start + batch_size, users)):
+            role = roles[index % len(roles)]
+            user_id = uuid.uuid4()
+            email = f"bench.user.{index:07d}@{BENCH_EMAIL_DOMAIN}"
+            user_rows.append((user_id, f"Bench User {index:07d}", email, password_hash, role["id"], True))
+            for field in role["fields"]:
+                if field["type"] == "document":
+                    continue
+                value = {"data": _field_value(rnd, field["type"], index)}
+                value_rows.append((user_id, field["id"], json.dumps(value)))
+            if len(samples[role["id"]]) < SAMPLE_USERS_PER_ROLE:
+                samples[role["id"]].append(email)
+
+        async with conn.transaction():
+            await conn.copy_records_to_table(
+                "Users", records=user_rows,
+                columns=["Id", "FullName", "Email", "Password", "RoleId", "IsActive"]
+            )
+            await conn.copy_records_to_table(
+                "UsersFieldData", records=value_rows,
+                columns=["UserId", "RequiredFieldId", "Value"]
+            )
+        values_written += len(value_rows)
+        done = batch_start + len(user_rows)
+        rate = done / (time.perf_counter() - started)
+        print(f"Seeded {done}/{users} users, {values_written} field values ({rate:.0f} users/s)")
+
+    return samples
+
+
+async def seed(
+    users: int,
+    roles: int,
+    fields_per_role: int,
+    batch_size: int,
+    password: str,
+    random_seed: int
+) -> dict:
+    rnd = random.Random(random_seed)
+    password_hash = pwd_context.hash(password)
+    conn = await asyncpg.connect(_dsn())
+    try:
+        existing = await conn.fetchval('SELECT COUNT(*) FROM "Roles" WHERE "Name" LIKE $1', f"{BENCH_ROLE_PREFIX} %")
+        if existing:
+            raise SystemExit("Bench data already present; re-run with --reset to replace it")
+
+        super_role_id = await conn.fetchval('SELECT "Id" FROM "Roles" WHERE "Name" = $1', "Super User")
+        if super_role_id is None:
+            raise SystemExit("The 'Super User' role is missing; apply database_layer.sql first")
+
+        async with conn.transaction():
+            role_ids = await _create_roles(conn, roles, super_role_id)
+            bench_roles = [
+                {"id": role_id, "fields": await _create_fields(conn, role_id, fields_per_role)}
+                for role_id in role_ids
+            ]
+            await _grant_permissions(conn, role_ids)
+            await conn.execute(
+                'INSERT INTO "Users" ("FullName", "Email", "Password", "RoleId", "IsActive") '
+                'VALUES ($1, $2, $3, $4, TRUE) ON CONFLICT ("Email") DO NOTHING',
+                "Bench Super User", SUPER_USER_EMAIL, password_hash, super_role_id
+            )
+
+        samples = await _copy_users(conn, rnd, bench_roles, users, batch_size, password_hash)
+        # Fresh statistics so the planner sees the new row counts during the run
+        await conn.execute('ANALYZE "Users"')
+        await conn.execute('ANALYZE "UsersFieldData"')
+    finally:
+        await conn.close()
+
+    for role in bench_roles:
+        role["sample_users"] = samples[role["id"]]
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "users": users,
+        "fields_per_role": fields_per_role,
+        "password": password,
+        "super_user": SUPER_USER_EMAIL,
+        "roles": bench_roles,
+    }
+
+
+def _is_local_database() -> bool:
+    return (urlsplit(_dsn()).hostname or "") in LOCAL_HOSTS
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed a local PostgreSQL for load tests.")
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--roles", type=int, default=4)
+    parser.add_argument("--fields-per-role", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--random-seed", type=int, default=1)
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    parser.add_argument("--reset", action="store_true", help="Remove earlier bench data before seeding")
+    parser.add_argument("--reset-only", action="store_true", help="Remove bench data and stop")
+    parser.add_argument("--allow-remote", action="store_true", help="Allow a DATABASE_URL host other than localhost")
+    args = parser.parse_args()
+
+    if args.roles < 1 or args.fields_per_role < 1 or args.users < 0 or args.batch_size < 1:
+        parser.error("--roles, --fields-per-role and --batch-size must be positive, --users not negative")
+    if not _is_local_database() and not args.allow_remote:
+        parser.error("DATABASE_URL does not point at localhost; pass --allow-remote to seed it anyway")
+
+    if args.reset or args.reset_only:
+        conn = await asyncpg.connect(_dsn())
+        try:
+            await reset(conn)
+        finally:
+            await conn.close()
+        if args.reset_only:
+            return
+
+    started = time.perf_counter()
+    manifest = await seed(
+        users=args.users,
+        roles=args.roles,
+        fields_per_role=args.fields_per_role,
+        batch_size=args.batch_size,
+        password=args.password,
+        random_seed=args.random_seed
+    )
+    write_json(manifest, args.manifest)
+    print(f"Seeding finished in {time.perf_counter() - started:.1f}s; manifest written to {args.manifest}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,27 +1,108 @@
 from pydantic_settings import BaseSettings
-import databases
 from pydantic import AnyHttpUrl
 from typing import List
 
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # asyncpg's own statement cache and SQLAlchemy's prepared statement
+    # cache (per connection); set both to 0 behind pgbouncer in transaction mode
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
     SECRET_KEY: str
     JWT_TOKEN_EXPIRE_MINUTES: int
     PORT: int
     COOKIE_SECURE: bool = False  
 
-    AZURE_COMMUNICATION_CONNECTION_STRING: str
-    AZURE_COMMUNICATION_SENDER: str
+    AZURE_COMMUNICATION_CONNECTION_STRING: str = ""
+    AZURE_COMMUNICATION_SENDER: str = ""
     SUPER_USER_EMAIL: str
 
     COOKIE_NAME: str = "access_token"
     COOKIE_HTTPONLY: bool = True
     COOKIE_SAMESITE: str = "lax"
+    # lookup: the token only names the user, who is loaded (or taken from the principal cache) per request.
+    # claims: the token also carries role id, role name and the user's TokenVersion, checked in memory.
+    AUTH_TOKEN_MODE: str = "lookup"
+    TOKEN_VERSION_CACHE_MAX_ENTRIES: int = 50000
+    TOKEN_VERSION_CACHE_TTL_SECONDS: int = 30  # how long other workers may accept a revoked token
     ALLOWED_ORIGINS_FOR_DEV: List[AnyHttpUrl] = []
     ALLOWED_ORIGINS_FOR_PROD: List[AnyHttpUrl] = []
     IS_DEVMODE: bool
 
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    PASSWORD_HASH_BATCH_SIZE: int = 16
+    BULK_PASSWORD_HASH_WORKERS: int = 2
+
+    USER_IMPORT_BATCH_SIZE: int = 500
+    USER_IMPORT_MAX_ROWS: int = 50000
+    USER_IMPORT_CONCURRENT_JOBS: int = 1
+    USER_IMPORT_JOB_RETENTION_SECONDS: int = 86400
+    USER_IMPORT_MAX_JOBS: int = 100
+
+    IMAGE_PROCESS_WORKERS: int = 2
+    IMAGE_PROCESS_MAX_QUEUE: int = 16
+    PROFILE_PICTURE_MAX_MB: float = 10
+
+    PERMISSION_MATRIX_REFRESH_SECONDS: int = 300
+    FIELD_SCHEMA_REFRESH_SECONDS: int = 300
+
+    METRICS_ENABLED: bool = True
+
+    # Development/test guard, see Utils/query_budget.py
+    QUERY_BUDGET_MODE: str = "off"  # off | warn | fail
+    QUERY_BUDGET_DEFAULT: int = 0  # statements per request for routes without @query_budget; 0 = unlimited
+    QUERY_REPEAT_THRESHOLD: int = 5  # identical statements per request that count as N+1; 0 = off
+
+    EMAIL_TRANSPORT: str = "azure"  # azure | smtp | file
+    EMAIL_FILE_SINK_DIR: str = "backend/Outbox"
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 25
+    SMTP_USERNAME: str = ""
+    SMTP_PASSWORD: str = ""
+    SMTP_USE_TLS: bool = False
+    EMAIL_SENDER_WORKERS: int = 2
+    EMAIL_SEND_CONCURRENCY: int = 8
+    EMAIL_OUTBOX_BATCH_SIZE: int = 20
+    EMAIL_OUTBOX_POLL_SECONDS: float = 2.0
+    EMAIL_MAX_ATTEMPTS: int = 5
+    EMAIL_RETRY_BASE_SECONDS: float = 30.0
+    EMAIL_SEND_LEASE_SECONDS: int = 300
+    EMAIL_SEND_TIMEOUT_SECONDS: float = 60.0  # capped at half the lease
+    EMAIL_FAILED_RETENTION_DAYS: int = 7
+    EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS: float = 3600.0  # 0 = no background purge
+    EMAIL_OUTBOX_PURGE_BATCH_SIZE: int = 1000
+
+    OTP_BACKEND: str = "database"  # database | memory (single node only)
+    OTP_PURGE_INTERVAL_SECONDS: float = 300.0  # 0 = no background purge
+    OTP_PURGE_BATCH_SIZE: int = 1000
+
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory | package.module:factory returning a RateLimitBackend
+    RATE_LIMIT_SHARDS: int = 16
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_TRUSTED_PROXIES: int = 0  # reverse proxies in front of the app appending X-Forwarded-For
+    # Requests per minute (also the burst size); 0 = no limit
+    LOGIN_RATE_LIMIT_OVERALL_PER_MINUTE: int = 0
+    LOGIN_RATE_LIMIT_PER_IP_PER_MINUTE: int = 30
+    LOGIN_RATE_LIMIT_PER_EMAIL_PER_MINUTE: int = 10
+    OTP_GENERATE_RATE_LIMIT_OVERALL_PER_MINUTE: int = 0
+    OTP_GENERATE_RATE_LIMIT_PER_IP_PER_MINUTE: int = 10
+    OTP_GENERATE_RATE_LIMIT_PER_EMAIL_PER_MINUTE: int = 3
+    OTP_VERIFY_RATE_LIMIT_OVERALL_PER_MINUTE: int = 0
+    OTP_VERIFY_RATE_LIMIT_PER_IP_PER_MINUTE: int = 30
+    OTP_VERIFY_RATE_LIMIT_PER_EMAIL_PER_MINUTE: int = 5
+
     class Config:
         env_file = "backend/.env"
         env_file_encoding = "utf-8"
@@ -29,5 +110,3 @@ class Settings(BaseSettings):
 settings = Settings()
 
 settings.COOKIE_SECURE = not settings.IS_DEVMODE
-
-database = databases.Database(settings.DATABASE_URL)
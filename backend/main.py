@@ -1,6 +1,14 @@
-from fastapi import FastAPI
-from backend.config import settings, database
-from backend.Controllers import AuthController, RoleController, RequiredFieldsForUsersController, UserController, RolePermissionsController
+from fastapi import FastAPI, Depends
+from backend.config import settings
+from backend.db import request_session_scope, engine
+from backend.Utils.passwords import password_pool, bulk_password_pool
+from backend.Utils.images import image_pool
+from backend.BusinessAccessLayer.EmailOutbox import email_outbox_sender
+from backend.Utils.otp_store import otp_purge_job
+from backend.Utils.import_jobs import import_jobs
+from backend.Controllers import AuthController, RoleController, RequiredFieldsForUsersController, UserController, RolePermissionsController, MetricsController, AdminController
+from backend.Utils.metrics import MetricsMiddleware
+from backend.Utils.query_budget import QueryBudgetMiddleware
 import uvicorn
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, HTMLResponse
@@ -9,11 +17,18 @@ from starlette.middleware.cors import CORSMiddleware
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await database.connect()
+    email_outbox_sender.start()
+    otp_purge_job.start()
     yield
-    await database.disconnect()
+    await import_jobs.stop()
+    await otp_purge_job.stop()
+    await email_outbox_sender.stop()
+    await engine.dispose()
+    password_pool.shutdown()
+    bulk_password_pool.shutdown()
+    image_pool.shutdown()
 
-app = FastAPI(title="ETREE", lifespan=lifespan)
+app = FastAPI(title="ETREE", lifespan=lifespan, dependencies=[Depends(request_session_scope)])
 
 
 allowed_origins = (
@@ -30,12 +45,22 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+if settings.QUERY_BUDGET_MODE != "off":
+    app.add_middleware(QueryBudgetMiddleware)
+
+# Outermost, so it times everything above
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # api routes
 app.include_router(AuthController.router, prefix="/api/auth", tags=["auth"])
 app.include_router(RoleController.router, prefix="/api/roles", tags=["roles"])
 app.include_router(RequiredFieldsForUsersController.router, prefix='/api/user-required-fields', tags=["required fields for users"])
 app.include_router(UserController.router, prefix='/api/user', tags=['users'])
 app.include_router(RolePermissionsController.router, prefix='/api/role-permissions', tags=['role permissions'])
+app.include_router(AdminController.router, prefix='/api/admin', tags=['admin'])
+if settings.METRICS_ENABLED:
+    app.include_router(MetricsController.router)
 
 
 # static file routes
@@ -44,7 +69,7 @@ app.mount("/assets", StaticFiles(directory="backend/Public/assets"), name="front
 
 @app.get("/{full_path:path}", response_class=HTMLResponse)
 async def serve_spa(full_path: str):
-    if full_path.startswith("api") or full_path.startswith("media"):
+    if full_path.startswith("api") or full_path.startswith("media") or full_path == "metrics":
         return {"detail": "Not Found"}
     return FileResponse("backend/Public/index.html")
 
@@ -156,3 +156,71 @@ BEFORE INSERT OR UPDATE ON "RolePermissions"
 FOR EACH ROW
 EXECUTE FUNCTION set_timestamps();
 
+
+
+CREATE TABLE "EmailOutbox" (
+    "Id" BIGSERIAL PRIMARY KEY,
+    "ToAddress" VARCHAR(255) NOT NULL,
+    "Subject" VARCHAR(255) NOT NULL,
+    "PlainText" TEXT,
+    "HtmlContent" TEXT,
+    "Status" VARCHAR(20) NOT NULL DEFAULT 'pending' CHECK ("Status" IN ('pending', 'sending', 'sent', 'failed')),
+    "Attempts" INT NOT NULL DEFAULT 0,
+    "NextAttemptAt" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    "LastError" TEXT,
+    "ProviderMessageId" VARCHAR(255),
+    "CreatedAt" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    "SentAt" TIMESTAMPTZ
+);
+
+-- senders only ever scan messages that still need delivering
+CREATE INDEX idx_emailoutbox_due
+ON "EmailOutbox" ("NextAttemptAt")
+WHERE "Status" IN ('pending', 'sending');
+
+
+
+-- content-addressed protected documents: one row (and one file on disk) per distinct SHA-256
+CREATE TABLE "ProtectedFiles" (
+    "Digest" CHAR(64) PRIMARY KEY,
+    "SizeBytes" BIGINT NOT NULL,
+    "MimeType" VARCHAR(255),
+    "RefCount" INT NOT NULL DEFAULT 1 CONSTRAINT check_protectedfiles_refcount CHECK ("RefCount" >= 0),
+    "CreatedAt" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    "UpdatedAt" TIMESTAMPTZ
+);
+
+-- keyset pagination of a role's users: WHERE RoleId, IsActive ORDER BY CreatedAt, Id
+CREATE INDEX idx_users_role_active_created
+ON "Users" ("RoleId", "IsActive", "CreatedAt", "Id");
+
+-- one value per user and field (target of the ON CONFLICT upserts);
+-- keep only the newest row of any existing duplicates first
+-- (a removed duplicate document keeps its ProtectedFiles reference; the blob just stays)
+DELETE FROM "UsersFieldData" a
+USING "UsersFieldData" b
+WHERE a."UserId" = b."UserId"
+  AND a."RequiredFieldId" = b."RequiredFieldId"
+  AND a."Id" < b."Id";
+
+ALTER TABLE "UsersFieldData"
+ADD CONSTRAINT uq_usersfielddata_user_field UNIQUE ("UserId", "RequiredFieldId");
+
+-- OTP consume: UPDATE ... WHERE UserId, Code, NOT IsUsed ... RETURNING
+CREATE INDEX idx_otps_unused
+ON "Otps" ("UserId", "Code")
+WHERE "IsUsed" = FALSE;
+
+-- background purge of expired OTPs in bounded batches
+CREATE INDEX idx_otps_expires
+ON "Otps" ("ExpiresAt");
+
+-- bumped on password/role change, deactivation and role rename; access tokens
+-- carrying an older version are rejected (AUTH_TOKEN_MODE=claims)
+ALTER TABLE "Users"
+ADD COLUMN "TokenVersion" INT NOT NULL DEFAULT 0;
+
+-- failed messages no longer keep their bodies (older welcome mails carried passwords)
+UPDATE "EmailOutbox"
+SET "PlainText" = NULL, "HtmlContent" = NULL
+WHERE "Status" = 'failed';
@@ -9,6 +9,7 @@ export default function AddUser() {
 
     const [creatableRoles, setCreatableRoles] = useState<any[]>([]);
     const [usersList, setUsersList] = useState<any[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [showEditor, setShowEditor] = useState(false);
     const [selectedUser, setSelectedUser] = useState<any | null>(null);  // 👈 UPDATED
 
@@ -64,13 +65,14 @@ export default function AddUser() {
         load();
     }, []);
 
-    // Fetch users for selected role
-    const loadUsersOfRole = async (roleId: number) => {
+    // Fetch users for selected role, one page at a time (cursor continues the list)
+    const loadUsersOfRole = async (roleId: number, cursor: string | null = null) => {
         try {
-            const res = await user.getUsersByRole(roleId) as any;
+            const page = await user.getUsersByRole(roleId, cursor);
 
-            if (res?.status === "success") {
-                setUsersList(res.data || []);
+            if (page) {
+                setUsersList((prev) => (cursor ? [...prev, ...page.users] : page.users));
+                setNextCursor(page.next_cursor);
             }
         } catch (err) {
             console.log("Failed to load users", err);
@@ -201,7 +203,7 @@ export default function AddUser() {
                                     <img
                                         src={
                                             u?.profile_picture
-                                                ? `${backendUrl}${u.profile_picture}`
+                                                ? `${backendUrl}${u.profile_picture_variants?.webp["64"] ?? u.profile_picture}`
                                                 : `${backendUrl}/media/default.png`
                                         }
                                         alt="Profile"
@@ -225,6 +227,15 @@ export default function AddUser() {
                         ))}
                     </tbody>
                 </table>
+
+                {nextCursor && (
+                    <button
+                        className={styles.loadMoreBtn}
+                        onClick={() => loadUsersOfRole(form.role_id, nextCursor)}
+                    >
+                        Load more
+                    </button>
+                )}
             </div>
         </>
     );
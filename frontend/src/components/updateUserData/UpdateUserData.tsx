@@ -19,6 +19,7 @@ export default function UpdateUserData({ user }: UpdateUserDataProps) {
     fields,
     loadFields,
     updateField,
+    updateFields,
     uploadDocument,
     deleteDocument,
     downloadDocument,
@@ -26,6 +27,7 @@ export default function UpdateUserData({ user }: UpdateUserDataProps) {
 
   const showLoader = useLoader();
   const [localValues, setLocalValues] = useState<Record<number, any>>({});
+  const [fieldErrors, setFieldErrors] = useState<Record<number, string>>({});
 
   const targetId = user?.user_id; // The ID we will target
 
@@ -66,6 +68,29 @@ export default function UpdateUserData({ user }: UpdateUserDataProps) {
     }
   };
 
+  /** Save every changed non-document field in one request */
+  const handleSaveAll = async () => {
+    const changed: Record<number, any> = {};
+    fields.forEach((f) => {
+      if (f.field_type === "document") return;
+      const value = localValues[f.field_id];
+      if (JSON.stringify(value) !== JSON.stringify(f.value ?? "")) {
+        changed[f.field_id] = value;
+      }
+    });
+    if (Object.keys(changed).length === 0) {
+      toast("Nothing to save");
+      return;
+    }
+
+    showLoader(true);
+    try {
+      setFieldErrors(await updateFields(changed, targetId));
+    } finally {
+      showLoader(false);
+    }
+  };
+
   /** Upload file */
   const handleUpload = async (fieldId: number, file: File) => {
     showLoader(true);
@@ -196,6 +221,10 @@ export default function UpdateUserData({ user }: UpdateUserDataProps) {
               </div>
             )}
 
+            {fieldErrors[field.field_id] && (
+              <div className={styles.fieldError}>{fieldErrors[field.field_id]}</div>
+            )}
+
             {/* SAVE BUTTON */}
             {field.field_type !== "document" && (
               <button
@@ -209,6 +238,10 @@ export default function UpdateUserData({ user }: UpdateUserDataProps) {
           </div>
         ))}
       </div>
+
+      <button type="button" className={styles.saveAllBtn} onClick={handleSaveAll}>
+        Save all
+      </button>
     </>
   );
 }
@@ -122,7 +122,11 @@ export const AuthProvider = ({ children }: { children: ReactNode }) => {
     try {
       const res = await AuthService.updateProfilePicture(file);
       if (res.status === "success" && user) {
-        setUser({ ...user, profile_picture: res.data?.profile_picture_url });
+        setUser({
+          ...user,
+          profile_picture: res.data?.profile_picture_url,
+          profile_picture_variants: res.data?.profile_picture_variants,
+        });
       } else {
         throw new Error(res.message);
       }
@@ -8,7 +8,7 @@ import {
 import type { ReactNode } from "react";
 import { toast } from "react-hot-toast";
 import { UserService } from "../services/users";
-import type { UserFieldResponse } from "../services/users";
+import type { UserFieldResponse, UsersPage } from "../services/users";
 import { useAuth } from "./AuthContext";
 
 interface UserContextType {
@@ -22,6 +22,11 @@ interface UserContextType {
     target_user_id?: string
   ) => Promise<void>;
 
+  updateFields: (
+    values: Record<number, any>,
+    target_user_id?: string
+  ) => Promise<Record<number, string>>;
+
   uploadDocument: (
     fieldId: number,
     file: File,
@@ -45,7 +50,7 @@ interface UserContextType {
     role_id: number;
   }) => Promise<any>;
 
-  getUsersByRole: (role_id: number) => Promise<any[] | null>;   // ✅ NEW
+  getUsersByRole: (role_id: number, cursor?: string | null) => Promise<UsersPage | null>;
 }
 
 const UserContext = createContext<UserContextType | undefined>(undefined);
@@ -94,6 +99,32 @@ export const UserProvider = ({ children }: { children: ReactNode }) => {
     }
   };
 
+  // Returns per-field errors ({} when everything was saved)
+  const updateFields = async (
+    values: Record<number, any>,
+    target_user_id?: string
+  ): Promise<Record<number, string>> => {
+    setIsLoading(true);
+    try {
+      const res = await UserService.updateMyFields(values, target_user_id);
+      if (res.status === "success") {
+        toast.success("Fields updated");
+        await loadFields(target_user_id);
+      }
+      return {};
+    } catch (err: any) {
+      const detail = err?.response?.data?.detail;
+      if (detail?.data?.errors) {
+        toast.error(detail.message || "Some fields could not be saved");
+        return detail.data.errors;
+      }
+      toast.error(typeof detail === "string" ? detail : "Failed to update fields");
+      return {};
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
   const uploadDocument = async (
     fieldId: number,
     file: File,
@@ -183,13 +214,13 @@ export const UserProvider = ({ children }: { children: ReactNode }) => {
   };
 
   // ✅ NEW: Get users by role ID with backend permission check
-  const getUsersByRole = async (role_id: number): Promise<any[] | null> => {
+  const getUsersByRole = async (role_id: number, cursor?: string | null): Promise<UsersPage | null> => {
     setIsLoading(true);
     try {
-      const res = await UserService.getUsersByRole(role_id);
+      const res = await UserService.getUsersByRole(role_id, cursor);
 
       if (res.status === "success") {
-        return res.data || [];
+        return res.data;
       } else {
         toast.error(res.message || "Failed to fetch users");
         return null;
@@ -212,6 +243,7 @@ export const UserProvider = ({ children }: { children: ReactNode }) => {
       isLoading,
       loadFields,
       updateField,
+      updateFields,
       uploadDocument,
       downloadDocument,
       deleteDocument,
@@ -9,6 +9,18 @@ export interface User {
   full_name: string;
   role: string;
   profile_picture?: string | null;
+  profile_picture_variants?: ProfilePictureVariants | null;
+}
+
+// Keyed by size in px ("64", "128", "512")
+export interface ProfilePictureVariants {
+  sizes: Record<string, string>;
+  webp: Record<string, string>;
+}
+
+export interface UsersPage {
+  users: User[];
+  next_cursor: string | null;
 }
 
 export interface CreateUser {
@@ -33,6 +45,10 @@ export interface UserFieldValueInput {
   value: any;
 }
 
+export interface UserFieldValuesInput {
+  values: Record<number, any>;
+}
+
 export const UserService = {
   createUser: async (payload: {
     full_name: string;
@@ -45,9 +61,13 @@ export const UserService = {
   },
 
   getUsersByRole: async (
-    role_id: number
-  ): Promise<ResponseMessage<any[]>> => {
-    const res = await api.get(`/user/by-role/${role_id}`);
+    role_id: number,
+    cursor?: string | null,
+    limit: number = 50
+  ): Promise<ResponseMessage<UsersPage>> => {
+    const res = await api.get(`/user/by-role/${role_id}`, {
+      params: cursor ? { cursor, limit } : { limit },
+    });
     return res.data;
   },
   /**
@@ -79,6 +99,23 @@ export const UserService = {
     return res.data;
   },
 
+  /**
+   * Save several non-document fields at once ({ field_id: value }).
+   * Either all of them are saved or none; a 400 carries detail.data.errors.
+   */
+  updateMyFields: async (
+    values: Record<number, any>,
+    target_user_id?: string
+  ): Promise<ResponseMessage> => {
+    const payload: UserFieldValuesInput = { values };
+
+    const res = await api.put(`/user/me/fields`, payload, {
+      params: target_user_id ? { target_user_id } : {},
+    });
+
+    return res.data;
+  },
+
   /**
    * Upload document field
    */